@@ -1,10 +1,22 @@
+import json
 import logging
-from typing import Any
+from typing import Any, AsyncIterator, Dict, List, Tuple
 
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import ValidationError
 
+from ..core.config import config
+from ..core.constants import IngestStatus
 from ..core.logging import get_logger
+from ..core.webhook_parser import (
+    BatchDecoder,
+    DecodedItem,
+    WebhookDecodeError,
+    WebhookEntry,
+    WebhookFormatError,
+    loads,
+    parse_webhook,
+)
 from ..models.schemas import APIResponse, WebhookPayload
 from ..services.queue_service import queue_service
 
@@ -14,6 +26,9 @@ webhook_logger = get_logger("feedsieve.webhook")
 # 创建路由器
 router = APIRouter()
 
+WEBHOOK_PATH = "/api/webhook/053e46c8c41a4de199c4"
+BATCH_WEBHOOK_PATH = f"{WEBHOOK_PATH}/batch"
+
 
 class WebhookController:
     """Webhook控制器"""
@@ -21,22 +36,65 @@ class WebhookController:
     def __init__(self):
         self.queue_service = queue_service
 
-    async def receive_webhook(self, payload: Any) -> APIResponse:
+    @staticmethod
+    def validate_payload(payload: Any) -> WebhookEntry:
+        """
+        校验已解码的载荷，提取处理流程使用的字段
+
+        快速模式只校验用到的字段，否则构建完整的 WebhookPayload
+
+        Raises:
+            ValidationError/TypeError/ValueError: 参数格式不符合要求（含 WebhookFormatError）
+        """
+        if config.get_webhook_config()["fast_ingest"]:
+            return parse_webhook(payload)
+
+        validated_payload = WebhookPayload(**payload)
+        return WebhookEntry(
+            feed_url=validated_payload.feed.url,
+            title=validated_payload.entry.title,
+            content=validated_payload.entry.content,
+            article_url=validated_payload.entry.url,
+        )
+
+    @classmethod
+    def parse_payload(cls, body: bytes) -> WebhookEntry:
+        """
+        解码并校验请求体，提取处理流程使用的字段
+
+        Raises:
+            WebhookDecodeError: JSON 解码失败
+            ValidationError/TypeError/ValueError: 参数格式不符合要求（含 WebhookFormatError）
+        """
+        if config.get_webhook_config()["fast_ingest"]:
+            payload = loads(body)
+        else:
+            try:
+                payload = json.loads(body)
+            except ValueError as e:
+                raise WebhookDecodeError(f"JSON 解码失败: {e}")
+        return cls.validate_payload(payload)
+
+    async def receive_webhook(self, body: bytes) -> APIResponse:
         """接收内容webhook"""
         try:
             # 严格校验请求参数格式
             try:
-                validated_payload = WebhookPayload(**payload)
+                entry = self.parse_payload(body)
+            except WebhookDecodeError as e:
+                # JSON 解码失败，返回 404 (无响应内容)
+                webhook_logger.debug(f"Webhook 请求体不是有效的JSON: {e}")
+                raise HTTPException(status_code=404)
             except (ValidationError, TypeError, ValueError) as e:
                 # 参数格式不符合要求，返回 404 (无响应内容)
                 webhook_logger.warning(f"Webhook 参数格式错误: {e}")
                 raise HTTPException(status_code=404)
 
             # 提取数据
-            feed_url = validated_payload.feed.url
-            title = validated_payload.entry.title
-            content = validated_payload.entry.content or ""
-            article_url = validated_payload.entry.url
+            feed_url = entry.feed_url
+            title = entry.title
+            content = entry.content or ""
+            article_url = entry.article_url
 
             webhook_logger.info(
                 f"接收到 Webhook: feed_url={feed_url}, title={title}, article_url={article_url}"
@@ -74,6 +132,68 @@ class WebhookController:
             # 服务器内部错误也返回 404 (无响应内容)
             raise HTTPException(status_code=404)
 
+    async def receive_webhook_batch(self, chunks: AsyncIterator[bytes]) -> APIResponse:
+        """接收批量内容webhook（JSON数组或NDJSON），边接收边解码"""
+        try:
+            max_entries = config.get_webhook_config()["batch_max_entries"]
+            decoder = BatchDecoder(limit=max_entries)
+            results: List[Dict[str, Any]] = []
+            entries: List[Tuple[int, WebhookEntry]] = []
+
+            def collect(items: List[DecodedItem]):
+                for index, payload in items:
+                    try:
+                        if isinstance(payload, WebhookFormatError):
+                            raise payload
+                        entry = self.validate_payload(payload)
+                        if not entry.feed_url or not entry.title or not entry.article_url:
+                            raise WebhookFormatError("缺少必要字段: feed.url、entry.title 或 entry.url")
+                    except (ValidationError, TypeError, ValueError) as e:
+                        results.append({"index": index, "status": IngestStatus.INVALID, "error": str(e)[:200]})
+                        continue
+                    entries.append((index, entry._replace(content=entry.content or "")))
+
+            try:
+                async for chunk in chunks:
+                    collect(decoder.feed(chunk))
+                    if decoder.truncated:
+                        # 达到条目数上限，不再读取剩余的请求体
+                        webhook_logger.warning(f"批量 Webhook 条目数超过上限 {max_entries}，忽略之后的条目")
+                        break
+                else:
+                    collect(decoder.close())
+            except WebhookDecodeError as e:
+                # 请求体无法继续解码（如JSON数组语法错误），整批不处理
+                webhook_logger.warning(f"批量 Webhook 请求体解码失败: {e}")
+                raise HTTPException(status_code=404)
+
+            if not decoder.count:
+                webhook_logger.warning("批量 Webhook 请求体中没有条目")
+                raise HTTPException(status_code=404)
+
+            if entries:
+                results.extend(await self.queue_service.add_batch_to_queue(entries))
+            results.sort(key=lambda result: result["index"])
+
+            summary = {status.value: 0 for status in IngestStatus}
+            for result in results:
+                summary[result["status"].value] += 1
+
+            webhook_logger.info(
+                f"批量 Webhook 处理完成: total={decoder.count}, truncated={decoder.truncated}, {summary}")
+
+            return APIResponse(
+                success=True,
+                message="批量 Webhook 处理成功",
+                data={"total": decoder.count, **summary, "truncated": decoder.truncated, "results": results},
+            )
+
+        except HTTPException:
+            raise HTTPException(status_code=404)
+        except Exception as e:
+            webhook_logger.error(f"批量 Webhook 处理失败: {e}")
+            raise HTTPException(status_code=404)
+
 
 # 创建控制器实例
 webhook_controller = WebhookController()
@@ -81,7 +201,7 @@ webhook_controller = WebhookController()
 
 # 注册路由
 @router.post(
-    "/api/webhook/053e46c8c41a4de199c4",
+    WEBHOOK_PATH,
     response_model=APIResponse,
     summary="接收内容 Webhook",
     tags=["Webhook"],
@@ -104,21 +224,54 @@ async def receive_webhook(request: Request):
     - 必须包含完整的 WebhookPayload 结构
     """
     try:
-        # 获取请求体
-        payload = await request.json()
+        # 获取请求体（按配置在控制器中解码和校验）
+        body = await request.body()
     except Exception:
-        # JSON 解析失败，返回 404
+        # 读取请求体失败，返回 404
         raise HTTPException(status_code=404)
 
-    return await webhook_controller.receive_webhook(payload)
+    return await webhook_controller.receive_webhook(body)
 
 
 # 捕获所有其他 HTTP 方法，返回 404（无内容）
 @router.api_route(
-    "/api/webhook/053e46c8c41a4de199c4",
+    WEBHOOK_PATH,
     methods=["GET", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"],
     include_in_schema=False,
 )
 async def webhook_method_not_allowed():
     """非 POST 请求返回 404，无响应内容"""
     raise HTTPException(status_code=404)
+
+
+@router.post(
+    BATCH_WEBHOOK_PATH,
+    response_model=APIResponse,
+    summary="批量接收内容 Webhook",
+    tags=["Webhook"],
+    responses={404: {"description": "请求格式错误或端点不存在", "content": {}}},
+)
+async def receive_webhook_batch(request: Request):
+    """
+    批量接收 Webhook（用于回填等一次推送大量条目的场景）
+
+    - 请求体为 WebhookPayload 的JSON数组，或NDJSON（每行一个 WebhookPayload）
+    - 边接收边解码，每个条目的校验方式与单条接口相同
+    - 批次内按文章URL去重，再与队列和记录去重，在一个事务中写入队列
+    - 响应中按条目序号返回每个条目的处理结果
+
+    注意：
+    - 单个条目格式错误只影响该条目；请求体无法解码（如JSON数组语法错误）时整批返回 404
+    """
+    return await webhook_controller.receive_webhook_batch(request.stream())
+
+
+# 捕获所有其他 HTTP 方法，返回 404（无内容）
+@router.api_route(
+    BATCH_WEBHOOK_PATH,
+    methods=["GET", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"],
+    include_in_schema=False,
+)
+async def webhook_batch_method_not_allowed():
+    """非 POST 请求返回 404，无响应内容"""
+    raise HTTPException(status_code=404)
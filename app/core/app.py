@@ -5,6 +5,7 @@
 """
 
 import asyncio
+import json
 import logging
 from contextlib import asynccontextmanager
 
@@ -17,8 +18,14 @@ from ..middleware import (
     setup_cors,
     setup_error_handlers,
 )
+from ..services.classifier_service import classifier_service
+from ..services.completeness_service import completeness_service
+from ..services.content_fetcher_service import content_fetcher_service
+from ..services.prefilter_service import prefilter_service
 from ..services.queue_service import queue_service
+from ..services.readwise_outbox_service import readwise_outbox_service
 from .database import db
+from .http_client import get_route_stats
 from .logging import setup_logging
 
 logger = logging.getLogger(__name__)
@@ -30,11 +37,13 @@ async def task_processor():
 
     # 获取队列处理间隔配置
     process_interval = config.get_queue_config().get("process_interval_seconds", 300)
-    error_wait_time = min(60, process_interval // 5)  # 错误时等待时间，不超过配置间隔的1/5
 
     logger.info(f"队列处理间隔设置为: {process_interval}秒 ({process_interval//60}分钟)")
 
     while True:
+        # 每轮读取一次，重新加载配置后立即生效
+        process_interval = config.get_queue_config().get("process_interval_seconds", 300)
+        error_wait_time = min(60, process_interval // 5)  # 错误时等待时间，不超过配置间隔的1/5
         try:
             await queue_service.process_queue()
             await asyncio.sleep(process_interval)
@@ -43,17 +52,102 @@ async def task_processor():
             await asyncio.sleep(error_wait_time)
 
 
+def collect_status() -> dict:
+    """汇总各服务的运行状态"""
+    from ..core.config import config
+
+    return {
+        "llm": queue_service.llm_service.get_status(),
+        "fetcher": content_fetcher_service.get_stats(),
+        "routes": get_route_stats(),
+        "prefetch": queue_service.get_prefetch_stats(),
+        "completeness": completeness_service.get_stats(),
+        "readwise": readwise_outbox_service.get_stats(),
+        "prefilter": prefilter_service.get_stats(),
+        "classifier": classifier_service.get_stats(),
+        "prompt_router": config.prompt_router.get_stats(),
+        "config": {"version": config.snapshot.version, **config.reload_stats},
+    }
+
+
+async def status_reporter(interval: int):
+    """定期将服务状态（连接复用、握手耗时等）输出到日志"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            logger.info(f"服务状态: {json.dumps(collect_status(), ensure_ascii=False)}")
+        except Exception as e:
+            logger.error(f"输出服务状态失败: {e}")
+
+
+async def classifier_trainer():
+    """启用本地分类器时，启动后及之后定期用历史判断结果重新训练"""
+    trained_at = None
+    while True:
+        interval_seconds = classifier_service.retrain_interval_hours * 3600
+        due = trained_at is None or asyncio.get_running_loop().time() - trained_at >= interval_seconds
+        if classifier_service.enabled and due:
+            trained_at = asyncio.get_running_loop().time()
+            try:
+                await asyncio.to_thread(classifier_service.train)
+            except Exception as e:
+                logger.error(f"训练本地分类器失败: {e}")
+        # 定期检查，配置重新加载后启用或调整间隔能及时生效
+        await asyncio.sleep(60)
+
+
+async def config_watcher(interval: float):
+    """定期检查配置文件，变更后重新加载（校验失败时保留原配置）"""
+    from ..core.config import config
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if config.files_changed() and await asyncio.to_thread(config.reload):
+                # prompt可能已变更，清理失效的LLM缓存
+                queue_service.llm_service.prune_cache()
+        except Exception as e:
+            logger.error(f"检查配置文件变更失败: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用程序生命周期管理"""
+    from ..core.config import config
+
     # 启动时初始化
     logger.info("正在启动 feedsieve...")
 
     # 创建数据库表
     db.create_tables()
 
+    # 清理prompt已变更的LLM缓存
+    queue_service.llm_service.prune_cache()
+
+    # 清理过期的网页抓取缓存
+    content_fetcher_service.page_cache.evict()
+
+    # 启动网页解析工作进程
+    await asyncio.to_thread(content_fetcher_service.extraction_pool.start)
+
     # 启动任务处理循环
-    asyncio.create_task(task_processor())
+    background_tasks = [asyncio.create_task(task_processor())]
+
+    # 启动Readwise发送循环
+    background_tasks.append(asyncio.create_task(readwise_outbox_service.run()))
+
+    # 启动本地分类器训练循环
+    background_tasks.append(asyncio.create_task(classifier_trainer()))
+
+    # 启动配置文件监视
+    reload_config = config.get_reload_config()
+    if reload_config["enabled"]:
+        background_tasks.append(asyncio.create_task(config_watcher(reload_config["interval_seconds"])))
+
+    # 启动状态输出循环
+    status_interval = config.get_logging_config()["status_interval_seconds"]
+    if status_interval > 0:
+        background_tasks.append(asyncio.create_task(status_reporter(status_interval)))
 
     logger.info("feedsieve 启动完成")
     yield
@@ -61,6 +155,17 @@ async def lifespan(app: FastAPI):
     # 关闭时清理
     logger.info("正在关闭 feedsieve...")
 
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+
+    # 关闭长连接客户端
+    await queue_service.llm_service.aclose()
+    await queue_service.cancel_prefetch()
+    await content_fetcher_service.aclose()
+    await readwise_outbox_service.aclose()
+    logger.info(f"服务状态: {json.dumps(collect_status(), ensure_ascii=False)}")
+
 
 def create_app() -> FastAPI:
     """创建 FastAPI 应用程序实例"""
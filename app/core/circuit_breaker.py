@@ -0,0 +1,78 @@
+"""
+熔断器
+
+连续失败达到阈值后打开熔断，冷却期结束后进入半开状态放行一次探测请求，
+探测成功则关闭熔断，失败则重新打开
+"""
+
+import time
+from typing import Any, Dict
+
+
+class CircuitBreaker:
+    """熔断器"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, cooldown_seconds: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.open_count = 0
+        self._probe_in_flight = False
+
+    def is_available(self) -> bool:
+        """是否可以发送请求（不占用半开探测名额）"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return time.monotonic() - self.opened_at >= self.cooldown_seconds
+        return not self._probe_in_flight
+
+    def acquire(self) -> bool:
+        """申请发送请求，半开状态下只放行一个探测请求"""
+        if not self.is_available():
+            return False
+        if self.state != self.CLOSED:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = True
+        return True
+
+    def record_success(self):
+        """记录成功"""
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        """记录失败"""
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.open_count += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def release(self):
+        """请求被取消时释放半开探测名额，不改变熔断状态"""
+        self._probe_in_flight = False
+
+    def remaining_cooldown(self) -> float:
+        """距离允许探测的剩余秒数"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.cooldown_seconds - (time.monotonic() - self.opened_at))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出熔断状态"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "open_count": self.open_count,
+            "remaining_cooldown_seconds": round(self.remaining_cooldown(), 1),
+        }
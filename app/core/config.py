@@ -1,7 +1,52 @@
-from typing import Any, Dict, Optional
-
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+from .prompt_router import PromptRoute, PromptRouter
 from .settings import AppConfig
 
+logger = logging.getLogger(__name__)
+
+
+class ConfigSnapshot:
+    """
+    某一次加载的完整配置及由其构建的索引，创建后不再修改
+
+    重新加载配置时创建新的快照并整体替换，正在处理的任务固定使用开始时的快照
+    """
+
+    __slots__ = ("version", "app_config", "prompts", "prompt_router", "loaded_at", "_derived", "_lock")
+
+    def __init__(self, version: int, app_config: AppConfig):
+        self.version = version
+        self.app_config = app_config
+        # prompt配置和路由在加载时构建一次
+        self.prompts = app_config.get_prompts_dict()
+        self.prompt_router = PromptRouter(self.prompts)
+        self.loaded_at = time.time()
+        # 各服务按快照构建的派生对象（如编译后的规则），随快照一起释放
+        self._derived: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    def derive(self, name: Hashable, factory: Callable[["ConfigSnapshot"], Any]) -> Any:
+        """获取按本快照构建的派生对象，首次访问时调用 factory 构建"""
+        try:
+            return self._derived[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = factory(self)
+            return self._derived[name]
+
+
+# 当前任务固定使用的配置快照（asyncio任务创建时会复制上下文，子任务沿用同一快照）
+_pinned_snapshot: ContextVar[Optional[ConfigSnapshot]] = ContextVar("pinned_config_snapshot", default=None)
+
 
 class Config:
     """配置管理类 - 基于Pydantic的类型安全配置"""
@@ -11,13 +56,75 @@ class Config:
                  secrets_path: str = "config/secrets.yaml"):
         self.config_path = config_path
         self.secrets_path = secrets_path
-        self._app_config = AppConfig.load_from_files(config_path, secrets_path)
+        self._file_state = self._get_file_state()
+        self._snapshot = ConfigSnapshot(1, AppConfig.load_from_files(config_path, secrets_path))
+        self._reload_lock = threading.Lock()
+        self.reload_stats = {"reloads": 0, "failures": 0, "last_error": ""}
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """当前任务使用的配置快照：已固定时返回固定的快照，否则返回最新快照"""
+        return _pinned_snapshot.get() or self._snapshot
+
+    @contextmanager
+    def pinned(self) -> Iterator[ConfigSnapshot]:
+        """在上下文内固定使用当前快照，期间重新加载的配置不影响本次处理"""
+        snapshot = self.snapshot
+        token = _pinned_snapshot.set(snapshot)
+        try:
+            yield snapshot
+        finally:
+            _pinned_snapshot.reset(token)
+
+    def _get_file_state(self) -> Tuple[Tuple[float, int], ...]:
+        """配置文件的修改时间和大小，用于判断文件是否变更"""
+        state = []
+        for path in (self.config_path, self.secrets_path):
+            try:
+                stat = os.stat(path)
+                state.append((stat.st_mtime, stat.st_size))
+            except OSError:
+                state.append((0.0, -1))
+        return tuple(state)
+
+    def files_changed(self) -> bool:
+        """配置文件自上次加载后是否有变更"""
+        return self._get_file_state() != self._file_state
+
+    def reload(self) -> bool:
+        """
+        重新加载配置文件，校验通过后原子地替换为新快照
+
+        Returns:
+            是否加载成功；校验失败时保留原有配置
+        """
+        with self._reload_lock:
+            file_state = self._get_file_state()
+            try:
+                app_config = AppConfig.load_from_files(self.config_path, self.secrets_path)
+                snapshot = ConfigSnapshot(self._snapshot.version + 1, app_config)
+            except Exception as e:
+                # 文件可能正在写入，记录状态以免重复报错，下次变更时再尝试
+                self._file_state = file_state
+                self.reload_stats["failures"] += 1
+                self.reload_stats["last_error"] = str(e)
+                logger.error(f"重新加载配置失败，继续使用版本 {self._snapshot.version}: {e}")
+                return False
+
+            self._file_state = file_state
+            self._snapshot = snapshot
+            self.reload_stats["reloads"] += 1
+            self.reload_stats["last_error"] = ""
+            logger.info(
+                f"配置已重新加载: 版本 {snapshot.version}, "
+                f"{len(snapshot.prompts)} 个prompt配置, {len(app_config.llm.endpoints)} 个LLM endpoints")
+            return True
 
     def get(self, key: str, default: Any = None) -> Any:
         """获取配置值（向后兼容方法）"""
         # 将点分隔的key转换为对象属性访问
         keys = key.split(".")
-        value = self._app_config
+        value = self.snapshot.app_config
 
         for k in keys:
             if hasattr(value, k):
@@ -29,40 +136,77 @@ class Config:
 
     def get_auth(self) -> Dict[str, str]:
         """获取认证配置"""
-        return self._app_config.get_auth_dict()
+        return self.snapshot.app_config.get_auth_dict()
 
     def get_api_config(self) -> Dict[str, str]:
         """获取API配置"""
-        return self._app_config.get_api_dict()
+        return self.snapshot.app_config.get_api_dict()
 
     def get_llm_config(self) -> Dict[str, Any]:
         """获取LLM配置"""
-        return self._app_config.get_llm_dict()
+        return self.snapshot.app_config.get_llm_dict()
 
-    def get_proxy_config(self) -> Optional[Dict[str, str]]:
+    def get_proxy_config(self) -> Optional[Dict[str, Any]]:
         """获取代理配置"""
-        return self._app_config.get_proxy_dict()
+        return self.snapshot.app_config.get_proxy_dict()
+
+    def get_proxy_url(self, client: str) -> Optional[str]:
+        """获取出站客户端（fetcher/llm/readwise）使用的代理URL"""
+        return self.snapshot.app_config.get_proxy_url(client)
 
     def get_prompts(self) -> Dict[str, Dict[str, Any]]:
         """获取prompt内容，按site匹配"""
-        return self._app_config.get_prompts_dict()
+        return self.snapshot.prompts
+
+    def resolve_prompt(self, feed_url: str) -> Optional[PromptRoute]:
+        """查找feed URL对应的prompt配置，没有匹配时返回 None"""
+        return self.snapshot.prompt_router.resolve(feed_url)
+
+    @property
+    def prompt_router(self) -> PromptRouter:
+        """获取prompt路由"""
+        return self.snapshot.prompt_router
 
     def get_queue_config(self) -> Dict[str, Any]:
         """获取队列配置"""
-        return self._app_config.get_queue_dict()
+        return self.snapshot.app_config.get_queue_dict()
+
+    def get_classifier_config(self) -> Dict[str, Any]:
+        """获取本地分类器配置"""
+        return self.snapshot.app_config.get_classifier_dict()
+
+    def get_reload_config(self) -> Dict[str, Any]:
+        """获取配置热加载配置"""
+        return self.snapshot.app_config.get_reload_dict()
+
+    def get_fetcher_config(self) -> Dict[str, Any]:
+        """获取网页内容抓取配置"""
+        return self.snapshot.app_config.get_fetcher_dict()
+
+    def get_completeness_config(self) -> Dict[str, Any]:
+        """获取Webhook内容完整性判断配置"""
+        return self.snapshot.app_config.get_completeness_dict()
+
+    def get_readwise_config(self) -> Dict[str, Any]:
+        """获取Readwise发送配置"""
+        return self.snapshot.app_config.get_readwise_dict()
+
+    def get_webhook_config(self) -> Dict[str, Any]:
+        """获取Webhook接收配置"""
+        return self.snapshot.app_config.get_webhook_dict()
 
     def get_database_url(self) -> str:
         """获取数据库URL"""
-        return self._app_config.database.url
+        return self.snapshot.app_config.database.url
 
-    def get_logging_config(self) -> Dict[str, str]:
+    def get_logging_config(self) -> Dict[str, Any]:
         """获取日志配置"""
-        return self._app_config.get_logging_dict()
+        return self.snapshot.app_config.get_logging_dict()
 
     @property
     def app_config(self) -> AppConfig:
         """获取完整的应用配置对象"""
-        return self._app_config
+        return self.snapshot.app_config
 
 
 # 全局配置实例
@@ -19,3 +19,19 @@ class QueueStatus(str, Enum):
     PROCESSING = "processing"
     FAILED = "failed"
     UNRECOVERABLE = "unrecoverable"
+
+
+class OutboxStatus(str, Enum):
+    """Readwise发送队列状态枚举"""
+    PENDING = "pending"      # 等待发送（含等待重试）
+    SENT = "sent"            # 已发送
+    FAILED = "failed"        # 不可重试的错误（请求无效）
+    EXHAUSTED = "exhausted"  # 可重试的错误但重试次数用尽，服务启动时重新加入发送队列
+
+
+class IngestStatus(str, Enum):
+    """批量Webhook条目处理结果枚举"""
+    QUEUED = "queued"        # 已加入队列
+    DUPLICATE = "duplicate"  # 与同一批次中靠前的条目URL重复
+    EXISTS = "exists"        # URL已存在于队列或记录中
+    INVALID = "invalid"      # 条目格式错误或缺少必要字段
@@ -0,0 +1,274 @@
+"""
+网页正文解析进程池
+
+trafilatura 解析是CPU密集的lxml操作，大网页需要几十到几百毫秒；放到独立的工作进程中执行，
+可以利用多核且不占用事件循环。提交队列有上限，单个网页有大小上限，
+解析超时时终止该工作进程并启动新的进程替换。
+
+工作进程由 forkserver 创建：主进程中已有事件循环、线程池和数据库连接，
+直接 fork 会把其他线程持有的锁带进子进程；forkserver 进程是单线程的，
+只预先导入本模块（含 trafilatura），不创建应用和服务实例，再为每个工作进程 fork。
+被替换的工作进程在线程中终止和启动，不阻塞事件循环
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import signal
+import time
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+# forkserver 预先导入本模块，工作进程无需重新导入
+import trafilatura
+
+logger = logging.getLogger(__name__)
+
+
+def _extract(html: Union[str, bytes]) -> Tuple[str, Any]:
+    """调用 trafilatura 解析网页，返回 (状态, 正文或错误信息)"""
+    try:
+        # 使用默认配置，专注于文本提取
+        return "ok", trafilatura.extract(html, config=None)
+    except Exception as e:
+        return "error", f"{type(e).__name__}: {e}"
+
+
+def _truncate(html: Union[str, bytes], max_bytes: int) -> Optional[Union[str, bytes]]:
+    """按 UTF-8 编码后的字节数截断网页，未超出时返回 None（文本截断时去掉被切开的末尾字符）"""
+    if isinstance(html, bytes):
+        return html[:max_bytes] if len(html) > max_bytes else None
+    # 每个字符最多4字节，字符数足够少时无需编码
+    if len(html) * 4 <= max_bytes:
+        return None
+    encoded = html.encode("utf-8", errors="ignore")
+    if len(encoded) <= max_bytes:
+        return None
+    return encoded[:max_bytes].decode("utf-8", errors="ignore")
+
+
+def _worker_main(conn: Connection):
+    """工作进程主循环：逐个接收网页并返回 (状态, 结果, CPU耗时)"""
+    # 中断信号由主进程处理，不沿用主进程（如uvicorn）安装的信号处理函数
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    while True:
+        try:
+            html = conn.recv()
+        except (EOFError, OSError):
+            return
+        started = time.process_time()
+        status, value = _extract(html)
+        conn.send((status, value, time.process_time() - started))
+
+
+class _Worker:
+    """一个解析工作进程及与其通信的管道"""
+
+    def __init__(self, context: Any):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def run(self, html: Union[str, bytes], timeout: float) -> Tuple[str, Any, float]:
+        """发送网页并等待结果（在线程中调用），超时抛出 TimeoutError"""
+        self.conn.send(html)
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"解析超过 {timeout} 秒")
+        return self.conn.recv()
+
+    def kill(self):
+        """终止工作进程"""
+        self.conn.close()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+
+
+class ExtractionPool:
+    """
+    网页正文解析进程池
+
+    workers 为 0 时在线程中解析（不启动工作进程），用于无法创建子进程的环境
+    """
+
+    def __init__(self, workers: int, queue_size: int, max_bytes: int, timeout_seconds: float):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_bytes = max_bytes
+        self.timeout_seconds = timeout_seconds
+
+        # 不支持 forkserver 的平台（Windows）使用 spawn，每个工作进程重新导入
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self._context = multiprocessing.get_context("forkserver")
+            # 只预先导入本模块；主模块按 multiprocessing 的约定在工作进程中以 __mp_main__ 导入
+            self._context.set_forkserver_preload([__name__])
+        else:
+            self._context = multiprocessing.get_context("spawn")
+        self._workers: List[_Worker] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._waiting = 0
+        self._replacing: Set[asyncio.Task] = set()
+
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "rejected": 0,
+            "truncated": 0,
+            "timeouts": 0,
+            "errors": 0,
+            "restarts": 0,
+            "parsed": 0,
+            "queue_wait_seconds": 0.0,
+            "latency_seconds": 0.0,
+            "cpu_seconds": 0.0,
+            "cpu_seconds_max": 0.0,
+        }
+
+    def start(self):
+        """启动全部工作进程（应用启动时在线程中调用；未调用时在首次解析时启动）"""
+        if not self.workers or self._idle is not None:
+            return
+        self._idle = asyncio.Queue()
+        for _ in range(self.workers):
+            worker = _Worker(self._context)
+            self._workers.append(worker)
+            self._idle.put_nowait(worker)
+        logger.info(f"网页解析进程池已启动: {self.workers} 个工作进程")
+
+    def _schedule_replace(self, worker: _Worker):
+        """在后台替换状态未知的工作进程（超时、崩溃或调用方取消）"""
+        task = asyncio.get_running_loop().create_task(self._replace(worker))
+        self._replacing.add(task)
+        task.add_done_callback(self._replacing.discard)
+
+    async def _replace(self, worker: _Worker):
+        """在线程中终止工作进程并启动新的进程，完成后放回空闲队列"""
+        def respawn() -> _Worker:
+            worker.kill()
+            return _Worker(self._context)
+
+        try:
+            replacement = await asyncio.to_thread(respawn)
+        except Exception as e:
+            # 放回已终止的工作进程，下次使用时失败会再次替换
+            logger.error(f"启动网页解析工作进程失败: {e}")
+            replacement = worker
+        else:
+            self.stats["restarts"] += 1
+
+        if self._idle is None or worker not in self._workers:
+            # 替换期间进程池已关闭
+            replacement.kill()
+            return
+        self._workers[self._workers.index(worker)] = replacement
+        self._idle.put_nowait(replacement)
+
+    async def _run_in_worker(self, html: Union[str, bytes]) -> Tuple[str, Any, float]:
+        """等待空闲工作进程并在其中解析"""
+        if self._idle is None:
+            self.start()
+
+        started = time.perf_counter()
+        self._waiting += 1
+        try:
+            worker = await self._idle.get()
+        finally:
+            self._waiting -= 1
+        self.stats["queue_wait_seconds"] += time.perf_counter() - started
+
+        try:
+            result = await asyncio.to_thread(worker.run, html, self.timeout_seconds)
+        except BaseException:
+            self._schedule_replace(worker)
+            raise
+        self._idle.put_nowait(worker)
+        return result
+
+    async def _run_in_thread(self, html: Union[str, bytes]) -> Tuple[str, Any, float]:
+        """在线程中解析（线程无法终止，超时后放弃等待结果）"""
+        def run() -> Tuple[str, Any, float]:
+            started = time.thread_time()
+            status, value = _extract(html)
+            return status, value, time.thread_time() - started
+
+        return await asyncio.wait_for(asyncio.to_thread(run), self.timeout_seconds)
+
+    async def extract(self, html: Union[str, bytes]) -> Optional[str]:
+        """
+        解析网页正文
+
+        Args:
+            html: 网页内容（已解码的文本，或由 trafilatura 自行检测编码的字节）
+
+        Returns:
+            正文纯文本；队列已满、超时或解析失败时返回 None
+        """
+        self.stats["submitted"] += 1
+        if self.workers and self._idle is not None and self._idle.empty() and self._waiting >= self.queue_size:
+            self.stats["rejected"] += 1
+            logger.warning(f"网页解析队列已满（{self._waiting} 个等待），放弃解析")
+            return None
+
+        truncated = _truncate(html, self.max_bytes)
+        if truncated is not None:
+            self.stats["truncated"] += 1
+            html = truncated
+
+        started = time.perf_counter()
+        try:
+            if self.workers:
+                status, value, cpu_seconds = await self._run_in_worker(html)
+            else:
+                status, value, cpu_seconds = await self._run_in_thread(html)
+        except (TimeoutError, asyncio.TimeoutError):
+            self.stats["timeouts"] += 1
+            logger.warning(f"网页解析超时（{self.timeout_seconds}秒），已终止")
+            return None
+        except (EOFError, OSError) as e:
+            self.stats["errors"] += 1
+            logger.error(f"网页解析工作进程异常退出: {e}")
+            return None
+
+        self.stats["parsed"] += 1
+        self.stats["latency_seconds"] += time.perf_counter() - started
+        self.stats["cpu_seconds"] += cpu_seconds
+        self.stats["cpu_seconds_max"] = max(self.stats["cpu_seconds_max"], cpu_seconds)
+        if status != "ok":
+            self.stats["errors"] += 1
+            logger.error(f"网页解析失败: {value}")
+            return None
+        self.stats["completed"] += 1
+        return value
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取解析统计"""
+        parsed = self.stats["parsed"]
+        return {
+            "workers": self.workers,
+            "alive_workers": sum(1 for worker in self._workers if worker.process.is_alive()),
+            "waiting": self._waiting,
+            "submitted": self.stats["submitted"],
+            "completed": self.stats["completed"],
+            "rejected": self.stats["rejected"],
+            "truncated": self.stats["truncated"],
+            "timeouts": self.stats["timeouts"],
+            "errors": self.stats["errors"],
+            "restarts": self.stats["restarts"],
+            "avg_queue_wait_ms": round(
+                self.stats["queue_wait_seconds"] / self.stats["submitted"] * 1000, 2
+            ) if self.stats["submitted"] else 0.0,
+            # 含等待空闲工作进程的时间
+            "avg_latency_ms": round(self.stats["latency_seconds"] / parsed * 1000, 2) if parsed else 0.0,
+            "avg_cpu_ms": round(self.stats["cpu_seconds"] / parsed * 1000, 2) if parsed else 0.0,
+            "max_cpu_ms": round(self.stats["cpu_seconds_max"] * 1000, 2),
+            "cpu_seconds_total": round(self.stats["cpu_seconds"], 3),
+        }
+
+    def close(self):
+        """终止全部工作进程"""
+        for worker in self._workers:
+            worker.kill()
+        self._workers.clear()
+        self._idle = None
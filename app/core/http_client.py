@@ -0,0 +1,441 @@
+"""
+HTTP 客户端工厂
+
+创建带连接池的长连接 httpx.AsyncClient，并统计连接复用情况和握手耗时；
+可选为客户端启用DNS解析缓存；代理按客户端配置（HTTP代理或SOCKS5代理，
+SOCKS5需要安装 httpx[socks]），不影响其他客户端和进程内的其他连接
+"""
+
+import asyncio
+import ipaddress
+import logging
+import socket
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpcore
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionStats:
+    """单个客户端的连接统计"""
+
+    def __init__(self, name: str, route: str = "direct"):
+        self.name = name
+        self.route = route
+        self.requests = 0
+        self.errors = 0
+        self.new_connections = 0
+        self.handshake_seconds_total = 0.0
+        self.handshake_seconds_max = 0.0
+        self.response_seconds_total = 0.0
+
+    def record_request(self, elapsed: float, handshake: Optional[float], failed: bool):
+        """记录一次请求（handshake 为 None 表示复用了已有连接）"""
+        self.requests += 1
+        self.response_seconds_total += elapsed
+        if failed:
+            self.errors += 1
+        if handshake is not None:
+            self.new_connections += 1
+            self.handshake_seconds_total += handshake
+            self.handshake_seconds_max = max(self.handshake_seconds_max, handshake)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出统计数据"""
+        reused = self.requests - self.new_connections
+        return {
+            "route": self.route,
+            "requests": self.requests,
+            "errors": self.errors,
+            "new_connections": self.new_connections,
+            "reuse_rate": round(reused / self.requests, 4) if self.requests else 0.0,
+            "avg_handshake_ms": round(
+                self.handshake_seconds_total / self.new_connections * 1000, 2
+            ) if self.new_connections else 0.0,
+            "max_handshake_ms": round(self.handshake_seconds_max * 1000, 2),
+            "avg_response_ms": round(
+                self.response_seconds_total / self.requests * 1000, 2
+            ) if self.requests else 0.0,
+        }
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """包装传输层，通过 httpcore trace 扩展统计建连耗时"""
+
+    def __init__(self, stats: ConnectionStats, transport: httpx.AsyncBaseTransport):
+        self.stats = stats
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        marks: Dict[str, float] = {}
+        outer_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: Dict[str, Any]):
+            # TCP 建连开始即视为新连接，TLS 握手完成（或纯 HTTP 的 TCP 建连完成）为结束
+            if event_name == "connection.connect_tcp.started":
+                marks["start"] = time.perf_counter()
+            elif event_name in ("connection.connect_tcp.complete",
+                                "connection.start_tls.complete"):
+                marks["end"] = time.perf_counter()
+            if outer_trace is not None:
+                await outer_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        started = time.perf_counter()
+        failed = False
+        try:
+            return await self.transport.handle_async_request(request)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            handshake = None
+            if "start" in marks:
+                handshake = marks.get("end", time.perf_counter()) - marks["start"]
+            self.stats.record_request(time.perf_counter() - started, handshake, failed)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+# httpcore 异常对应的 httpx 异常（按从具体到一般的顺序匹配，与 httpx 自带的传输层一致）
+_HTTPCORE_ERRORS = (
+    (httpcore.ConnectTimeout, httpx.ConnectTimeout),
+    (httpcore.ReadTimeout, httpx.ReadTimeout),
+    (httpcore.WriteTimeout, httpx.WriteTimeout),
+    (httpcore.PoolTimeout, httpx.PoolTimeout),
+    (httpcore.TimeoutException, httpx.TimeoutException),
+    (httpcore.ConnectError, httpx.ConnectError),
+    (httpcore.ReadError, httpx.ReadError),
+    (httpcore.WriteError, httpx.WriteError),
+    (httpcore.NetworkError, httpx.NetworkError),
+    (httpcore.ProxyError, httpx.ProxyError),
+    (httpcore.UnsupportedProtocol, httpx.UnsupportedProtocol),
+    (httpcore.LocalProtocolError, httpx.LocalProtocolError),
+    (httpcore.RemoteProtocolError, httpx.RemoteProtocolError),
+    (httpcore.ProtocolError, httpx.ProtocolError),
+)
+
+
+@contextmanager
+def _map_httpcore_errors() -> Iterator[None]:
+    """把 httpcore 异常转换为对应的 httpx 异常"""
+    try:
+        yield
+    except Exception as e:
+        for source, target in _HTTPCORE_ERRORS:
+            if isinstance(e, source):
+                raise target(str(e)) from e
+        raise
+
+
+class _PoolResponseStream(httpx.AsyncByteStream):
+    """httpcore 响应体，读取时转换异常"""
+
+    def __init__(self, stream: AsyncIterable[bytes]):
+        self._stream = stream
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with _map_httpcore_errors():
+            async for part in self._stream:
+                yield part
+
+    async def aclose(self) -> None:
+        if hasattr(self._stream, "aclose"):
+            await self._stream.aclose()
+
+
+class PoolTransport(httpx.AsyncBaseTransport):
+    """
+    把显式构建的 httpcore 连接池包装为 httpx 传输层
+
+    httpx.AsyncHTTPTransport 不提供指定网络后端的参数，需要自定义网络后端（如DNS缓存）时
+    自行构建连接池，只使用 httpx 和 httpcore 的公开接口
+    """
+
+    def __init__(self, pool: httpcore.AsyncConnectionPool):
+        self.pool = pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        with _map_httpcore_errors():
+            response = await self.pool.handle_async_request(core_request)
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_PoolResponseStream(response.stream),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self.pool.aclose()
+
+
+class DNSCache:
+    """按主机名缓存DNS解析结果，同一主机并发解析时只查询一次"""
+
+    # 缓存的最大主机数（超出后先清除过期项，仍超出时整体清空）
+    MAX_HOSTS = 4096
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Tuple[float, List[str]]] = {}
+        self._pending: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    async def resolve(self, host: str, port: int) -> List[str]:
+        """解析主机名，返回去重后的IP地址列表（保持系统解析器给出的顺序）"""
+        key = host.lower()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        task = self._pending.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.create_task(self._lookup(key, port))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        else:
+            self.hits += 1
+        # 某个等待者超时取消时不影响其他等待同一解析结果的请求
+        return await asyncio.shield(task)
+
+    async def _lookup(self, host: str, port: int) -> List[str]:
+        """查询系统解析器并写入缓存"""
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except OSError:
+            self.failures += 1
+            raise
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        if self.ttl_seconds > 0 and addresses:
+            if len(self._entries) >= self.MAX_HOSTS:
+                now = time.monotonic()
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                if len(self._entries) >= self.MAX_HOSTS:
+                    self._entries.clear()
+            self._entries[host] = (time.monotonic() + self.ttl_seconds, addresses)
+        return addresses
+
+    def invalidate(self, host: str):
+        """移除主机的缓存（缓存的地址全部连接失败时调用）"""
+        self._entries.pop(host.lower(), None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出统计数据"""
+        lookups = self.hits + self.misses
+        return {
+            "hosts": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "failures": self.failures,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def _is_ip_address(host: str) -> bool:
+    """判断主机是否已经是IP地址"""
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+
+class CachingDNSBackend(httpcore.AsyncNetworkBackend):
+    """
+    先经 DNSCache 解析主机名再建立TCP连接的网络后端
+
+    只替换TCP连接的目标地址，TLS的SNI和证书校验仍使用原始主机名
+    """
+
+    def __init__(self, dns_cache: DNSCache, backend: Optional[httpcore.AsyncNetworkBackend] = None):
+        self.dns_cache = dns_cache
+        self._backend = backend or httpcore.AnyIOBackend()
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[Iterable[Any]] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        if _is_ip_address(host):
+            return await self._backend.connect_tcp(
+                host, port, timeout=timeout, local_address=local_address, socket_options=socket_options)
+
+        try:
+            addresses = await asyncio.wait_for(self.dns_cache.resolve(host, port), timeout)
+        except asyncio.TimeoutError:
+            raise httpcore.ConnectTimeout(f"DNS解析超时: {host}")
+        except OSError as e:
+            raise httpcore.ConnectError(f"DNS解析失败: {host}, {e}")
+
+        last_error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address, port, timeout=timeout, local_address=local_address, socket_options=socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                last_error = e
+        # 缓存的地址可能已经失效，下次重新解析
+        self.dns_cache.invalidate(host)
+        raise last_error or httpcore.ConnectError(f"DNS解析没有返回地址: {host}")
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None,
+                                  socket_options: Optional[Iterable[Any]] = None) -> httpcore.AsyncNetworkStream:
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+def describe_route(proxy: Optional[str]) -> str:
+    """客户端的出站路线（代理类型和地址，不含认证信息）"""
+    if not proxy:
+        return "direct"
+    parsed = urlparse(proxy)
+    return f"{parsed.scheme}://{parsed.hostname}:{parsed.port or (1080 if _is_socks(proxy) else 80)}"
+
+
+def _is_socks(proxy: str) -> bool:
+    """是否为SOCKS5代理URL"""
+    return urlparse(proxy).scheme in ("socks5", "socks5h")
+
+
+def _build_proxy(proxy: str) -> httpx.Proxy:
+    """
+    构建 httpx 代理配置
+
+    httpx 的SOCKS5代理始终由代理解析目标域名，不接受 socks5h:// 协议名，按 socks5:// 处理
+    """
+    if urlparse(proxy).scheme == "socks5h":
+        proxy = "socks5" + proxy[len("socks5h"):]
+    return httpx.Proxy(proxy)
+
+
+# 所有客户端的连接统计，按名称索引
+_connection_stats: Dict[str, ConnectionStats] = {}
+
+
+def _http2_available() -> bool:
+    """检查是否安装了 HTTP/2 支持（h2）"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def create_async_client(
+    name: str,
+    timeout: Any = 30.0,
+    max_connections: int = 10,
+    max_keepalive_connections: int = 5,
+    keepalive_expiry: float = 60.0,
+    http2: bool = False,
+    verify: bool = True,
+    proxy: Optional[str] = None,
+    dns_cache: Optional[DNSCache] = None,
+    **client_kwargs,
+) -> httpx.AsyncClient:
+    """
+    创建长连接的 AsyncClient
+
+    Args:
+        name: 客户端名称，用于连接统计
+        timeout: 默认超时时间
+        max_connections: 连接池最大连接数
+        max_keepalive_connections: 最大保活连接数
+        keepalive_expiry: 保活连接的空闲过期时间（秒）
+        http2: 是否启用 HTTP/2（需要安装 h2）
+        verify: 是否校验服务端证书
+        proxy: 代理URL（http://、https://、socks5://、socks5h://），为 None 时直连
+        dns_cache: 直连时使用的DNS解析缓存，为 None 时每次建连都由系统解析
+        client_kwargs: 其他传给 httpx.AsyncClient 的参数
+
+    Returns:
+        配置好连接池的 AsyncClient
+    """
+    if http2 and not _http2_available():
+        logger.warning(f"未安装 h2，客户端 {name} 将回退为 HTTP/1.1")
+        http2 = False
+
+    route = describe_route(proxy)
+    stats = ConnectionStats(name, route)
+    _connection_stats[name] = stats
+
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    if dns_cache is not None and not proxy:
+        # 经DNS缓存建连：显式构建使用该网络后端的连接池
+        transport: httpx.AsyncBaseTransport = PoolTransport(httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(verify=verify, http2=http2),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=True,
+            http2=http2,
+            network_backend=CachingDNSBackend(dns_cache),
+        ))
+    else:
+        # 经代理时目标域名由代理解析，不使用本地DNS缓存
+        transport = httpx.AsyncHTTPTransport(
+            http2=http2,
+            verify=verify,
+            proxy=_build_proxy(proxy) if proxy else None,
+            limits=limits,
+        )
+    transport = InstrumentedTransport(stats, transport)
+
+    logger.info(
+        f"HTTP客户端已创建: {name}, 最大连接数: {max_connections}, HTTP/2: {http2}, 路线: {route}")
+    return httpx.AsyncClient(timeout=timeout, transport=transport, **client_kwargs)
+
+
+def get_connection_stats() -> Dict[str, Dict[str, Any]]:
+    """获取所有客户端的连接统计"""
+    return {name: stats.to_dict() for name, stats in _connection_stats.items()}
+
+
+def get_route_stats() -> Dict[str, Dict[str, Any]]:
+    """按出站路线（直连或各代理）汇总所有客户端的请求数、建连和响应耗时"""
+    routes: Dict[str, ConnectionStats] = {}
+    clients: Dict[str, List[str]] = {}
+    for name, stats in _connection_stats.items():
+        total = routes.setdefault(stats.route, ConnectionStats(stats.route, stats.route))
+        total.requests += stats.requests
+        total.errors += stats.errors
+        total.new_connections += stats.new_connections
+        total.handshake_seconds_total += stats.handshake_seconds_total
+        total.handshake_seconds_max = max(total.handshake_seconds_max, stats.handshake_seconds_max)
+        total.response_seconds_total += stats.response_seconds_total
+        clients.setdefault(stats.route, []).append(name)
+    return {
+        route: {**{k: v for k, v in total.to_dict().items() if k != "route"}, "clients": clients[route]}
+        for route, total in routes.items()
+    }
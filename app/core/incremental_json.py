@@ -0,0 +1,159 @@
+"""
+增量 JSON 解析
+
+逐块读取流式输出的文本，在 JSON 对象的每个顶层字段完成时立即解析出字段值，
+无需等待整个对象生成完毕
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+# 可以在读到完整字面量时立即确定的值
+_LITERALS = {"true": True, "false": False, "null": None}
+
+
+class IncrementalJSONObjectParser:
+    """增量解析第一个 JSON 对象的顶层字段"""
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.finished = False
+        self._text = ""
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect = "key"  # key -> colon -> value -> done
+        self._key: Optional[str] = None
+        self._token_start: Optional[int] = None
+
+    @property
+    def text(self) -> str:
+        """已接收的全部文本"""
+        return self._text
+
+    def feed(self, chunk: str) -> List[str]:
+        """
+        追加一段文本
+
+        Args:
+            chunk: 新到达的文本片段
+
+        Returns:
+            本次新完成的顶层字段名列表
+        """
+        self._text += chunk
+        completed: List[str] = []
+
+        while self._pos < len(self._text) and not self.finished:
+            index = self._pos
+            char = self._text[index]
+            self._pos += 1
+
+            if not self._started:
+                # 跳过对象之前的内容（如 ```json 代码块标记）
+                if char == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._close_string(index, completed)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect in ("key", "value") and self._token_start is None:
+                    self._token_start = index
+                continue
+
+            if char in "{[":
+                if self._depth == 1 and self._expect == "value" and self._token_start is None:
+                    self._token_start = index
+                self._depth += 1
+                continue
+
+            if char in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._expect == "value" and self._token_start is not None:
+                    # 嵌套对象或数组值结束
+                    self._complete_value(index + 1, completed)
+                elif self._depth == 0:
+                    if self._expect == "value":
+                        self._complete_value(index, completed)
+                    self.finished = True
+                continue
+
+            if self._depth != 1:
+                continue
+
+            if self._expect == "colon":
+                if char == ":":
+                    self._expect = "value"
+                    self._token_start = None
+            elif self._expect == "done":
+                if char == ",":
+                    self._expect = "key"
+            elif self._expect == "value":
+                if char == ",":
+                    self._complete_value(index, completed)
+                    self._expect = "key"
+                    continue
+                if self._token_start is None and not char.isspace():
+                    self._token_start = index
+                if self._token_start is not None:
+                    raw = self._text[self._token_start:self._pos].strip()
+                    if raw in _LITERALS:
+                        self._store(_LITERALS[raw], completed)
+
+        return completed
+
+    def _close_string(self, index: int, completed: List[str]):
+        """顶层字符串结束：可能是键名，也可能是字符串值"""
+        raw = self._text[self._token_start:index + 1]
+        if self._expect == "key":
+            try:
+                self._key = json.loads(raw)
+            except ValueError:
+                self._key = None
+            self._expect = "colon"
+            self._token_start = None
+        elif self._expect == "value":
+            try:
+                self._store(json.loads(raw), completed)
+            except ValueError:
+                self._reset_value()
+
+    def _complete_value(self, end: int, completed: List[str]):
+        """遇到分隔符时完成当前值（数字、对象、数组等）"""
+        if self._token_start is not None:
+            raw = self._text[self._token_start:end].strip()
+            try:
+                self._store(json.loads(raw), completed)
+                return
+            except ValueError:
+                pass
+        self._reset_value()
+
+    def _store(self, value: Any, completed: List[str]):
+        """保存字段值"""
+        if self._key is not None:
+            self.fields[self._key] = value
+            completed.append(self._key)
+        self._key = None
+        self._token_start = None
+        self._expect = "done"
+
+    def _reset_value(self):
+        """丢弃当前无法解析的值"""
+        self._key = None
+        self._token_start = None
+        self._expect = "key"
@@ -0,0 +1,133 @@
+"""
+prompt路由
+
+在配置加载时把所有prompt配置的site模式编译为一个Aho-Corasick自动机，
+一次扫描feed URL即可找到匹配的prompt配置，耗时只与URL长度有关，与feed数量无关；
+解析结果按feed URL缓存，同一feed的后续文章直接查表
+"""
+
+from collections import deque
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# feed URL解析结果缓存的最大条数（超出后整体清空）
+MAX_RESOLVED_URLS = 4096
+
+# 自动机中表示没有匹配的prompt配置序号
+_NO_MATCH = -1
+
+
+class PromptRoute(NamedTuple):
+    """feed URL解析出的prompt配置"""
+    site: tuple
+    config: Dict[str, Any]
+
+    @property
+    def prompt(self) -> str:
+        """基础prompt"""
+        return self.config["prompt"]
+
+
+class PromptRouter:
+    """
+    feed URL到prompt配置的路由
+
+    匹配语义与逐个检查 `pattern in feed_url` 相同：任一site模式是feed URL的子串即匹配，
+    多个prompt配置同时匹配时取配置文件中靠前的一个
+    """
+
+    def __init__(self, prompts: Dict[tuple, Dict[str, Any]]):
+        self.routes: List[PromptRoute] = [PromptRoute(site, value) for site, value in prompts.items()]
+        self._build_automaton()
+        # feed URL -> 解析结果（None 表示没有匹配的prompt配置）
+        self._resolved: Dict[str, Optional[PromptRoute]] = {}
+
+    def _build_automaton(self):
+        """把所有site模式编译为Aho-Corasick自动机"""
+        # 每个节点的转移表、失败指针，以及到该节点为止能匹配到的最靠前的prompt配置序号
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._match: List[int] = [_NO_MATCH]
+        # 空模式匹配任意URL
+        self._empty_match = _NO_MATCH
+
+        for index, route in enumerate(self.routes):
+            for pattern in route.site:
+                if not pattern:
+                    if self._empty_match == _NO_MATCH:
+                        self._empty_match = index
+                    continue
+                node = 0
+                for char in pattern:
+                    next_node = self._goto[node].get(char)
+                    if next_node is None:
+                        next_node = len(self._goto)
+                        self._goto[node][char] = next_node
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._match.append(_NO_MATCH)
+                    node = next_node
+                if self._match[node] == _NO_MATCH or index < self._match[node]:
+                    self._match[node] = index
+
+        # 按广度优先计算失败指针，并把失败链上的匹配结果合并到当前节点
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                inherited = self._match[self._fail[child]]
+                if inherited != _NO_MATCH and (self._match[child] == _NO_MATCH or inherited < self._match[child]):
+                    self._match[child] = inherited
+                queue.append(child)
+
+    def _scan(self, feed_url: str) -> int:
+        """扫描feed URL，返回匹配到的最靠前的prompt配置序号"""
+        goto, fail, match = self._goto, self._fail, self._match
+        best = self._empty_match
+        if best == 0:
+            return best
+        node = 0
+        for char in feed_url:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            found = match[node]
+            if found != _NO_MATCH and (best == _NO_MATCH or found < best):
+                best = found
+                if best == 0:
+                    break
+        return best
+
+    def resolve(self, feed_url: str) -> Optional[PromptRoute]:
+        """查找feed URL对应的prompt配置，没有匹配时返回 None"""
+        feed_url = feed_url or ""
+        try:
+            return self._resolved[feed_url]
+        except KeyError:
+            pass
+
+        index = self._scan(feed_url)
+        route = self.routes[index] if index != _NO_MATCH else None
+        if len(self._resolved) >= MAX_RESOLVED_URLS:
+            self._resolved.clear()
+        self._resolved[feed_url] = route
+        return route
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取路由统计"""
+        return {
+            "prompts": len(self.routes),
+            "automaton_states": len(self._goto),
+            "resolved_urls": len(self._resolved),
+        }
+
+
+def linear_resolve(prompts: Dict[tuple, Dict[str, Any]], feed_url: str) -> Optional[Tuple[tuple, Dict[str, Any]]]:
+    """逐个检查site模式的参考实现（用于基准测试和校验路由结果）"""
+    for site, value in prompts.items():
+        if any(pattern in feed_url for pattern in site):
+            return site, value
+    return None
@@ -0,0 +1,80 @@
+"""
+令牌桶限流
+
+按固定速率补充令牌，桶满时最多允许 capacity 个请求连续发出；
+服务端返回限流响应（429）时可以暂停发放令牌，直到 Retry-After 指定的时间
+"""
+
+import asyncio
+import time
+from typing import Any, Dict
+
+
+class TokenBucket:
+    """异步令牌桶"""
+
+    def __init__(self, rate_per_second: float, capacity: int):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+        self.acquired = 0
+        self.wait_seconds_total = 0.0
+        self.pauses = 0
+
+    def configure(self, rate_per_second: float, capacity: int):
+        """调整速率和容量（重新加载配置后调用），已有令牌不超过新容量"""
+        self._refill()
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self.tokens = min(self.tokens, float(capacity))
+
+    def _refill(self):
+        """按经过的时间补充令牌（暂停期内不补充）"""
+        now = time.monotonic()
+        if now > self.updated_at:
+            self.tokens = min(float(self.capacity), self.tokens + (now - self.updated_at) * self.rate_per_second)
+            self.updated_at = now
+
+    async def acquire(self):
+        """获取一个令牌，没有可用令牌或处于暂停期时等待"""
+        started = time.monotonic()
+        # 排队获取，保证等待的请求按先后顺序发出
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    break
+                await asyncio.sleep((1 - self.tokens) / self.rate_per_second)
+        self.acquired += 1
+        self.wait_seconds_total += time.monotonic() - started
+
+    def pause(self, seconds: float):
+        """暂停发放令牌（服务端要求限流时调用），暂停结束后从空桶开始补充"""
+        until = time.monotonic() + seconds
+        if until > self.paused_until:
+            self.paused_until = until
+            self.pauses += 1
+        self.tokens = 0.0
+        self.updated_at = max(self.updated_at, until)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出统计数据"""
+        self._refill()
+        return {
+            "rate_per_minute": round(self.rate_per_second * 60, 2),
+            "capacity": self.capacity,
+            "tokens": round(self.tokens, 2),
+            "acquired": self.acquired,
+            "pauses": self.pauses,
+            "paused_seconds": round(max(0.0, self.paused_until - time.monotonic()), 1),
+            "avg_wait_ms": round(self.wait_seconds_total / self.acquired * 1000, 2) if self.acquired else 0.0,
+        }
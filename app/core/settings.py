@@ -9,7 +9,39 @@ import re
 from typing import Any, Dict, List, Optional
 
 import yaml
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+
+class PromptRulesConfig(BaseModel):
+    """调用LLM前的本地预过滤规则，命中的文章直接记录为无用"""
+    include_keywords: List[str] = Field(
+        default_factory=list, description="标题或内容必须包含其中之一的关键词（不区分大小写）")
+    exclude_keywords: List[str] = Field(
+        default_factory=list, description="标题或内容包含即过滤的关键词（不区分大小写）")
+    include_patterns: List[str] = Field(
+        default_factory=list, description="标题或内容必须匹配其中之一的正则表达式")
+    exclude_patterns: List[str] = Field(
+        default_factory=list, description="标题或内容匹配即过滤的正则表达式")
+    include_title_patterns: List[str] = Field(
+        default_factory=list, description="标题必须匹配其中之一的正则表达式")
+    exclude_title_patterns: List[str] = Field(
+        default_factory=list, description="标题匹配即过滤的正则表达式")
+    min_length: int = Field(default=0, ge=0, description="内容最少字符数，0表示不限制")
+    max_length: int = Field(default=0, ge=0, description="内容最多字符数，0表示不限制")
+    languages: List[str] = Field(
+        default_factory=list, description="允许的内容语言（zh/ja/ko/ru/en），为空表示不限制")
+
+    @field_validator(
+        "include_patterns", "exclude_patterns", "include_title_patterns", "exclude_title_patterns")
+    @classmethod
+    def validate_patterns(cls, patterns: List[str]) -> List[str]:
+        """配置加载时校验正则表达式"""
+        for pattern in patterns:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"无效的正则表达式 {pattern!r}: {e}")
+        return patterns
 
 
 class PromptConfig(BaseModel):
@@ -17,6 +49,9 @@ class PromptConfig(BaseModel):
     site: List[str] = Field(..., description="网站URL列表")
     refetch_content: bool = Field(default=False, description="是否重新抓取网页内容")
     prompt: str = Field(..., description="Prompt内容")
+    rules: Optional[PromptRulesConfig] = Field(default=None, description="调用LLM前的本地预过滤规则")
+    triage: bool = Field(default=False, description="是否先只根据标题和简介初筛，不确定时才抓取并发送全文")
+    triage_max_chars: int = Field(default=300, ge=0, description="初筛时发送的简介最大字符数")
 
 
 class QueueConfig(BaseModel):
@@ -25,6 +60,106 @@ class QueueConfig(BaseModel):
     dead_letter_retry_daily: bool = Field(default=True, description="是否每日重试死信")
     process_interval_seconds: int = Field(
         default=300, ge=60, description="队列处理间隔，单位：秒（最小60秒）")
+    prefetch_content: bool = Field(
+        default=False, description="入队时是否在后台预先抓取 refetch_content 为 true 的文章内容")
+    prefetch_concurrency: int = Field(default=4, ge=1, description="同时进行的预抓取数")
+    prefetch_max_pending: int = Field(
+        default=200, ge=0, description="排队等待的预抓取数上限，超出时不再预抓取（处理时再抓取）")
+
+
+class ClassifierConfig(BaseModel):
+    """本地文本分类器配置（以历史LLM判断结果训练，作为LLM前的第一级判断）"""
+    enabled: bool = Field(default=False, description="是否启用本地分类器")
+    threshold: float = Field(
+        default=0.95, ge=0.5, le=1.0, description="预测概率达到该置信度时直接采用，否则交由LLM判断")
+    min_training_records: int = Field(
+        default=200, ge=10, description="每个prompt配置训练所需的最少标注记录数")
+    max_training_records: int = Field(
+        default=20000, ge=10, description="每次训练读取的最多标注记录数（按时间倒序）")
+    retrain_interval_hours: int = Field(default=24, ge=1, description="重新训练间隔，单位：小时")
+    holdout_ratio: float = Field(
+        default=0.2, gt=0.0, lt=1.0, description="离线评估时留出作测试集的记录比例")
+    n_features: int = Field(default=262144, ge=1024, description="哈希特征空间大小")
+
+
+class ReloadConfig(BaseModel):
+    """配置热加载"""
+    enabled: bool = Field(default=True, description="是否监视配置文件并在变更后自动重新加载")
+    interval_seconds: float = Field(default=5.0, gt=0.0, description="检查配置文件变更的间隔，单位：秒")
+
+
+class FetcherCacheConfig(BaseModel):
+    """网页抓取缓存配置"""
+    enabled: bool = Field(default=True, description="是否启用网页抓取缓存")
+    fresh_seconds: int = Field(
+        default=600, ge=0, description="缓存在该时间内直接使用，超过后发送条件请求重新验证，单位：秒")
+    max_age_hours: int = Field(default=72, ge=1, description="缓存最长保留时间，超过后重新下载，单位：小时")
+    max_bytes: int = Field(
+        default=200 * 1024 * 1024, ge=0, description="缓存正文的最大总字节数，超出后按最近访问时间淘汰")
+
+
+class FetcherConfig(BaseModel):
+    """网页内容抓取配置"""
+    connect_timeout: float = Field(default=10.0, gt=0.0, description="建立连接（含DNS解析和TLS握手）的超时时间，单位：秒")
+    read_timeout: float = Field(default=30.0, gt=0.0, description="读取响应的超时时间，单位：秒")
+    max_connections: int = Field(default=50, ge=1, description="连接池最大连接数")
+    max_connections_per_host: int = Field(default=2, ge=1, description="同一主机的最大并发请求数")
+    min_request_interval_seconds: float = Field(
+        default=1.0, ge=0.0, description="同一主机相邻两次请求开始的最小间隔，单位：秒")
+    circuit_failure_threshold: int = Field(
+        default=3, ge=1, description="同一主机连续失败（连接错误、超时、5xx）多少次后熔断")
+    circuit_cooldown_seconds: float = Field(
+        default=300.0, gt=0.0, description="主机熔断后的冷却时间，期间直接失败不再请求，单位：秒")
+    max_keepalive_connections: int = Field(default=20, ge=0, description="最大保活连接数")
+    keepalive_expiry: float = Field(default=60.0, ge=0.0, description="保活连接的空闲过期时间，单位：秒")
+    dns_cache_ttl_seconds: float = Field(default=300.0, ge=0.0, description="DNS解析结果缓存时间，单位：秒（0表示不缓存）")
+    http2: bool = Field(default=False, description="是否启用 HTTP/2（需要安装 h2）")
+    max_download_bytes: int = Field(
+        default=5 * 1024 * 1024, ge=1024, description="单个网页下载的最大字节数，超出后停止下载并解析已下载的部分")
+    extract_workers: int = Field(default=2, ge=0, description="解析网页的工作进程数（0表示在线程中解析）")
+    extract_queue_size: int = Field(default=32, ge=0, description="等待空闲工作进程的最大解析任务数，超出时放弃解析")
+    extract_max_bytes: int = Field(
+        default=5 * 1024 * 1024, ge=1024, description="单个网页参与解析的最大字节数，超出部分截断")
+    extract_timeout_seconds: float = Field(
+        default=20.0, gt=0.0, description="单次解析的超时时间，超时后终止并替换工作进程，单位：秒")
+    cache: FetcherCacheConfig = Field(default_factory=FetcherCacheConfig, description="网页抓取缓存配置")
+
+
+class CompletenessConfig(BaseModel):
+    """Webhook内容完整性判断配置（refetch_content 为 true 时，webhook内容已是全文则跳过抓取）"""
+    enabled: bool = Field(default=False, description="是否判断webhook内容完整性并跳过不必要的抓取")
+    min_history: int = Field(default=5, ge=1, description="feed至少有多少次抓取记录后才开始判断")
+    history_size: int = Field(default=50, ge=1, description="每个feed保留的最近抓取记录数")
+    min_chars: int = Field(default=500, ge=0, description="webhook内容纯文本的最少字符数，更短时总是抓取")
+    min_coverage: float = Field(
+        default=0.9, gt=0.0, le=1.0, description="feed以往webhook内容长度与抓取正文长度之比的中位数下限")
+    min_length_ratio: float = Field(
+        default=0.5, gt=0.0, le=1.0, description="本次webhook内容长度不低于以往正文长度中位数的比例")
+    sample_rate: float = Field(
+        default=0.05, ge=0.0, le=1.0, description="判断为完整的文章中仍然抓取的比例，用于评估判断效果")
+
+
+class ReadwiseConfig(BaseModel):
+    """Readwise发送配置（有用的文章先写入发送队列，由后台发送器限流发送）"""
+    rate_per_minute: float = Field(default=20.0, gt=0.0, description="每分钟最多发送的请求数")
+    burst: int = Field(default=5, ge=1, description="空闲后最多连续发送的请求数（令牌桶容量）")
+    concurrency: int = Field(default=2, ge=1, description="同时进行的发送请求数")
+    batch_size: int = Field(default=20, ge=1, description="每次从发送队列取出的最多项数")
+    max_attempts: int = Field(default=8, ge=1, description="最多发送次数，用尽后停止发送，服务重启时重新发送")
+    retry_base_seconds: float = Field(default=30.0, gt=0.0, description="首次重试的等待时间，之后按指数增加，单位：秒")
+    retry_max_seconds: float = Field(default=3600.0, gt=0.0, description="重试等待时间的上限，单位：秒")
+    poll_interval_seconds: float = Field(
+        default=30.0, gt=0.0, description="没有新文章时检查待重试项的间隔，单位：秒")
+    retention_days: int = Field(default=30, ge=1, description="发送完成的队列项保留天数")
+
+
+class WebhookConfig(BaseModel):
+    """Webhook接收配置"""
+    fast_ingest: bool = Field(
+        default=False,
+        description="是否使用快速解析：orjson解码（未安装时用标准库），只校验feed.url、entry.title、entry.content、entry.url")
+    batch_max_entries: int = Field(
+        default=5000, ge=1, description="批量Webhook单个请求最多接收的条目数，达到上限后不再读取请求体")
 
 
 class DatabaseConfig(BaseModel):
@@ -40,6 +175,8 @@ class LoggingConfig(BaseModel):
         default="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
         description="日志格式"
     )
+    status_interval_seconds: int = Field(
+        default=600, ge=0, description="服务状态日志输出间隔，单位：秒（0表示关闭）")
 
 
 class AuthConfig(BaseModel):
@@ -59,13 +196,92 @@ class LLMEndpointConfig(BaseModel):
     max_retries: int = Field(default=3, ge=0, description="最大重试次数")
     temperature: float = Field(default=0.1, ge=0.0, le=2.0, description="温度参数")
     max_tokens: int = Field(default=1000, ge=1, description="最大token数")
+    context_window: int = Field(default=8192, ge=512, description="模型上下文窗口大小（token数）")
+    max_input_tokens: int = Field(
+        default=0, ge=0, description="单篇文章请求的输入token预算，0表示按上下文窗口减去输出token计算")
     enabled: bool = Field(default=True, description="是否启用此endpoint")
+    cache_control: bool = Field(
+        default=True, description="是否在固定指令上标注cache_control以使用提供商的prompt缓存（openrouter/anthropic）")
+    http2: bool = Field(default=False, description="是否启用HTTP/2（需要安装h2）")
+    max_connections: int = Field(default=10, ge=1, description="连接池最大连接数")
+    max_keepalive_connections: int = Field(
+        default=5, ge=0, description="连接池最大保活连接数")
+    keepalive_expiry: float = Field(
+        default=60.0, ge=0.0, description="保活连接空闲过期时间（秒）")
+    proxy: Optional[str] = Field(
+        default=None,
+        description="此endpoint使用的代理URL（http://、socks5://、socks5h://），空字符串表示直连，未设置时按全局代理配置")
+
+
+class LLMCacheConfig(BaseModel):
+    """LLM结果缓存配置"""
+    enabled: bool = Field(default=True, description="是否启用LLM结果缓存")
+    memory_max_entries: int = Field(default=1000, ge=0, description="内存LRU缓存最大条数")
+    max_entries: int = Field(default=20000, ge=0, description="SQLite持久化缓存最大条数")
+    ttl_hours: int = Field(default=168, ge=1, description="缓存有效期，单位：小时")
+
+
+class LLMBatchConfig(BaseModel):
+    """批量判断配置"""
+    enabled: bool = Field(default=False, description="是否启用多篇文章合并为一次LLM请求")
+    max_items: int = Field(default=5, ge=1, description="单次请求最多包含的文章数")
+    output_tokens_per_item: int = Field(
+        default=200, ge=1, description="每篇文章预估的输出token数，用于按max_tokens限制批量大小")
+
+
+class LLMRoutingConfig(BaseModel):
+    """endpoint路由配置"""
+    strategy: str = Field(
+        default="adaptive", pattern="^(adaptive|round_robin)$",
+        description="路由策略：adaptive（按延迟和错误率加权）或 round_robin（轮询）")
+    ewma_alpha: float = Field(
+        default=0.3, gt=0.0, le=1.0, description="延迟和错误率EWMA的平滑系数")
+    failure_threshold: int = Field(default=3, ge=1, description="连续失败多少次后熔断")
+    cooldown_seconds: float = Field(
+        default=60.0, ge=0.0, description="熔断冷却时间，冷却后放行一次探测请求（秒）")
+
+
+class LLMHedgingConfig(BaseModel):
+    """对冲请求配置"""
+    enabled: bool = Field(default=False, description="是否启用对冲请求")
+    percentile: float = Field(
+        default=0.9, gt=0.0, lt=1.0, description="主endpoint超过该延迟分位数仍未响应时发送对冲请求")
+    min_samples: int = Field(default=10, ge=1, description="计算延迟分位数所需的最少样本数")
+    min_delay_seconds: float = Field(default=1.0, ge=0.0, description="发送对冲请求前的最短等待时间（秒）")
+    max_ratio: float = Field(
+        default=0.1, gt=0.0, le=1.0, description="对冲请求数占总请求数的上限比例")
+
+
+class LLMStreamingConfig(BaseModel):
+    """流式响应配置"""
+    enabled: bool = Field(default=False, description="是否以流式方式接收LLM响应并提前提取判断结果")
+    summary_mode: str = Field(
+        default="background", pattern="^(background|skip)$",
+        description="得到判断结果后摘要的处理方式：background（后台继续接收并补写记录）或 skip（停止生成）")
+
+
+class LLMDecisionConfig(BaseModel):
+    """两阶段判断配置：先只判断是否有用，有用的文章再另行生成摘要"""
+    enabled: bool = Field(default=False, description="是否启用只返回判断结果的精简请求")
+    max_tokens: int = Field(default=60, ge=8, description="判断请求的最大输出token数")
 
 
 class LLMConfig(BaseModel):
     """LLM配置"""
     endpoints: List[LLMEndpointConfig] = Field(
         ..., description="LLM endpoints列表")
+    cache: LLMCacheConfig = Field(
+        default_factory=LLMCacheConfig, description="LLM结果缓存配置")
+    batch: LLMBatchConfig = Field(
+        default_factory=LLMBatchConfig, description="批量判断配置")
+    routing: LLMRoutingConfig = Field(
+        default_factory=LLMRoutingConfig, description="endpoint路由配置")
+    hedging: LLMHedgingConfig = Field(
+        default_factory=LLMHedgingConfig, description="对冲请求配置")
+    decision: LLMDecisionConfig = Field(
+        default_factory=LLMDecisionConfig, description="两阶段判断配置")
+    streaming: LLMStreamingConfig = Field(
+        default_factory=LLMStreamingConfig, description="流式响应配置")
 
 
 class ApiConfig(BaseModel):
@@ -74,10 +290,32 @@ class ApiConfig(BaseModel):
     readwise_token: str = Field(..., description="Readwise API令牌")
 
 
+# 可以单独配置代理的出站客户端
+PROXY_CLIENTS = ("fetcher", "llm", "readwise")
+
+
 class ProxyConfig(BaseModel):
     """代理配置"""
     type: str = Field(..., description="代理类型：http 或 socks5")
     url: str = Field(..., description="代理URL")
+    apply_to: List[str] = Field(
+        default_factory=lambda: ["fetcher"],
+        description="使用该代理的客户端：fetcher（网页抓取）、llm（未单独配置代理的LLM endpoint）、readwise")
+
+    @field_validator("apply_to")
+    @classmethod
+    def validate_apply_to(cls, clients: List[str]) -> List[str]:
+        """配置加载时校验客户端名称"""
+        for client in clients:
+            if client not in PROXY_CLIENTS:
+                raise ValueError(f"未知的代理客户端 {client!r}，可选: {', '.join(PROXY_CLIENTS)}")
+        return clients
+
+    def get_url(self) -> str:
+        """代理URL（socks5 类型的URL未写协议时补全为 socks5://）"""
+        if self.type == "socks5" and "://" not in self.url:
+            return f"socks5://{self.url}"
+        return self.url
 
 
 class MainConfig(BaseModel):
@@ -85,6 +323,14 @@ class MainConfig(BaseModel):
     prompts: List[PromptConfig] = Field(
         default_factory=list, description="Prompt配置列表")
     queue: QueueConfig = Field(default_factory=QueueConfig, description="队列配置")
+    classifier: ClassifierConfig = Field(
+        default_factory=ClassifierConfig, description="本地分类器配置")
+    reload: ReloadConfig = Field(default_factory=ReloadConfig, description="配置热加载")
+    fetcher: FetcherConfig = Field(default_factory=FetcherConfig, description="网页内容抓取配置")
+    completeness: CompletenessConfig = Field(
+        default_factory=CompletenessConfig, description="Webhook内容完整性判断配置")
+    readwise: ReadwiseConfig = Field(default_factory=ReadwiseConfig, description="Readwise发送配置")
+    webhook: WebhookConfig = Field(default_factory=WebhookConfig, description="Webhook接收配置")
     database: DatabaseConfig = Field(
         default_factory=DatabaseConfig, description="数据库配置")
     logging: LoggingConfig = Field(
@@ -105,6 +351,14 @@ class AppConfig(BaseModel):
     prompts: List[PromptConfig] = Field(
         default_factory=list, description="Prompt配置列表")
     queue: QueueConfig = Field(default_factory=QueueConfig, description="队列配置")
+    classifier: ClassifierConfig = Field(
+        default_factory=ClassifierConfig, description="本地分类器配置")
+    reload: ReloadConfig = Field(default_factory=ReloadConfig, description="配置热加载")
+    fetcher: FetcherConfig = Field(default_factory=FetcherConfig, description="网页内容抓取配置")
+    completeness: CompletenessConfig = Field(
+        default_factory=CompletenessConfig, description="Webhook内容完整性判断配置")
+    readwise: ReadwiseConfig = Field(default_factory=ReadwiseConfig, description="Readwise发送配置")
+    webhook: WebhookConfig = Field(default_factory=WebhookConfig, description="Webhook接收配置")
     database: DatabaseConfig = Field(
         default_factory=DatabaseConfig, description="数据库配置")
     logging: LoggingConfig = Field(
@@ -166,10 +420,13 @@ class AppConfig(BaseModel):
         prompts_dict = {}
 
         for item in self.prompts:
-            # 使用site列表作为key，包含prompt和refetch_content的字典作为value
+            # 使用site列表作为key，包含prompt、抓取、预过滤和初筛配置的字典作为value
             prompts_dict[tuple(item.site)] = {
                 "prompt": item.prompt,
-                "refetch_content": item.refetch_content
+                "refetch_content": item.refetch_content,
+                "rules": item.rules.model_dump() if item.rules else None,
+                "triage": item.triage,
+                "triage_max_chars": item.triage_max_chars,
             }
 
         return prompts_dict
@@ -202,32 +459,162 @@ class AppConfig(BaseModel):
                     "max_retries": endpoint.max_retries,
                     "temperature": endpoint.temperature,
                     "max_tokens": endpoint.max_tokens,
+                    "context_window": endpoint.context_window,
+                    "max_input_tokens": endpoint.max_input_tokens,
                     "enabled": endpoint.enabled,
+                    "cache_control": endpoint.cache_control,
+                    "http2": endpoint.http2,
+                    "max_connections": endpoint.max_connections,
+                    "max_keepalive_connections": endpoint.max_keepalive_connections,
+                    "keepalive_expiry": endpoint.keepalive_expiry,
+                    "proxy": endpoint.proxy if endpoint.proxy is not None else self.get_proxy_url("llm"),
                 }
                 for endpoint in self.llm.endpoints
-            ]
+            ],
+            "cache": {
+                "enabled": self.llm.cache.enabled,
+                "memory_max_entries": self.llm.cache.memory_max_entries,
+                "max_entries": self.llm.cache.max_entries,
+                "ttl_hours": self.llm.cache.ttl_hours,
+            },
+            "batch": {
+                "enabled": self.llm.batch.enabled,
+                "max_items": self.llm.batch.max_items,
+                "output_tokens_per_item": self.llm.batch.output_tokens_per_item,
+            },
+            "routing": {
+                "strategy": self.llm.routing.strategy,
+                "ewma_alpha": self.llm.routing.ewma_alpha,
+                "failure_threshold": self.llm.routing.failure_threshold,
+                "cooldown_seconds": self.llm.routing.cooldown_seconds,
+            },
+            "hedging": {
+                "enabled": self.llm.hedging.enabled,
+                "percentile": self.llm.hedging.percentile,
+                "min_samples": self.llm.hedging.min_samples,
+                "min_delay_seconds": self.llm.hedging.min_delay_seconds,
+                "max_ratio": self.llm.hedging.max_ratio,
+            },
+            "decision": {
+                "enabled": self.llm.decision.enabled,
+                "max_tokens": self.llm.decision.max_tokens,
+            },
+            "streaming": {
+                "enabled": self.llm.streaming.enabled,
+                "summary_mode": self.llm.streaming.summary_mode,
+            },
         }
 
-    def get_proxy_dict(self) -> Optional[Dict[str, str]]:
+    def get_proxy_dict(self) -> Optional[Dict[str, Any]]:
         """获取代理配置字典"""
         if self.proxy:
             return {
                 "type": self.proxy.type,
                 "url": self.proxy.url,
+                "apply_to": list(self.proxy.apply_to),
             }
         return None
 
+    def get_proxy_url(self, client: str) -> Optional[str]:
+        """获取出站客户端（fetcher/llm/readwise）使用的代理URL，不使用代理时返回 None"""
+        if self.proxy and client in self.proxy.apply_to:
+            return self.proxy.get_url()
+        return None
+
     def get_queue_dict(self) -> Dict[str, Any]:
         """获取队列配置字典"""
         return {
             "retry_times": self.queue.retry_times,
             "dead_letter_retry_daily": self.queue.dead_letter_retry_daily,
             "process_interval_seconds": self.queue.process_interval_seconds,
+            "prefetch_content": self.queue.prefetch_content,
+            "prefetch_concurrency": self.queue.prefetch_concurrency,
+            "prefetch_max_pending": self.queue.prefetch_max_pending,
+        }
+
+    def get_classifier_dict(self) -> Dict[str, Any]:
+        """获取本地分类器配置字典"""
+        return {
+            "enabled": self.classifier.enabled,
+            "threshold": self.classifier.threshold,
+            "min_training_records": self.classifier.min_training_records,
+            "max_training_records": self.classifier.max_training_records,
+            "retrain_interval_hours": self.classifier.retrain_interval_hours,
+            "holdout_ratio": self.classifier.holdout_ratio,
+            "n_features": self.classifier.n_features,
+        }
+
+    def get_reload_dict(self) -> Dict[str, Any]:
+        """获取配置热加载字典"""
+        return {
+            "enabled": self.reload.enabled,
+            "interval_seconds": self.reload.interval_seconds,
+        }
+
+    def get_fetcher_dict(self) -> Dict[str, Any]:
+        """获取网页内容抓取配置字典"""
+        return {
+            "connect_timeout": self.fetcher.connect_timeout,
+            "read_timeout": self.fetcher.read_timeout,
+            "max_connections": self.fetcher.max_connections,
+            "max_connections_per_host": self.fetcher.max_connections_per_host,
+            "min_request_interval_seconds": self.fetcher.min_request_interval_seconds,
+            "circuit_failure_threshold": self.fetcher.circuit_failure_threshold,
+            "circuit_cooldown_seconds": self.fetcher.circuit_cooldown_seconds,
+            "max_keepalive_connections": self.fetcher.max_keepalive_connections,
+            "keepalive_expiry": self.fetcher.keepalive_expiry,
+            "dns_cache_ttl_seconds": self.fetcher.dns_cache_ttl_seconds,
+            "http2": self.fetcher.http2,
+            "max_download_bytes": self.fetcher.max_download_bytes,
+            "extract_workers": self.fetcher.extract_workers,
+            "extract_queue_size": self.fetcher.extract_queue_size,
+            "extract_max_bytes": self.fetcher.extract_max_bytes,
+            "extract_timeout_seconds": self.fetcher.extract_timeout_seconds,
+            "cache": {
+                "enabled": self.fetcher.cache.enabled,
+                "fresh_seconds": self.fetcher.cache.fresh_seconds,
+                "max_age_hours": self.fetcher.cache.max_age_hours,
+                "max_bytes": self.fetcher.cache.max_bytes,
+            },
+        }
+
+    def get_completeness_dict(self) -> Dict[str, Any]:
+        """获取Webhook内容完整性判断配置字典"""
+        return {
+            "enabled": self.completeness.enabled,
+            "min_history": self.completeness.min_history,
+            "history_size": self.completeness.history_size,
+            "min_chars": self.completeness.min_chars,
+            "min_coverage": self.completeness.min_coverage,
+            "min_length_ratio": self.completeness.min_length_ratio,
+            "sample_rate": self.completeness.sample_rate,
+        }
+
+    def get_readwise_dict(self) -> Dict[str, Any]:
+        """获取Readwise发送配置字典"""
+        return {
+            "rate_per_minute": self.readwise.rate_per_minute,
+            "burst": self.readwise.burst,
+            "concurrency": self.readwise.concurrency,
+            "batch_size": self.readwise.batch_size,
+            "max_attempts": self.readwise.max_attempts,
+            "retry_base_seconds": self.readwise.retry_base_seconds,
+            "retry_max_seconds": self.readwise.retry_max_seconds,
+            "poll_interval_seconds": self.readwise.poll_interval_seconds,
+            "retention_days": self.readwise.retention_days,
+        }
+
+    def get_webhook_dict(self) -> Dict[str, Any]:
+        """获取Webhook接收配置字典"""
+        return {
+            "fast_ingest": self.webhook.fast_ingest,
+            "batch_max_entries": self.webhook.batch_max_entries,
         }
 
-    def get_logging_dict(self) -> Dict[str, str]:
+    def get_logging_dict(self) -> Dict[str, Any]:
         """获取日志配置字典"""
         return {
             "level": self.logging.level,
             "format": self.logging.format,
+            "status_interval_seconds": self.logging.status_interval_seconds,
         }
@@ -0,0 +1,128 @@
+"""
+token 预算
+
+本地快速估算token数，并按token预算截取文章的开头、中间和结尾部分
+"""
+
+from typing import Tuple
+
+# 预算分配：开头、中间、结尾所占比例
+HEAD_RATIO = 0.6
+MIDDLE_RATIO = 0.15
+TAIL_RATIO = 0.25
+
+# 预算低于该值时不保留中间部分
+MIN_MIDDLE_BUDGET = 300
+
+# 截断位置向前/向后寻找段落或句子边界的最大字符数
+BOUNDARY_WINDOW = 80
+
+# 超过该字符数的文本按抽样估算token数，抽取的片段数
+SAMPLE_CHARS = 8192
+SAMPLE_COUNT = 16
+
+TRUNCATION_MARKER = "\n\n... [内容已截断] ...\n\n"
+
+_BOUNDARY_CHARS = "\n。！？.!?"
+
+
+def _wide_count(text: str) -> int:
+    """通过UTF-8编码长度推算多字节字符数，避免逐字符遍历"""
+    return (len(text.encode("utf-8")) - len(text)) // 2
+
+
+def estimate_tokens(text: str, exact: bool = False) -> int:
+    """
+    粗略估算token数：CJK等多字节字符按1个token，其余按4个字符1个token
+
+    长文本不整体编码，按均匀分布的若干片段抽样推算多字节字符所占比例，耗时与文本长度无关；
+    exact 为 True 时对整个文本计算
+    """
+    if not text:
+        return 0
+    length = len(text)
+    if exact or length <= SAMPLE_CHARS:
+        wide_count = _wide_count(text)
+    else:
+        window = SAMPLE_CHARS // SAMPLE_COUNT
+        step = (length - window) / (SAMPLE_COUNT - 1)
+        sample = "".join(
+            text[int(index * step):int(index * step) + window] for index in range(SAMPLE_COUNT))
+        wide_count = _wide_count(sample) * length // len(sample)
+    return wide_count + (length - wide_count) // 4 + 1
+
+
+def _snap_end(text: str, end: int) -> int:
+    """把截取终点移动到附近的段落或句子边界之后"""
+    lower = max(0, end - BOUNDARY_WINDOW)
+    best = max(text.rfind(char, lower, end) for char in _BOUNDARY_CHARS)
+    return best + 1 if best > 0 else end
+
+
+def _snap_start(text: str, start: int) -> int:
+    """把截取起点移动到附近的段落或句子边界之后"""
+    upper = min(len(text), start + BOUNDARY_WINDOW)
+    positions = [pos for pos in (text.find(char, start, upper) for char in _BOUNDARY_CHARS) if pos >= 0]
+    return min(positions) + 1 if positions else start
+
+
+def _compose(text: str, char_budget: int, with_middle: bool) -> str:
+    """按字符预算截取开头、中间（可选）和结尾"""
+    length = len(text)
+    if with_middle:
+        head_len = int(char_budget * HEAD_RATIO)
+        middle_len = int(char_budget * MIDDLE_RATIO)
+    else:
+        head_len = int(char_budget * (HEAD_RATIO + MIDDLE_RATIO / 2))
+        middle_len = 0
+    tail_len = max(0, char_budget - head_len - middle_len)
+
+    parts = [text[:_snap_end(text, head_len)]]
+    if middle_len > 0:
+        middle_start = _snap_start(text, (length - middle_len) // 2)
+        parts.append(text[middle_start:_snap_end(text, middle_start + middle_len)])
+    if tail_len > 0:
+        parts.append(text[_snap_start(text, length - tail_len):])
+    return TRUNCATION_MARKER.join(part.strip() for part in parts)
+
+
+def truncate_to_token_budget(text: str, budget: int) -> Tuple[str, bool]:
+    """
+    按token预算截断文本
+
+    Args:
+        text: 原始文本
+        budget: 允许的token数
+
+    Returns:
+        (截断后的文本, 是否发生了截断)
+    """
+    if not text:
+        return text, False
+    if budget <= 0:
+        return "", True
+
+    # 每个token至多对应4个字符，超过 4*budget 个字符的文本一定需要截断，按抽样估算即可；
+    # 不超过时文本长度受预算限制，精确计算是否超出预算
+    if len(text) <= budget * 4:
+        total_tokens = estimate_tokens(text, exact=True)
+        if total_tokens <= budget:
+            return text, False
+    else:
+        total_tokens = estimate_tokens(text)
+
+    with_middle = budget >= MIN_MIDDLE_BUDGET
+    marker_tokens = estimate_tokens(TRUNCATION_MARKER) * (2 if with_middle else 1)
+    chars_per_token = len(text) / total_tokens
+    char_budget = int(max(1, budget - marker_tokens) * chars_per_token)
+
+    # 按整体字符密度换算后，局部密度不同或抽样估算偏低时可能仍超出预算，
+    # 截取结果的长度受预算限制，对其精确计算后按比例收缩重试
+    result = text
+    for _ in range(4):
+        result = _compose(text, char_budget, with_middle)
+        used_tokens = estimate_tokens(result, exact=True)
+        if used_tokens <= budget:
+            break
+        char_budget = int(char_budget * budget / used_tokens * 0.9)
+    return result, True
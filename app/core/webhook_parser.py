@@ -0,0 +1,243 @@
+"""
+Webhook 载荷快速解析
+
+处理流程只用到 feed.url、entry.title、entry.content 和 entry.url 四个字段。
+快速模式下用 orjson（未安装时回退到标准库 json）解码，只校验这四个字段，
+不构建完整的 WebhookPayload（嵌套模型、日期解析和每个媒体项）。
+
+批量接收时用 BatchDecoder 按数据块增量解码JSON数组或NDJSON请求体
+"""
+
+import codecs
+import json
+from typing import Any, List, NamedTuple, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class WebhookFormatError(ValueError):
+    """Webhook 载荷格式不符合要求"""
+
+
+class WebhookDecodeError(WebhookFormatError):
+    """请求体不是有效的JSON"""
+
+
+class WebhookEntry(NamedTuple):
+    """处理流程使用的 Webhook 字段"""
+    feed_url: str
+    title: str
+    content: str
+    article_url: str
+
+
+def json_backend() -> str:
+    """当前使用的JSON解码库"""
+    return "orjson" if orjson is not None else "json"
+
+
+def loads(body: bytes) -> Any:
+    """解码JSON请求体，格式错误时抛出 WebhookDecodeError"""
+    try:
+        if orjson is not None:
+            return orjson.loads(body)
+        return json.loads(body)
+    except ValueError as e:
+        raise WebhookDecodeError(f"JSON 解码失败: {e}")
+
+
+def _get_object(parent: Any, key: str) -> dict:
+    """读取必需的对象字段"""
+    value = parent.get(key)
+    if not isinstance(value, dict):
+        raise WebhookFormatError(f"{key} 必须是对象")
+    return value
+
+
+def _get_str(parent: dict, path: str, key: str) -> str:
+    """读取必需的字符串字段（与 WebhookPayload 相同，不接受其他类型）"""
+    value = parent.get(key)
+    if not isinstance(value, str):
+        raise WebhookFormatError(f"{path}.{key} 必须是字符串")
+    return value
+
+
+def parse_webhook(payload: Any) -> WebhookEntry:
+    """
+    从已解码的载荷中提取并校验处理流程使用的字段
+
+    Raises:
+        WebhookFormatError: 载荷不是对象，或缺少字段、字段类型不符
+    """
+    if not isinstance(payload, dict):
+        raise WebhookFormatError("载荷必须是对象")
+    feed = _get_object(payload, "feed")
+    entry = _get_object(payload, "entry")
+    return WebhookEntry(
+        feed_url=_get_str(feed, "feed", "url"),
+        title=_get_str(entry, "entry", "title"),
+        content=_get_str(entry, "entry", "content"),
+        article_url=_get_str(entry, "entry", "url"),
+    )
+
+
+# 增量解码的条目：(序号, 解码后的载荷或该条目的格式错误)
+DecodedItem = Tuple[int, Union[Any, WebhookFormatError]]
+
+_WHITESPACE = " \t\r\n"
+
+
+class BatchDecoder:
+    """
+    批量请求体增量解码器
+
+    请求体第一个非空白字符为 [ 时按JSON数组解码，否则按NDJSON（每行一个JSON对象）解码。
+    每收到一个数据块调用 feed()，读完后调用 close()，返回已完整解码的条目。
+    NDJSON中单行解码失败只影响该条目；JSON数组语法错误时无法继续解码，抛出 WebhookDecodeError。
+    设置 limit 时最多解码 limit 个条目，之后还有条目时 truncated 为 True，调用方可停止读取请求体
+    """
+
+    def __init__(self, limit: Optional[int] = None):
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._mode = None  # "array" 或 "ndjson"
+        self._expect_value = True  # JSON数组中下一个应为元素（否则为逗号或结束括号）
+        self._closed = False  # JSON数组已结束
+        self._count = 0
+        self.limit = limit
+        self._truncated = False
+
+    @property
+    def count(self) -> int:
+        """已解码的条目数"""
+        return self._count
+
+    @property
+    def truncated(self) -> bool:
+        """达到条目数上限后请求体中还有条目"""
+        return self._truncated
+
+    def _full(self) -> bool:
+        return self.limit is not None and self._count >= self.limit
+
+    def feed(self, chunk: bytes) -> List[DecodedItem]:
+        """解码一个数据块"""
+        try:
+            self._buffer += self._utf8.decode(chunk)
+        except UnicodeDecodeError as e:
+            raise WebhookDecodeError(f"请求体不是有效的UTF-8: {e}")
+        return self._drain(final=False)
+
+    def close(self) -> List[DecodedItem]:
+        """请求体读取完毕，解码剩余的数据"""
+        try:
+            self._buffer += self._utf8.decode(b"", final=True)
+        except UnicodeDecodeError as e:
+            raise WebhookDecodeError(f"请求体不是有效的UTF-8: {e}")
+        items = self._drain(final=True)
+        if self._mode == "array" and not self._closed:
+            raise WebhookDecodeError("JSON数组不完整")
+        return items
+
+    def _next_item(self, payload: Union[Any, WebhookFormatError]) -> DecodedItem:
+        item = (self._count, payload)
+        self._count += 1
+        return item
+
+    def _drain(self, final: bool) -> List[DecodedItem]:
+        if self._full():
+            self._check_rest()
+            return []
+        if self._mode is None:
+            stripped = self._buffer.lstrip(_WHITESPACE + "\ufeff")
+            if not stripped:
+                self._buffer = ""
+                return []
+            if stripped[0] == "[":
+                self._mode = "array"
+                self._buffer = stripped[1:]
+            else:
+                self._mode = "ndjson"
+                self._buffer = stripped
+        if self._mode == "array":
+            return self._drain_array(final)
+        return self._drain_ndjson(final)
+
+    def _drain_ndjson(self, final: bool) -> List[DecodedItem]:
+        lines = self._buffer.split("\n")
+        # 最后一行可能不完整，留到下一个数据块
+        self._buffer = "" if final else lines.pop()
+        items = []
+        for number, line in enumerate(lines):
+            if not line.strip(_WHITESPACE):
+                continue
+            if self._full():
+                self._buffer = "\n".join(lines[number:] + [self._buffer])
+                self._check_rest()
+                break
+            try:
+                items.append(self._next_item(loads(line)))
+            except WebhookDecodeError as e:
+                items.append(self._next_item(e))
+        return items
+
+    def _drain_array(self, final: bool) -> List[DecodedItem]:
+        buffer = self._buffer
+        size = len(buffer)
+        position = 0
+        items = []
+        while True:
+            while position < size and buffer[position] in _WHITESPACE:
+                position += 1
+            if position >= size:
+                break
+            char = buffer[position]
+
+            if self._closed:
+                raise WebhookDecodeError("JSON数组结束后还有多余的内容")
+            if char == "]" and (not self._expect_value or not self._count):
+                self._closed = True
+                position += 1
+                continue
+            if not self._expect_value:
+                if char != ",":
+                    raise WebhookDecodeError("JSON数组元素之间缺少逗号")
+                self._expect_value = True
+                position += 1
+                continue
+
+            try:
+                value, end = self._json.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                # 元素可能还没有接收完整，等待下一个数据块
+                if final:
+                    raise WebhookDecodeError(f"JSON 解码失败: {e}")
+                break
+            if end >= size and not final and not isinstance(value, (dict, list)):
+                # 数字等标量可能在下一个数据块中继续
+                break
+            items.append(self._next_item(value))
+            self._expect_value = False
+            position = end
+            if self._full():
+                break
+
+        self._buffer = buffer[position:]
+        if self._full():
+            self._check_rest()
+        return items
+
+    def _check_rest(self):
+        """达到上限后只检查剩余内容中是否还有条目，不再解码"""
+        rest = self._buffer.lstrip(_WHITESPACE)
+        if self._mode == "array" and rest.startswith("]"):
+            # 数组在上限处正好结束，之后的内容不再检查
+            self._closed = True
+            rest = ""
+        if rest:
+            self._truncated = True
+        self._buffer = ""
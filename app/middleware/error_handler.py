@@ -13,6 +13,12 @@ from ..models.schemas import ErrorResponse
 
 logger = logging.getLogger(__name__)
 
+# 出错时返回空响应的 webhook 路径（单条和批量）
+WEBHOOK_PATHS = (
+    "/api/webhook/053e46c8c41a4de199c4",
+    "/api/webhook/053e46c8c41a4de199c4/batch",
+)
+
 
 def setup_error_handlers(app: FastAPI) -> None:
     """设置全局错误处理器"""
@@ -24,7 +30,7 @@ def setup_error_handlers(app: FastAPI) -> None:
         """处理 HTTP 异常"""
         # 对于 webhook 路径的 404 错误，返回空响应
         if (exc.status_code == 404 and
-                request.url.path == "/api/webhook/053e46c8c41a4de199c4"):
+                request.url.path in WEBHOOK_PATHS):
             return Response(status_code=404)
 
         logger.warning(f"HTTP 异常: {exc.status_code}: {exc.detail}")
@@ -73,7 +79,7 @@ def setup_error_handlers(app: FastAPI) -> None:
         path = request.url.path
 
         # 对于 webhook 路径，返回空响应
-        if path == "/api/webhook/053e46c8c41a4de199c4":
+        if path in WEBHOOK_PATHS:
             return Response(status_code=404)
 
         # 对于 API 请求返回 JSON 格式的 404
@@ -1,7 +1,7 @@
 """
 Webhook 路径保护中间件
 
-只允许访问特定的 webhook 路径，其他所有路径返回 404
+只允许访问特定的 webhook 路径（单条和批量），其他所有路径返回 404
 """
 
 import logging
@@ -21,7 +21,8 @@ class WebhookGuardMiddleware(BaseHTTPMiddleware):
         super().__init__(app)
         # 仅允许访问的路径 (严格模式：只有 webhook 路径)
         self.allowed_paths = allowed_paths or [
-            "/api/webhook/053e46c8c41a4de199c4",  # 唯一允许的 Webhook 路径
+            "/api/webhook/053e46c8c41a4de199c4",  # Webhook 路径
+            "/api/webhook/053e46c8c41a4de199c4/batch",  # 批量 Webhook 路径
         ]
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
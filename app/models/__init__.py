@@ -6,7 +6,7 @@
 - schemas: 数据传输对象 (Pydantic)
 """
 
-from .database import Base, Queue, Record
+from .database import Base, LLMCacheEntry, PageCacheEntry, Queue, QueueContent, ReadwiseOutbox, Record
 from .schemas import (
     APIResponse,
     DeleteRequest,
@@ -30,6 +30,10 @@ __all__ = [
     "Base",
     "Record",
     "Queue",
+    "QueueContent",
+    "LLMCacheEntry",
+    "PageCacheEntry",
+    "ReadwiseOutbox",
     # Schemas
     "RecordCreate",
     "RecordUpdate",
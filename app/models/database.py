@@ -6,11 +6,11 @@
 
 import json
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text, TypeDecorator
+from sqlalchemy import Boolean, Column, DateTime, Float, Integer, String, Text, TypeDecorator
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 
-from ..core.constants import RecordStatus
+from ..core.constants import OutboxStatus, RecordStatus
 
 
 class UnicodeJSON(TypeDecorator):
@@ -74,3 +74,76 @@ class Queue(Base):
 
     def __repr__(self):
         return f"<Queue(id={self.id}, feed_url='{self.feed_url}')>"
+
+
+class QueueContent(Base):
+    """队列项预抓取内容表 - 入队时后台抓取的网页正文，处理时直接使用"""
+
+    __tablename__ = "queue_content"
+
+    id = Column(Integer, primary_key=True, index=True)
+    queue_id = Column(Integer, nullable=False, unique=True, index=True)  # 队列项ID
+    content = Column(Text, nullable=False)  # trafilatura解析后的正文
+    fetched_at = Column(DateTime, default=func.now())
+
+    def __repr__(self):
+        return f"<QueueContent(id={self.id}, queue_id={self.queue_id})>"
+
+
+class ReadwiseOutbox(Base):
+    """Readwise发送队列表 - 有用的文章随记录一起写入，由后台发送器限流发送并回写readwise_id"""
+
+    __tablename__ = "readwise_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    record_id = Column(Integer, nullable=False, unique=True, index=True)  # 记录ID
+    article_url = Column(String(1000), nullable=False)  # 文章URL
+    status = Column(String(20), nullable=False, default=OutboxStatus.PENDING, index=True)
+    attempts = Column(Integer, nullable=False, default=0)  # 已尝试发送次数
+    next_attempt_at = Column(DateTime, default=func.now(), index=True)  # 最早的下次发送时间
+    last_error = Column(Text, nullable=True)  # 最近一次发送失败的原因
+    created_at = Column(DateTime, default=func.now(), index=True)
+    sent_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<ReadwiseOutbox(id={self.id}, record_id={self.record_id}, status='{self.status}')>"
+
+
+class LLMCacheEntry(Base):
+    """LLM判断结果缓存表 - 以prompt、模型和温度的哈希为键"""
+
+    __tablename__ = "llm_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), nullable=False, unique=True, index=True)  # 缓存键
+    prompt_hash = Column(String(64), nullable=False, index=True)  # 基础prompt哈希
+    model = Column(String(200), nullable=False)  # 模型名称
+    temperature = Column(Float, nullable=False)  # 温度参数
+    result = Column(UnicodeJSON, nullable=False)  # LLM过滤结果
+    hit_count = Column(Integer, nullable=False, default=0)  # 命中次数
+    created_at = Column(DateTime, default=func.now(), index=True)
+    last_accessed_at = Column(DateTime, default=func.now(), index=True)
+
+    def __repr__(self):
+        return f"<LLMCacheEntry(id={self.id}, model='{self.model}')>"
+
+
+class PageCacheEntry(Base):
+    """网页抓取缓存表 - 以文章URL的哈希为键，保存解析后的正文和条件请求所需的验证信息"""
+
+    __tablename__ = "page_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    url_hash = Column(String(64), nullable=False, unique=True, index=True)  # 文章URL哈希
+    url = Column(String(1000), nullable=False)  # 文章URL
+    etag = Column(String(500), nullable=True)  # 响应的ETag
+    last_modified = Column(String(100), nullable=True)  # 响应的Last-Modified
+    content = Column(Text, nullable=False)  # trafilatura解析后的正文
+    size = Column(Integer, nullable=False, default=0)  # 正文字节数
+    hit_count = Column(Integer, nullable=False, default=0)  # 命中次数
+    validated_at = Column(DateTime, default=func.now())  # 最近一次下载或重新验证的时间
+    created_at = Column(DateTime, default=func.now(), index=True)
+    last_accessed_at = Column(DateTime, default=func.now(), index=True)
+
+    def __repr__(self):
+        return f"<PageCacheEntry(id={self.id}, url='{self.url}')>"
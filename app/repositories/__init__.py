@@ -3,16 +3,25 @@ Repositories package
 
 Contains data access layer:
 - base_repository: Base repository with common database operations
+- llm_cache_repository: LLM verdict cache database operations
+- page_cache_repository: Fetched page cache database operations
 - queue_repository: Queue-related database operations
+- readwise_outbox_repository: Readwise delivery outbox database operations
 - record_repository: Record-related database operations
 """
 
 from .base_repository import BaseRepository
+from .llm_cache_repository import LLMCacheRepository
+from .page_cache_repository import PageCacheRepository
 from .queue_repository import QueueRepository
+from .readwise_outbox_repository import ReadwiseOutboxRepository
 from .record_repository import RecordRepository
 
 __all__ = [
     "BaseRepository",
+    "LLMCacheRepository",
+    "PageCacheRepository",
     "QueueRepository",
+    "ReadwiseOutboxRepository",
     "RecordRepository",
 ]
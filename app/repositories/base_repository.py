@@ -1,7 +1,12 @@
+from typing import Any, List, Set
+
 from sqlalchemy.orm import Session
 
 from app.core.database import db
 
+# 批量查询时每条语句的参数个数（SQLite对单条语句的参数个数有限制）
+IN_QUERY_CHUNK_SIZE = 500
+
 
 class BaseRepository:
     """基础Repository类"""
@@ -16,3 +21,16 @@ class BaseRepository:
     def close_session(self, session: Session):
         """关闭数据库会话"""
         self.db.close_session(session)
+
+    def find_existing(self, column, values: List[Any]) -> Set[Any]:
+        """批量查询，返回 values 中在指定列已存在的值"""
+        session = self.get_session()
+        try:
+            existing = set()
+            for start in range(0, len(values), IN_QUERY_CHUNK_SIZE):
+                chunk = values[start:start + IN_QUERY_CHUNK_SIZE]
+                rows = session.query(column).filter(column.in_(chunk)).all()
+                existing.update(row[0] for row in rows)
+            return existing
+        finally:
+            self.close_session(session)
@@ -0,0 +1,172 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import desc
+
+from app.models import LLMCacheEntry
+from app.repositories.base_repository import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCacheRepository(BaseRepository):
+    """LLM结果缓存数据访问层"""
+
+    def get(self, cache_key: str, ttl_hours: int) -> Optional[Dict[str, Any]]:
+        """查找未过期的缓存结果，命中时更新访问时间"""
+        session = self.get_session()
+        try:
+            cutoff_date = datetime.now() - timedelta(hours=ttl_hours)
+            entry = (
+                session.query(LLMCacheEntry)
+                .filter(
+                    LLMCacheEntry.cache_key == cache_key,
+                    LLMCacheEntry.created_at >= cutoff_date,
+                )
+                .first()
+            )
+            if entry is None:
+                return None
+
+            entry.hit_count += 1
+            entry.last_accessed_at = datetime.now()
+            session.commit()
+            return {
+                "prompt_hash": entry.prompt_hash,
+                "result": entry.result,
+                "created_at": entry.created_at,
+            }
+        except Exception as e:
+            session.rollback()
+            logger.error(f"查询LLM缓存失败: {e}")
+            return None
+        finally:
+            self.close_session(session)
+
+    def save(
+        self,
+        cache_key: str,
+        prompt_hash: str,
+        model: str,
+        temperature: float,
+        result: Dict[str, Any],
+    ) -> bool:
+        """保存缓存结果（已存在时覆盖）"""
+        session = self.get_session()
+        try:
+            entry = session.query(LLMCacheEntry).filter(
+                LLMCacheEntry.cache_key == cache_key).first()
+            if entry is None:
+                entry = LLMCacheEntry(cache_key=cache_key)
+                session.add(entry)
+            entry.prompt_hash = prompt_hash
+            entry.model = model
+            entry.temperature = temperature
+            entry.result = result
+            entry.created_at = datetime.now()
+            entry.last_accessed_at = datetime.now()
+            session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            logger.error(f"保存LLM缓存失败: {e}")
+            return False
+        finally:
+            self.close_session(session)
+
+    def record_access(self, accesses: Dict[str, Tuple[int, datetime]]) -> bool:
+        """批量写回内存缓存命中的访问次数和最近访问时间"""
+        session = self.get_session()
+        try:
+            for cache_key, (hits, accessed_at) in accesses.items():
+                session.query(LLMCacheEntry).filter(LLMCacheEntry.cache_key == cache_key).update(
+                    {
+                        "hit_count": LLMCacheEntry.hit_count + hits,
+                        "last_accessed_at": accessed_at,
+                    },
+                    synchronize_session=False,
+                )
+            session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            logger.error(f"写回LLM缓存访问记录失败: {e}")
+            return False
+        finally:
+            self.close_session(session)
+
+    def delete_expired(self, ttl_hours: int) -> int:
+        """删除过期的缓存"""
+        session = self.get_session()
+        try:
+            cutoff_date = datetime.now() - timedelta(hours=ttl_hours)
+            deleted_count = (
+                session.query(LLMCacheEntry)
+                .filter(LLMCacheEntry.created_at < cutoff_date)
+                .delete()
+            )
+            session.commit()
+            return deleted_count
+        except Exception as e:
+            session.rollback()
+            logger.error(f"删除过期LLM缓存失败: {e}")
+            return 0
+        finally:
+            self.close_session(session)
+
+    def evict_to_size(self, max_entries: int) -> int:
+        """按最近访问时间淘汰，保留最多 max_entries 条缓存"""
+        session = self.get_session()
+        try:
+            total_count = session.query(LLMCacheEntry).count()
+            if total_count <= max_entries:
+                return 0
+
+            stale_ids = [
+                row.id for row in (
+                    session.query(LLMCacheEntry.id)
+                    .order_by(desc(LLMCacheEntry.last_accessed_at))
+                    .offset(max_entries)
+                    .all()
+                )
+            ]
+            deleted_count = (
+                session.query(LLMCacheEntry)
+                .filter(LLMCacheEntry.id.in_(stale_ids))
+                .delete(synchronize_session=False)
+            )
+            session.commit()
+            return deleted_count
+        except Exception as e:
+            session.rollback()
+            logger.error(f"淘汰LLM缓存失败: {e}")
+            return 0
+        finally:
+            self.close_session(session)
+
+    def delete_except_prompts(self, prompt_hashes: Iterable[str]) -> int:
+        """删除prompt已变更（哈希不在当前配置中）的缓存"""
+        session = self.get_session()
+        try:
+            deleted_count = (
+                session.query(LLMCacheEntry)
+                .filter(LLMCacheEntry.prompt_hash.notin_(list(prompt_hashes)))
+                .delete(synchronize_session=False)
+            )
+            session.commit()
+            return deleted_count
+        except Exception as e:
+            session.rollback()
+            logger.error(f"清理失效LLM缓存失败: {e}")
+            return 0
+        finally:
+            self.close_session(session)
+
+    def count(self) -> int:
+        """获取缓存条数"""
+        session = self.get_session()
+        try:
+            return session.query(LLMCacheEntry).count()
+        finally:
+            self.close_session(session)
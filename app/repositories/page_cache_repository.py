@@ -0,0 +1,176 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import desc, func
+
+from app.models import PageCacheEntry
+from app.repositories.base_repository import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+
+class PageCacheRepository(BaseRepository):
+    """网页抓取缓存数据访问层"""
+
+    def get(self, url_hash: str, max_age_hours: int) -> Optional[Dict[str, Any]]:
+        """查找未过期的缓存，命中时更新访问时间"""
+        session = self.get_session()
+        try:
+            cutoff_date = datetime.now() - timedelta(hours=max_age_hours)
+            entry = (
+                session.query(PageCacheEntry)
+                .filter(
+                    PageCacheEntry.url_hash == url_hash,
+                    PageCacheEntry.created_at >= cutoff_date,
+                )
+                .first()
+            )
+            if entry is None:
+                return None
+
+            entry.hit_count += 1
+            entry.last_accessed_at = datetime.now()
+            session.commit()
+            return {
+                "etag": entry.etag,
+                "last_modified": entry.last_modified,
+                "content": entry.content,
+                "validated_at": entry.validated_at,
+            }
+        except Exception as e:
+            session.rollback()
+            logger.error(f"查询网页缓存失败: {e}")
+            return None
+        finally:
+            self.close_session(session)
+
+    def save(
+        self,
+        url_hash: str,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        content: str,
+    ) -> bool:
+        """保存缓存（已存在时覆盖）"""
+        session = self.get_session()
+        try:
+            entry = session.query(PageCacheEntry).filter(
+                PageCacheEntry.url_hash == url_hash).first()
+            if entry is None:
+                entry = PageCacheEntry(url_hash=url_hash)
+                session.add(entry)
+            entry.url = url[:1000]
+            entry.etag = etag
+            entry.last_modified = last_modified
+            entry.content = content
+            entry.size = len(content.encode("utf-8"))
+            entry.created_at = datetime.now()
+            entry.validated_at = datetime.now()
+            entry.last_accessed_at = datetime.now()
+            session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            logger.error(f"保存网页缓存失败: {e}")
+            return False
+        finally:
+            self.close_session(session)
+
+    def mark_validated(self, url_hash: str) -> bool:
+        """服务端确认内容未变更（304）后更新验证时间"""
+        session = self.get_session()
+        try:
+            updated_count = (
+                session.query(PageCacheEntry)
+                .filter(PageCacheEntry.url_hash == url_hash)
+                .update({"validated_at": datetime.now()}, synchronize_session=False)
+            )
+            session.commit()
+            return updated_count > 0
+        except Exception as e:
+            session.rollback()
+            logger.error(f"更新网页缓存验证时间失败: {e}")
+            return False
+        finally:
+            self.close_session(session)
+
+    def delete(self, url_hash: str) -> bool:
+        """删除缓存"""
+        session = self.get_session()
+        try:
+            deleted_count = (
+                session.query(PageCacheEntry)
+                .filter(PageCacheEntry.url_hash == url_hash)
+                .delete(synchronize_session=False)
+            )
+            session.commit()
+            return deleted_count > 0
+        except Exception as e:
+            session.rollback()
+            logger.error(f"删除网页缓存失败: {e}")
+            return False
+        finally:
+            self.close_session(session)
+
+    def delete_expired(self, max_age_hours: int) -> int:
+        """删除过期的缓存"""
+        session = self.get_session()
+        try:
+            cutoff_date = datetime.now() - timedelta(hours=max_age_hours)
+            deleted_count = (
+                session.query(PageCacheEntry)
+                .filter(PageCacheEntry.created_at < cutoff_date)
+                .delete()
+            )
+            session.commit()
+            return deleted_count
+        except Exception as e:
+            session.rollback()
+            logger.error(f"删除过期网页缓存失败: {e}")
+            return 0
+        finally:
+            self.close_session(session)
+
+    def evict_to_size(self, max_bytes: int) -> int:
+        """按最近访问时间淘汰，保留的缓存正文总字节数不超过 max_bytes"""
+        session = self.get_session()
+        try:
+            stale_ids = []
+            total_size = 0
+            rows = (
+                session.query(PageCacheEntry.id, PageCacheEntry.size)
+                .order_by(desc(PageCacheEntry.last_accessed_at))
+                .all()
+            )
+            for row in rows:
+                total_size += row.size
+                if total_size > max_bytes:
+                    stale_ids.append(row.id)
+            if not stale_ids:
+                return 0
+
+            deleted_count = (
+                session.query(PageCacheEntry)
+                .filter(PageCacheEntry.id.in_(stale_ids))
+                .delete(synchronize_session=False)
+            )
+            session.commit()
+            return deleted_count
+        except Exception as e:
+            session.rollback()
+            logger.error(f"淘汰网页缓存失败: {e}")
+            return 0
+        finally:
+            self.close_session(session)
+
+    def get_totals(self) -> Dict[str, int]:
+        """获取缓存条数和正文总字节数"""
+        session = self.get_session()
+        try:
+            entries, total_size = session.query(
+                func.count(PageCacheEntry.id), func.coalesce(func.sum(PageCacheEntry.size), 0)).one()
+            return {"entries": entries, "bytes": int(total_size)}
+        finally:
+            self.close_session(session)
@@ -1,10 +1,10 @@
 import logging
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, List, Optional, Set
 
 from sqlalchemy import asc
 
-from app.models import Queue
+from app.models import Queue, QueueContent
 from app.repositories.base_repository import BaseRepository
 
 logger = logging.getLogger(__name__)
@@ -46,6 +46,35 @@ class QueueRepository(BaseRepository):
         finally:
             self.close_session(session)
 
+    def find_existing_urls(self, article_urls: List[str]) -> Set[str]:
+        """批量检查URL，返回已存在于队列中的URL"""
+        return self.find_existing(Queue.article_url, article_urls)
+
+    def add_batch_to_queue(self, items: List[Dict[str, str]]) -> List[int]:
+        """在一个事务中批量添加数据到队列，按传入顺序返回队列项ID"""
+        session = self.get_session()
+        try:
+            queue_items = [
+                Queue(
+                    feed_url=item["feed_url"],
+                    title=item["title"],
+                    content=item["content"],
+                    article_url=item["article_url"],
+                )
+                for item in items
+            ]
+            session.add_all(queue_items)
+            session.flush()
+            queue_ids = [queue_item.id for queue_item in queue_items]
+            session.commit()
+            return queue_ids
+        except Exception as e:
+            session.rollback()
+            logger.error(f"批量添加数据到队列失败: {e}")
+            raise
+        finally:
+            self.close_session(session)
+
     def get_next_pending_item(self) -> Optional[Queue]:
         """获取下一个待处理的项目"""
         session = self.get_session()
@@ -58,6 +87,19 @@ class QueueRepository(BaseRepository):
         finally:
             self.close_session(session)
 
+    def get_pending_items(self, limit: int) -> List[Queue]:
+        """按入队顺序获取多个待处理的项目"""
+        session = self.get_session()
+        try:
+            return (
+                session.query(Queue)
+                .order_by(asc(Queue.created_at))
+                .limit(limit)
+                .all()
+            )
+        finally:
+            self.close_session(session)
+
     def delete_queue_item(self, queue_id: int) -> bool:
         """删除队列项"""
         session = self.get_session()
@@ -65,6 +107,8 @@ class QueueRepository(BaseRepository):
             queue_item = session.query(Queue).filter(
                 Queue.id == queue_id).first()
             if queue_item:
+                session.query(QueueContent).filter(
+                    QueueContent.queue_id == queue_id).delete(synchronize_session=False)
                 session.delete(queue_item)
                 session.commit()
                 return True
@@ -76,6 +120,38 @@ class QueueRepository(BaseRepository):
         finally:
             self.close_session(session)
 
+    def save_prefetched_content(self, queue_id: int, content: str) -> bool:
+        """保存队列项预抓取的内容（队列项已处理完删除时跳过）"""
+        session = self.get_session()
+        try:
+            if session.query(Queue.id).filter(Queue.id == queue_id).first() is None:
+                return False
+            entry = session.query(QueueContent).filter(
+                QueueContent.queue_id == queue_id).first()
+            if entry is None:
+                entry = QueueContent(queue_id=queue_id)
+                session.add(entry)
+            entry.content = content
+            entry.fetched_at = datetime.now()
+            session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            logger.error(f"保存预抓取内容失败: {e}")
+            return False
+        finally:
+            self.close_session(session)
+
+    def get_prefetched_content(self, queue_id: int) -> Optional[str]:
+        """获取队列项预抓取的内容"""
+        session = self.get_session()
+        try:
+            entry = session.query(QueueContent).filter(
+                QueueContent.queue_id == queue_id).first()
+            return entry.content if entry else None
+        finally:
+            self.close_session(session)
+
     def get_queue_stats(self) -> dict:
         """获取队列统计"""
         session = self.get_session()
@@ -92,6 +168,9 @@ class QueueRepository(BaseRepository):
         session = self.get_session()
         try:
             cutoff_date = datetime.now() - timedelta(days=days)
+            stale_ids = session.query(Queue.id).filter(Queue.created_at < cutoff_date)
+            session.query(QueueContent).filter(
+                QueueContent.queue_id.in_(stale_ids)).delete(synchronize_session=False)
             deleted_count = (
                 session.query(Queue)
                 .filter(Queue.created_at < cutoff_date)
@@ -0,0 +1,202 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+
+from app.core.constants import OutboxStatus
+from app.models import ReadwiseOutbox, Record
+from app.repositories.base_repository import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+
+class ReadwiseOutboxRepository(BaseRepository):
+    """Readwise发送队列数据访问层"""
+
+    def get_due(self, limit: int) -> List[Dict[str, Any]]:
+        """获取到了发送时间的待发送项（按计划发送时间排序）"""
+        session = self.get_session()
+        try:
+            items = (
+                session.query(ReadwiseOutbox)
+                .filter(
+                    ReadwiseOutbox.status == OutboxStatus.PENDING,
+                    ReadwiseOutbox.next_attempt_at <= datetime.now(),
+                )
+                .order_by(ReadwiseOutbox.next_attempt_at, ReadwiseOutbox.id)
+                .limit(limit)
+                .all()
+            )
+            return [
+                {
+                    "id": item.id,
+                    "record_id": item.record_id,
+                    "article_url": item.article_url,
+                    "attempts": item.attempts,
+                }
+                for item in items
+            ]
+        finally:
+            self.close_session(session)
+
+    def next_due_at(self) -> Optional[datetime]:
+        """最早的待发送项的计划发送时间，没有待发送项时返回 None"""
+        session = self.get_session()
+        try:
+            return (
+                session.query(func.min(ReadwiseOutbox.next_attempt_at))
+                .filter(ReadwiseOutbox.status == OutboxStatus.PENDING)
+                .scalar()
+            )
+        finally:
+            self.close_session(session)
+
+    def mark_sent(self, outbox_id: int, record_id: int, readwise_id: Optional[str]) -> bool:
+        """标记为已发送，并在同一事务中回写记录的readwise_id"""
+        session = self.get_session()
+        try:
+            session.query(ReadwiseOutbox).filter(ReadwiseOutbox.id == outbox_id).update(
+                {
+                    "status": OutboxStatus.SENT,
+                    "attempts": ReadwiseOutbox.attempts + 1,
+                    "last_error": None,
+                    "sent_at": datetime.now(),
+                },
+                synchronize_session=False,
+            )
+            session.query(Record).filter(Record.id == record_id).update(
+                {"readwise_id": readwise_id, "updated_at": datetime.now()},
+                synchronize_session=False,
+            )
+            session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            logger.error(f"更新Readwise发送状态失败: {e}")
+            return False
+        finally:
+            self.close_session(session)
+
+    def mark_retry(self, outbox_id: int, error: str, next_attempt_at: datetime) -> bool:
+        """记录发送失败，计划在 next_attempt_at 重试"""
+        session = self.get_session()
+        try:
+            updated_count = session.query(ReadwiseOutbox).filter(ReadwiseOutbox.id == outbox_id).update(
+                {
+                    "attempts": ReadwiseOutbox.attempts + 1,
+                    "last_error": error[:2000],
+                    "next_attempt_at": next_attempt_at,
+                },
+                synchronize_session=False,
+            )
+            session.commit()
+            return updated_count > 0
+        except Exception as e:
+            session.rollback()
+            logger.error(f"更新Readwise重试时间失败: {e}")
+            return False
+        finally:
+            self.close_session(session)
+
+    def mark_failed(self, outbox_id: int, record_id: int, error: str, retryable: bool) -> bool:
+        """
+        标记为发送失败（不再重试），并把原因写入记录
+
+        可重试的错误用尽重试次数时标记为 EXHAUSTED，服务重启后重新发送；否则标记为 FAILED
+        """
+        session = self.get_session()
+        try:
+            session.query(ReadwiseOutbox).filter(ReadwiseOutbox.id == outbox_id).update(
+                {
+                    "status": OutboxStatus.EXHAUSTED if retryable else OutboxStatus.FAILED,
+                    "attempts": ReadwiseOutbox.attempts + 1,
+                    "last_error": error[:2000],
+                },
+                synchronize_session=False,
+            )
+            session.query(Record).filter(Record.id == record_id).update(
+                {"error_message": f"发送到Readwise失败: {error}", "updated_at": datetime.now()},
+                synchronize_session=False,
+            )
+            session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            logger.error(f"更新Readwise发送状态失败: {e}")
+            return False
+        finally:
+            self.close_session(session)
+
+    def retry_exhausted(self) -> int:
+        """把重试次数用尽的项重新加入发送队列（保留最近一次的错误；请求无效的项不重新发送）"""
+        session = self.get_session()
+        try:
+            updated_count = (
+                session.query(ReadwiseOutbox)
+                .filter(ReadwiseOutbox.status == OutboxStatus.EXHAUSTED)
+                .update(
+                    {
+                        "status": OutboxStatus.PENDING,
+                        "attempts": 0,
+                        "next_attempt_at": datetime.now(),
+                    },
+                    synchronize_session=False,
+                )
+            )
+            session.commit()
+            return updated_count
+        except Exception as e:
+            session.rollback()
+            logger.error(f"重新加入Readwise发送队列失败: {e}")
+            return 0
+        finally:
+            self.close_session(session)
+
+    def cleanup_sent(self, days: int) -> int:
+        """删除发送完成超过指定天数的项"""
+        session = self.get_session()
+        try:
+            cutoff_date = datetime.now() - timedelta(days=days)
+            deleted_count = (
+                session.query(ReadwiseOutbox)
+                .filter(
+                    ReadwiseOutbox.status == OutboxStatus.SENT,
+                    ReadwiseOutbox.sent_at < cutoff_date,
+                )
+                .delete(synchronize_session=False)
+            )
+            session.commit()
+            return deleted_count
+        except Exception as e:
+            session.rollback()
+            logger.error(f"清理Readwise发送队列失败: {e}")
+            return 0
+        finally:
+            self.close_session(session)
+
+    def get_counts(self) -> Dict[str, Any]:
+        """按状态统计发送队列，并给出最早的待发送项已等待的秒数"""
+        session = self.get_session()
+        try:
+            counts = {status.value: 0 for status in OutboxStatus}
+            rows = (
+                session.query(ReadwiseOutbox.status, func.count(ReadwiseOutbox.id))
+                .group_by(ReadwiseOutbox.status)
+                .all()
+            )
+            for status, count in rows:
+                counts[status] = count
+            oldest = (
+                session.query(func.min(ReadwiseOutbox.created_at))
+                .filter(ReadwiseOutbox.status == OutboxStatus.PENDING)
+                .scalar()
+            )
+            counts["oldest_pending_seconds"] = (
+                round((datetime.now() - oldest).total_seconds(), 1) if oldest else 0.0)
+            return counts
+        except Exception as e:
+            logger.error(f"统计Readwise发送队列失败: {e}")
+            return {}
+        finally:
+            self.close_session(session)
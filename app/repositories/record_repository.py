@@ -1,10 +1,11 @@
 import logging
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Set
 
 from sqlalchemy import and_, desc
 
-from app.models import Record
+from app.core.constants import RecordStatus
+from app.models import ReadwiseOutbox, Record
 from app.repositories.base_repository import BaseRepository
 
 logger = logging.getLogger(__name__)
@@ -23,6 +24,10 @@ class RecordRepository(BaseRepository):
         finally:
             self.close_session(session)
 
+    def find_existing_urls(self, article_urls: List[str]) -> Set[str]:
+        """批量检查URL，返回已存在于记录中的URL"""
+        return self.find_existing(Record.article_url, article_urls)
+
     def create_record(
         self,
         feed_url: str,
@@ -33,9 +38,10 @@ class RecordRepository(BaseRepository):
         filter_result: Optional[Dict[str, Any]] = None,
         filtered: Optional[bool] = None,
         readwise_id: Optional[str] = None,
-        error_message: Optional[str] = None
+        error_message: Optional[str] = None,
+        deliver_to_readwise: bool = False
     ) -> int:
-        """创建记录"""
+        """创建记录，deliver_to_readwise 为 True 时在同一事务中加入Readwise发送队列"""
         session = self.get_session()
         try:
             record = Record(
@@ -50,6 +56,12 @@ class RecordRepository(BaseRepository):
                 error_message=error_message
             )
             session.add(record)
+            if deliver_to_readwise:
+                session.flush()
+                # 计划发送时间与发送器比较时使用同一时钟（本地时间）
+                now = datetime.now()
+                session.add(ReadwiseOutbox(
+                    record_id=record.id, article_url=article_url, created_at=now, next_attempt_at=now))
             session.commit()
             session.refresh(record)
             return record.id
@@ -88,6 +100,26 @@ class RecordRepository(BaseRepository):
         finally:
             self.close_session(session)
 
+    def update_record_by_url(self, article_url: str, **kwargs) -> bool:
+        """按文章URL更新记录"""
+        session = self.get_session()
+        try:
+            record = session.query(Record).filter(
+                Record.article_url == article_url).first()
+            if record:
+                for key, value in kwargs.items():
+                    setattr(record, key, value)
+                record.updated_at = datetime.now()
+                session.commit()
+                return True
+            return False
+        except Exception as e:
+            session.rollback()
+            logger.error(f"更新记录失败: {e}")
+            return False
+        finally:
+            self.close_session(session)
+
     def delete_record(self, record_id: int) -> bool:
         """删除记录"""
         session = self.get_session()
@@ -95,6 +127,8 @@ class RecordRepository(BaseRepository):
             record = session.query(Record).filter(
                 Record.id == record_id).first()
             if record:
+                session.query(ReadwiseOutbox).filter(
+                    ReadwiseOutbox.record_id == record_id).delete(synchronize_session=False)
                 session.delete(record)
                 session.commit()
                 return True
@@ -149,6 +183,24 @@ class RecordRepository(BaseRepository):
         finally:
             self.close_session(session)
 
+    def get_labeled_records(self, limit: int) -> List[Dict[str, Any]]:
+        """获取最近有判断结果（USEFUL/USELESS）的记录，用于训练本地分类器"""
+        session = self.get_session()
+        try:
+            rows = (
+                session.query(Record.id, Record.feed_url, Record.title, Record.filter_result)
+                .filter(Record.status.in_([RecordStatus.USEFUL, RecordStatus.USELESS]))
+                .order_by(desc(Record.created_at))
+                .limit(limit)
+                .all()
+            )
+            return [
+                {"id": row.id, "feed_url": row.feed_url, "title": row.title, "filter_result": row.filter_result}
+                for row in rows
+            ]
+        finally:
+            self.close_session(session)
+
     def get_record_stats(self, days: int = 1) -> Dict[str, Any]:
         """获取记录统计"""
         session = self.get_session()
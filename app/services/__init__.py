@@ -5,12 +5,14 @@ Contains business logic services:
 - llm_service: Language model integration
 - queue_service: Queue processing management
 - readwise_service: Readwise API integration
+- readwise_outbox_service: Rate-limited Readwise delivery outbox
 - record_service: Record processing logic
 """
 
 from .content_fetcher_service import content_fetcher_service
 from .llm_service import LLMService
 from .queue_service import queue_service
+from .readwise_outbox_service import readwise_outbox_service
 from .readwise_service import ReadwiseService
 from .record_service import record_service
 
@@ -18,6 +20,7 @@ __all__ = [
     "LLMService",
     "queue_service",
     "ReadwiseService",
+    "readwise_outbox_service",
     "record_service",
     "content_fetcher_service",
 ]
@@ -0,0 +1,299 @@
+"""
+本地文本分类服务
+
+以历史记录中LLM的判断结果为标签，为每个prompt配置训练一个轻量的文本分类器
+（哈希n-gram特征 + 逻辑回归，纯Python实现，不依赖GPU），
+置信度足够高的预测直接采用，其余交由LLM判断。
+
+记录表不保存文章内容，因此分类器只使用标题作为特征
+"""
+
+import logging
+import math
+import random
+import re
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import config
+from app.repositories.record_repository import RecordRepository
+
+logger = logging.getLogger(__name__)
+
+# 拉丁字母/数字单词，或连续的CJK字符
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff\u3400-\u4dbf\u3040-\u30ff\uac00-\ud7af]+")
+
+# 这些原因表示LLM调用本身失败，对应的判断结果不能作为训练标签
+_UNRELIABLE_REASON_PREFIXES = ("LLM调用失败", "响应解析失败")
+
+# 训练参数
+EPOCHS = 8
+LEARNING_RATE = 0.5
+L2 = 1e-5
+
+
+def extract_features(text: str, n_features: int) -> Dict[int, float]:
+    """
+    提取哈希n-gram特征：拉丁文按单词及相邻单词二元组，CJK按相邻两字，结果做L2归一化
+    """
+    grams: List[str] = []
+    previous_word: Optional[str] = None
+    for token in _TOKEN_PATTERN.findall((text or "").lower()):
+        if token[0] >= "\u3040":
+            previous_word = None
+            if len(token) == 1:
+                grams.append(token)
+            grams.extend(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            grams.append(token)
+            if previous_word is not None:
+                grams.append(f"{previous_word} {token}")
+            previous_word = token
+
+    features: Dict[int, float] = {}
+    for gram in grams:
+        index = zlib.crc32(gram.encode("utf-8")) % n_features
+        features[index] = features.get(index, 0.0) + 1.0
+
+    norm = math.sqrt(sum(value * value for value in features.values()))
+    if norm:
+        for index in features:
+            features[index] /= norm
+    return features
+
+
+def training_label(filter_result: Any) -> Optional[bool]:
+    """从记录的filter_result中取出LLM判断标签，预过滤、分类器判断或调用失败的记录返回 None"""
+    if not isinstance(filter_result, dict) or not isinstance(filter_result.get("useful"), bool):
+        return None
+    if "prefilter_rule" in filter_result or "classifier_probability" in filter_result:
+        return None
+    if str(filter_result.get("reason", "")).startswith(_UNRELIABLE_REASON_PREFIXES):
+        return None
+    return filter_result["useful"]
+
+
+class HashedLogisticRegression:
+    """稀疏哈希特征上的二分类逻辑回归（SGD训练，按类别频率加权）"""
+
+    def __init__(self):
+        self.weights: Dict[int, float] = {}
+        self.bias = 0.0
+
+    def fit(self, samples: List[Dict[int, float]], labels: List[bool], seed: int = 0):
+        """训练模型"""
+        positives = sum(labels)
+        negatives = len(labels) - positives
+        # 类别不平衡时按频率反比加权
+        class_weight = {
+            True: len(labels) / (2 * positives) if positives else 1.0,
+            False: len(labels) / (2 * negatives) if negatives else 1.0,
+        }
+
+        order = list(range(len(samples)))
+        rng = random.Random(seed)
+        for epoch in range(EPOCHS):
+            rng.shuffle(order)
+            rate = LEARNING_RATE / (1 + epoch)
+            for index in order:
+                features, label = samples[index], labels[index]
+                error = (self.predict_proba(features) - (1.0 if label else 0.0)) * class_weight[label]
+                for feature, value in features.items():
+                    weight = self.weights.get(feature, 0.0)
+                    self.weights[feature] = weight - rate * (error * value + L2 * weight)
+                self.bias -= rate * error
+
+    def predict_proba(self, features: Dict[int, float]) -> float:
+        """预测为有用的概率"""
+        score = self.bias + sum(self.weights.get(feature, 0.0) * value for feature, value in features.items())
+        if score >= 0:
+            return 1.0 / (1.0 + math.exp(-score))
+        exp_score = math.exp(score)
+        return exp_score / (1.0 + exp_score)
+
+
+class ClassifierService:
+    """本地分类服务"""
+
+    def __init__(self):
+        # 特征空间大小决定已训练模型的权重下标，只在启动时读取
+        self.n_features = config.get_classifier_config()["n_features"]
+        self.record_repository = RecordRepository()
+
+        # 按prompt配置的site列表索引的模型及训练信息
+        self.models: Dict[tuple, HashedLogisticRegression] = {}
+        self.training_info: Dict[tuple, Dict[str, Any]] = {}
+        self.stats = {"predictions": 0, "confident": 0, "escalated": 0}
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用本地分类器"""
+        return config.get_classifier_config()["enabled"]
+
+    @property
+    def threshold(self) -> float:
+        """直接采用预测结果所需的置信度"""
+        return config.get_classifier_config()["threshold"]
+
+    @property
+    def min_training_records(self) -> int:
+        """每个prompt配置训练所需的最少标注记录数"""
+        return config.get_classifier_config()["min_training_records"]
+
+    @property
+    def max_training_records(self) -> int:
+        """每次训练读取的最多标注记录数"""
+        return config.get_classifier_config()["max_training_records"]
+
+    @property
+    def retrain_interval_hours(self) -> int:
+        """重新训练间隔（小时）"""
+        return config.get_classifier_config()["retrain_interval_hours"]
+
+    @property
+    def holdout_ratio(self) -> float:
+        """离线评估时留出作测试集的记录比例"""
+        return config.get_classifier_config()["holdout_ratio"]
+
+    @staticmethod
+    def _find_site(feed_url: str) -> Optional[tuple]:
+        """查找feed URL匹配的prompt配置的site列表"""
+        route = config.resolve_prompt(feed_url)
+        return route.site if route is not None else None
+
+    def _load_samples(self) -> Dict[tuple, List[Tuple[int, str, bool]]]:
+        """读取标注记录，按prompt配置分组为 (记录ID, 标题, 标签)"""
+        grouped: Dict[tuple, List[Tuple[int, str, bool]]] = {}
+        for record in self.record_repository.get_labeled_records(self.max_training_records):
+            label = training_label(record["filter_result"])
+            site = self._find_site(record["feed_url"] or "")
+            if label is None or site is None or not record["title"]:
+                continue
+            grouped.setdefault(site, []).append((record["id"], record["title"], label))
+        return grouped
+
+    def _fit(self, samples: Iterable[Tuple[int, str, bool]]) -> HashedLogisticRegression:
+        """在样本上训练一个模型"""
+        samples = list(samples)
+        model = HashedLogisticRegression()
+        model.fit(
+            [extract_features(title, self.n_features) for _, title, _ in samples],
+            [label for _, _, label in samples],
+        )
+        return model
+
+    def _is_holdout(self, record_id: int) -> bool:
+        """按记录ID确定性地划分测试集"""
+        return zlib.crc32(str(record_id).encode("utf-8")) % 1000 < self.holdout_ratio * 1000
+
+    def train(self) -> Dict[str, Any]:
+        """用全部标注记录为每个prompt配置训练模型（同步执行，耗时操作应放到线程中调用）"""
+        started = time.perf_counter()
+        models: Dict[tuple, HashedLogisticRegression] = {}
+        training_info: Dict[tuple, Dict[str, Any]] = {}
+
+        for site, samples in self._load_samples().items():
+            positives = sum(1 for _, _, label in samples if label)
+            if len(samples) < self.min_training_records or positives in (0, len(samples)):
+                continue
+            models[site] = self._fit(samples)
+            training_info[site] = {
+                "records": len(samples),
+                "useful": positives,
+                "trained_at": time.time(),
+            }
+
+        self.models = models
+        self.training_info = training_info
+        elapsed = time.perf_counter() - started
+        logger.info(f"本地分类器训练完成: {len(models)} 个prompt配置, 耗时 {elapsed:.2f} 秒")
+        return {"models": len(models), "seconds": round(elapsed, 2)}
+
+    def predict(self, site: tuple, title: str) -> Optional[Dict[str, Any]]:
+        """
+        预测文章是否有用
+
+        Args:
+            site: feed URL匹配到的prompt配置的site列表
+            title: 文章标题
+
+        Returns:
+            置信度达到阈值时返回 {"useful": bool, "probability": 有用的概率}，否则返回 None（交由LLM判断）
+        """
+        classifier_config = config.get_classifier_config()
+        if not classifier_config["enabled"]:
+            return None
+        model = self.models.get(site)
+        if model is None:
+            return None
+
+        self.stats["predictions"] += 1
+        probability = model.predict_proba(extract_features(title, self.n_features))
+        if max(probability, 1.0 - probability) < classifier_config["threshold"]:
+            self.stats["escalated"] += 1
+            return None
+
+        self.stats["confident"] += 1
+        return {"useful": probability >= 0.5, "probability": round(probability, 4)}
+
+    def evaluate(self, thresholds: List[float]) -> Dict[str, Any]:
+        """
+        离线评估：按 holdout_ratio 留出测试集，在其余记录上训练后，
+        统计各置信度阈值下直接采用的比例（节省的LLM调用）和准确率
+
+        Returns:
+            按prompt配置（第一个site）索引的评估结果
+        """
+        report: Dict[str, Any] = {}
+        for site, samples in self._load_samples().items():
+            train_set = [sample for sample in samples if not self._is_holdout(sample[0])]
+            test_set = [sample for sample in samples if self._is_holdout(sample[0])]
+            positives = sum(1 for _, _, label in train_set if label)
+            if len(train_set) < self.min_training_records or positives in (0, len(train_set)) or not test_set:
+                report[site[0]] = {"records": len(samples), "skipped": "标注记录不足或只有一种标签"}
+                continue
+
+            model = self._fit(train_set)
+            predictions = [
+                (model.predict_proba(extract_features(title, self.n_features)), label)
+                for _, title, label in test_set
+            ]
+            useful_total = sum(1 for _, label in predictions if label)
+
+            rows = []
+            for threshold in thresholds:
+                confident = [
+                    (probability >= 0.5, label) for probability, label in predictions
+                    if max(probability, 1.0 - probability) >= threshold
+                ]
+                correct = sum(1 for predicted, label in confident if predicted == label)
+                missed_useful = sum(1 for predicted, label in confident if label and not predicted)
+                rows.append({
+                    "threshold": threshold,
+                    "coverage": round(len(confident) / len(predictions), 4),
+                    "accuracy": round(correct / len(confident), 4) if confident else None,
+                    "missed_useful": missed_useful,
+                    "missed_useful_rate": round(missed_useful / useful_total, 4) if useful_total else 0.0,
+                })
+
+            report[site[0]] = {
+                "train_records": len(train_set),
+                "test_records": len(test_set),
+                "test_useful": useful_total,
+                "thresholds": rows,
+            }
+        return report
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取分类器统计"""
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            **self.stats,
+            "models": {site[0]: info for site, info in self.training_info.items()},
+        }
+
+
+# 全局本地分类服务实例
+classifier_service = ClassifierService()
@@ -0,0 +1,230 @@
+"""
+Webhook内容完整性判断
+
+refetch_content 为 true 的feed中，有些文章的webhook内容本身就是全文。按feed记录以往
+webhook内容与抓取到的正文的长度和段落数之比，结合截断标记（如“Read more”、省略号），
+判断本次webhook内容是否完整，完整时跳过抓取。
+
+按比例抽样仍然抓取被判断为完整的文章，统计内容覆盖率，并比较分别用webhook内容和
+抓取内容得到的LLM判断结果，评估跳过抓取对判断结果的影响
+"""
+
+import html
+import logging
+import random
+import re
+import statistics
+from collections import deque
+from typing import Any, Deque, Dict, NamedTuple, Tuple
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+# 最多记录多少个feed的历史（超出后清除最早记录的feed）
+MAX_FEEDS = 2048
+
+# 最多保留的判断结果变化样例数
+MAX_CHANGE_EXAMPLES = 20
+
+# 在内容末尾多少个字符内查找截断标记
+TRUNCATION_TAIL_CHARS = 120
+
+_TRUNCATION_MARKERS = re.compile(
+    r"(\.\.\.|…|\[…\]|\[\.\.\.\]|read\s+more|continue\s+reading|keep\s+reading|more\s*»|"
+    r"阅读全文|阅读更多|查看全文|继续阅读|全文链接|点击查看|展开全文|更多内容)",
+    re.IGNORECASE,
+)
+_BLOCK_TAGS = re.compile(r"<\s*/?\s*(p|br|div|li|h[1-6]|blockquote|pre|tr)\b[^>]*>", re.IGNORECASE)
+_TAGS = re.compile(r"<[^>]+>")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+
+
+class ContentShape(NamedTuple):
+    """内容的纯文本长度和段落数"""
+    length: int
+    paragraphs: int
+
+
+def html_to_text(content: str) -> str:
+    """去掉HTML标签，块级标签处换行"""
+    text = _BLOCK_TAGS.sub("\n\n", content or "")
+    text = html.unescape(_TAGS.sub("", text))
+    text = _SPACES.sub(" ", text)
+    return _BLANK_LINES.sub("\n\n", text).strip()
+
+
+def measure(text: str) -> ContentShape:
+    """统计纯文本长度和段落数（非空行数）"""
+    paragraphs = sum(1 for line in text.split("\n") if line.strip())
+    return ContentShape(len(text), paragraphs)
+
+
+def has_truncation_marker(text: str) -> bool:
+    """内容末尾是否有截断标记"""
+    return _TRUNCATION_MARKERS.search(text[-TRUNCATION_TAIL_CHARS:]) is not None
+
+
+class FeedHistory:
+    """单个feed最近若干次抓取的webhook内容与正文对比"""
+
+    def __init__(self, size: int):
+        # (长度覆盖率, 段落覆盖率, 正文长度)
+        self.samples: Deque[Tuple[float, float, int]] = deque(maxlen=size)
+
+    def add(self, webhook: ContentShape, fetched: ContentShape):
+        """记录一次对比"""
+        if fetched.length <= 0:
+            return
+        self.samples.append((
+            min(webhook.length / fetched.length, 2.0),
+            min(webhook.paragraphs / max(fetched.paragraphs, 1), 2.0),
+            fetched.length,
+        ))
+
+    def medians(self) -> Tuple[float, float, float]:
+        """长度覆盖率、段落覆盖率和正文长度的中位数"""
+        return (
+            statistics.median(sample[0] for sample in self.samples),
+            statistics.median(sample[1] for sample in self.samples),
+            statistics.median(sample[2] for sample in self.samples),
+        )
+
+
+class CompletenessService:
+    """Webhook内容完整性判断服务"""
+
+    def __init__(self):
+        self._history: Dict[str, FeedHistory] = {}
+        self.stats = {
+            "judged": 0,
+            "complete": 0,
+            "fetches_avoided": 0,
+            "truncation_marker": 0,
+            "too_short": 0,
+            "no_history": 0,
+            "partial_feed": 0,
+            "sampled": 0,
+            "sample_coverage_total": 0.0,
+            "sample_incomplete": 0,
+            "verdicts_compared": 0,
+            "verdict_changes": 0,
+        }
+        self.change_examples: Deque[Dict[str, Any]] = deque(maxlen=MAX_CHANGE_EXAMPLES)
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """完整性判断配置"""
+        return config.get_completeness_config()
+
+    def _get_history(self, feed_url: str) -> FeedHistory:
+        """获取feed历史，不存在时创建"""
+        history = self._history.get(feed_url)
+        if history is None:
+            if len(self._history) >= MAX_FEEDS:
+                self._history.pop(next(iter(self._history)))
+            history = FeedHistory(self.settings["history_size"])
+            self._history[feed_url] = history
+        return history
+
+    def check(self, feed_url: str, content: str) -> Tuple[bool, str]:
+        """
+        判断webhook内容是否为全文（不计入统计）
+
+        Returns:
+            (是否完整, 原因)
+        """
+        settings = self.settings
+        if not settings["enabled"]:
+            return False, "disabled"
+
+        text = html_to_text(content)
+        if has_truncation_marker(text):
+            return False, "truncation_marker"
+        shape = measure(text)
+        if shape.length < settings["min_chars"]:
+            return False, "too_short"
+
+        history = self._history.get(feed_url)
+        if history is None or len(history.samples) < settings["min_history"]:
+            return False, "no_history"
+
+        length_coverage, paragraph_coverage, fetched_length = history.medians()
+        # 该feed的webhook内容通常就是全文，且本次内容的长度和段落数与以往正文相当
+        if (length_coverage >= settings["min_coverage"]
+                and shape.length >= fetched_length * settings["min_length_ratio"]
+                and shape.paragraphs >= 2
+                and paragraph_coverage >= settings["min_coverage"] * 0.5):
+            return True, "complete"
+        return False, "partial_feed"
+
+    def judge(self, feed_url: str, content: str) -> Tuple[bool, bool]:
+        """
+        判断是否跳过抓取（计入统计）
+
+        Returns:
+            (是否判断为完整, 是否仍然抽样抓取以评估判断效果)
+        """
+        complete, reason = self.check(feed_url, content)
+        if reason == "disabled":
+            return False, False
+
+        self.stats["judged"] += 1
+        if not complete:
+            self.stats[reason] += 1
+            return False, False
+
+        self.stats["complete"] += 1
+        if random.random() < self.settings["sample_rate"]:
+            self.stats["sampled"] += 1
+            return True, True
+        self.stats["fetches_avoided"] += 1
+        return True, False
+
+    def observe(self, feed_url: str, webhook_content: str, fetched_content: str, sampled: bool = False):
+        """记录一次抓取结果，sampled 表示被判断为完整后抽样抓取"""
+        if not self.settings["enabled"]:
+            return
+        webhook = measure(html_to_text(webhook_content))
+        fetched = measure(fetched_content)
+        self._get_history(feed_url).add(webhook, fetched)
+
+        if sampled and fetched.length > 0:
+            coverage = min(webhook.length / fetched.length, 1.0)
+            self.stats["sample_coverage_total"] += coverage
+            if coverage < self.settings["min_coverage"]:
+                self.stats["sample_incomplete"] += 1
+
+    def compare_verdicts(self, article_url: str, fetched_result: Dict[str, Any], webhook_result: Dict[str, Any]):
+        """比较抽样文章分别用抓取内容和webhook内容得到的判断结果"""
+        self.stats["verdicts_compared"] += 1
+        fetched_useful = bool(fetched_result.get("useful", False))
+        webhook_useful = bool(webhook_result.get("useful", False))
+        if fetched_useful != webhook_useful:
+            self.stats["verdict_changes"] += 1
+            self.change_examples.append({
+                "article_url": article_url,
+                "fetched_useful": fetched_useful,
+                "webhook_useful": webhook_useful,
+            })
+            logger.info(
+                f"跳过抓取会改变判断结果: {article_url}, 抓取内容: {fetched_useful}, webhook内容: {webhook_useful}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取完整性判断统计"""
+        sampled = self.stats["sampled"]
+        compared = self.stats["verdicts_compared"]
+        judged = self.stats["judged"]
+        return {
+            **{key: value for key, value in self.stats.items() if key != "sample_coverage_total"},
+            "feeds": len(self._history),
+            "avoided_rate": round(self.stats["fetches_avoided"] / judged, 4) if judged else 0.0,
+            "avg_sample_coverage": round(self.stats["sample_coverage_total"] / sampled, 4) if sampled else 0.0,
+            "verdict_change_rate": round(self.stats["verdict_changes"] / compared, 4) if compared else 0.0,
+            "recent_changes": list(self.change_examples),
+        }
+
+
+# 全局完整性判断服务实例
+completeness_service = CompletenessService()
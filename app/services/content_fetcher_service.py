@@ -1,74 +1,144 @@
 """
 网页内容抓取服务
 
-使用 trafilatura 库来抓取和解析网页内容
+使用 httpx 异步流式下载网页（长连接池、按主机调度和熔断、DNS解析缓存），
+先检查响应头再读取响应体，超过大小上限时停止下载；
+再在解析进程池中用 trafilatura 库解析网页内容；解析结果按URL缓存，过了新鲜期后用条件请求重新验证
 """
 
+import codecs
 import logging
-from typing import Optional
+import re
+import time
+from typing import Any, Dict, Optional, Tuple, Union
 from urllib.parse import urlparse
 
-import requests
-import trafilatura
+import httpx
 
 from app.core.config import config
+from app.core.extraction_pool import ExtractionPool
+from app.core.http_client import DNSCache, create_async_client, get_connection_stats
+from app.services.domain_scheduler import DomainScheduler, DomainUnavailable
+from app.services.page_cache_service import PageCacheService
 
 logger = logging.getLogger(__name__)
 
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# 在网页开头多少字节内查找 meta 标签声明的编码
+ENCODING_SNIFF_BYTES = 4096
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+_HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w\-:.]+)', re.IGNORECASE)
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w\-:.]+)', re.IGNORECASE)
+
+# 按 HTML 标准替换为兼容的超集编码
+_ENCODING_ALIASES = {
+    "gb2312": "gb18030",
+    "gbk": "gb18030",
+    "iso-8859-1": "cp1252",
+    "latin-1": "cp1252",
+    "ascii": "cp1252",
+    "us-ascii": "cp1252",
+}
+
+
+def _normalize_encoding(name: str) -> Optional[str]:
+    """校验编码名称并替换为兼容的超集编码，无法识别时返回 None"""
+    name = _ENCODING_ALIASES.get(name.lower(), name.lower())
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def detect_encoding(body: bytes, content_type: str) -> Tuple[Optional[str], str]:
+    """
+    按 BOM、Content-Type 响应头、网页开头的 meta 标签依次判断编码
+
+    Returns:
+        (编码, 来源)，无法判断时编码为 None
+    """
+    for bom, encoding in _BOMS:
+        if body.startswith(bom):
+            return encoding, "bom"
+
+    match = _HEADER_CHARSET.search(content_type)
+    if match:
+        encoding = _normalize_encoding(match.group(1))
+        if encoding:
+            return encoding, "header"
+
+    match = _META_CHARSET.search(body[:ENCODING_SNIFF_BYTES])
+    if match:
+        encoding = _normalize_encoding(match.group(1).decode("ascii", "ignore"))
+        # 能读到 ASCII 的 meta 标签说明不是 UTF-16
+        if encoding and not encoding.startswith("utf-16"):
+            return encoding, "meta"
+        if encoding:
+            return "utf-8", "meta"
+
+    return None, "unknown"
+
 
 class ContentFetcherService:
     """网页内容抓取服务"""
 
     def __init__(self):
-        self.session = requests.Session()
-        self._setup_session()
-        self._setup_trafilatura()
-
-    def _setup_session(self):
-        """设置请求会话"""
-        # 设置用户代理
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-
-        # 设置超时
-        self.session.timeout = 30
-
-        # 设置SSL验证选项
-        self.session.verify = False
-        import urllib3
-        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-        # 如果有代理配置，设置代理
-        proxy_config = config.get_proxy_config()
-        if proxy_config:
-            if proxy_config["type"] == "http":
-                self.session.proxies = {
-                    "http": proxy_config["url"],
-                    "https": proxy_config["url"]
-                }
-            elif proxy_config["type"] == "socks5":
-                # 对于 socks5 代理，需要安装 requests[socks] 或 PySocks
-                try:
-                    import socket
-
-                    import socks
-                    proxy_url = urlparse(proxy_config["url"])
-                    socks.set_default_proxy(
-                        socks.SOCKS5,
-                        proxy_url.hostname,
-                        proxy_url.port,
-                        username=proxy_url.username,
-                        password=proxy_url.password
-                    )
-                    socket.socket = socks.socksocket
-                except ImportError:
-                    logger.warning("未安装 PySocks，无法使用 SOCKS5 代理")
-
-    def _setup_trafilatura(self):
-        """设置 trafilatura 配置"""
-        # 使用默认配置，专注于文本提取
-        self.trafilatura_config = None
+        fetcher_config = config.get_fetcher_config()
+        self.max_download_bytes = fetcher_config["max_download_bytes"]
+        self.dns_cache = DNSCache(fetcher_config["dns_cache_ttl_seconds"])
+        self.client = self._create_client(fetcher_config)
+        self.extraction_pool = ExtractionPool(
+            workers=fetcher_config["extract_workers"],
+            queue_size=fetcher_config["extract_queue_size"],
+            max_bytes=fetcher_config["extract_max_bytes"],
+            timeout_seconds=fetcher_config["extract_timeout_seconds"],
+        )
+        self.page_cache = PageCacheService(fetcher_config["cache"])
+        self.scheduler = DomainScheduler(
+            max_concurrency=fetcher_config["max_connections_per_host"],
+            min_interval_seconds=fetcher_config["min_request_interval_seconds"],
+            failure_threshold=fetcher_config["circuit_failure_threshold"],
+            cooldown_seconds=fetcher_config["circuit_cooldown_seconds"],
+        )
+
+        self.stats = {
+            "requests": 0,
+            "failures": 0,
+            "fast_fails": 0,
+            "non_html": 0,
+            "truncated": 0,
+            "empty": 0,
+            "bytes_downloaded": 0,
+            "bytes_saved": 0,
+            "encodings": {"bom": 0, "header": 0, "meta": 0, "unknown": 0},
+            "in_flight": 0,
+            "max_in_flight": 0,
+            "fetch_seconds": 0.0,
+            "extract_seconds": 0.0,
+        }
+
+    def _create_client(self, fetcher_config: Dict[str, Any]) -> httpx.AsyncClient:
+        """创建抓取用的长连接客户端（代理只作用于该客户端）"""
+        return create_async_client(
+            "fetcher",
+            # 建连（含DNS解析和TLS握手）和读取使用不同的超时时间
+            timeout=httpx.Timeout(fetcher_config["read_timeout"], connect=fetcher_config["connect_timeout"]),
+            max_connections=fetcher_config["max_connections"],
+            max_keepalive_connections=fetcher_config["max_keepalive_connections"],
+            keepalive_expiry=fetcher_config["keepalive_expiry"],
+            http2=fetcher_config["http2"],
+            verify=False,
+            proxy=config.get_proxy_url("fetcher"),
+            dns_cache=self.dns_cache,
+            headers={'User-Agent': USER_AGENT},
+            follow_redirects=True,
+        )
 
     async def fetch_content(self, url: str) -> Optional[str]:
         """
@@ -80,43 +150,144 @@ class ContentFetcherService:
         Returns:
             解析后的纯文本内容，如果失败则返回 None
         """
+        self.stats["requests"] += 1
+        self.stats["in_flight"] += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
         try:
+            # 新鲜期内的缓存直接使用
+            cached = self.page_cache.lookup(url)
+            if cached is not None and cached["fresh"]:
+                logger.info(f"使用缓存的网页内容: {url}")
+                return cached["content"]
+
             logger.info(f"开始抓取网页内容: {url}")
 
-            # 发送请求获取网页内容
-            response = self.session.get(url)
-            response.raise_for_status()
+            # 发送请求获取网页内容（有缓存时带上条件请求头）
+            # 同一主机按并发上限和最小间隔排队，熔断中的主机直接失败
+            started = time.perf_counter()
+            async with self.scheduler.slot((urlparse(url).hostname or "").lower()) as request:
+                response, body = await self._download(url, self.page_cache.conditional_headers(cached))
+                # 服务端错误计入主机熔断，4xx 等属于单个链接的问题
+                request.failed = response.status_code >= 500
+            self.stats["fetch_seconds"] += time.perf_counter() - started
 
-            # 检查内容类型
-            content_type = response.headers.get('content-type', '').lower()
-            if 'text/html' not in content_type:
-                logger.warning(f"非HTML内容类型: {content_type}")
+            if cached is not None and response.status_code == 304:
+                self.page_cache.mark_not_modified(url)
+                logger.info(f"网页未变更，使用缓存内容: {url}")
+                return cached["content"]
+            response.raise_for_status()
+            if cached is not None:
+                self.page_cache.mark_changed()
+            if body is None:
                 return None
 
-            # 使用 trafilatura 解析内容
-            extracted_text = trafilatura.extract(
-                response.content,
-                config=self.trafilatura_config
-            )
+            # 使用 trafilatura 解析内容（在工作进程中执行，避免阻塞事件循环）
+            started = time.perf_counter()
+            extracted_text = await self.extraction_pool.extract(self._decode(body, response))
+            self.stats["extract_seconds"] += time.perf_counter() - started
 
             if not extracted_text:
+                self.stats["empty"] += 1
                 logger.warning(f"无法提取到有效内容: {url}")
                 return None
 
+            self.page_cache.store(url, response, extracted_text)
             logger.info(f"成功抓取网页内容，长度: {len(extracted_text)} 字符")
             return extracted_text
 
-        except requests.exceptions.RequestException as e:
+        except DomainUnavailable as e:
+            self.stats["fast_fails"] += 1
+            logger.warning(f"跳过抓取: {url}, {e}")
+            return None
+        except httpx.HTTPError as e:
+            self.stats["failures"] += 1
             logger.error(f"请求失败: {url}, 错误: {e}")
             return None
         except Exception as e:
+            self.stats["failures"] += 1
             logger.error(f"抓取内容失败: {url}, 错误: {e}")
             return None
+        finally:
+            self.stats["in_flight"] -= 1
+
+    async def _download(self, url: str, headers: Dict[str, str]) -> Tuple[httpx.Response, Optional[bytes]]:
+        """
+        流式下载网页：先检查状态码和内容类型，再读取响应体，超过大小上限时停止读取
+
+        Returns:
+            (响应, 响应体)；非成功状态码或非HTML内容时响应体为 None
+        """
+        async with self.client.stream("GET", url, headers=headers) as response:
+            if not response.is_success:
+                return response, None
+
+            # 检查内容类型，非HTML内容（如PDF、视频）不下载响应体
+            content_type = response.headers.get('content-type', '').lower()
+            if 'text/html' not in content_type:
+                self.stats["non_html"] += 1
+                self._record_abort(response)
+                logger.warning(f"非HTML内容类型，不下载: {content_type}")
+                return response, None
+
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if len(body) >= self.max_download_bytes:
+                    del body[self.max_download_bytes:]
+                    self.stats["truncated"] += 1
+                    self._record_abort(response)
+                    logger.warning(f"网页超过 {self.max_download_bytes} 字节，停止下载: {url}")
+                    break
+            else:
+                self.stats["bytes_downloaded"] += response.num_bytes_downloaded
+            return response, bytes(body)
+
+    def _record_abort(self, response: httpx.Response):
+        """记录提前停止下载时已下载和节省的字节数（响应头带 Content-Length 时才能计算节省量）"""
+        downloaded = response.num_bytes_downloaded
+        self.stats["bytes_downloaded"] += downloaded
+        try:
+            content_length = int(response.headers.get("content-length", ""))
+        except ValueError:
+            return
+        self.stats["bytes_saved"] += max(content_length - downloaded, 0)
+
+    def _decode(self, body: bytes, response: httpx.Response) -> Union[str, bytes]:
+        """按网页开头判断的编码解码；无法判断时交给 trafilatura 自行检测"""
+        encoding, source = detect_encoding(body, response.headers.get('content-type', ''))
+        self.stats["encodings"][source] += 1
+        if encoding is None:
+            return body
+        return body.decode(encoding, errors="replace")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取抓取统计"""
+        requests = self.stats["requests"]
+        return {
+            "requests": requests,
+            "failures": self.stats["failures"],
+            "fast_fails": self.stats["fast_fails"],
+            "non_html": self.stats["non_html"],
+            "truncated": self.stats["truncated"],
+            "empty": self.stats["empty"],
+            "bytes_downloaded": self.stats["bytes_downloaded"],
+            "bytes_saved": self.stats["bytes_saved"],
+            "encodings": dict(self.stats["encodings"]),
+            "in_flight": self.stats["in_flight"],
+            "max_in_flight": self.stats["max_in_flight"],
+            "avg_fetch_ms": round(self.stats["fetch_seconds"] / requests * 1000, 2) if requests else 0.0,
+            "avg_extract_ms": round(self.stats["extract_seconds"] / requests * 1000, 2) if requests else 0.0,
+            "dns": self.dns_cache.to_dict(),
+            "connections": get_connection_stats().get("fetcher", {}),
+            "extraction": self.extraction_pool.get_stats(),
+            "cache": self.page_cache.get_stats(),
+            "domains": self.scheduler.get_stats(),
+        }
 
-    def cleanup(self):
-        """清理资源"""
-        if hasattr(self, 'session'):
-            self.session.close()
+    async def aclose(self):
+        """关闭长连接客户端和解析进程池"""
+        await self.client.aclose()
+        self.extraction_pool.close()
 
 
 # 全局内容抓取服务实例
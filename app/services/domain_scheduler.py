@@ -0,0 +1,183 @@
+"""
+按域名调度网页抓取
+
+同一主机限制并发数并保持最小请求间隔，避免连续请求同一网站；
+连续失败的主机打开熔断，冷却期内直接失败而不再等待超时；
+按主机统计请求数、失败数和耗时
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List
+
+from app.core.circuit_breaker import CircuitBreaker
+
+# 最多保留多少个主机的状态（超出后清除最久未使用且空闲的主机）
+MAX_DOMAINS = 1024
+
+
+class DomainUnavailable(Exception):
+    """主机熔断打开，请求被直接拒绝"""
+
+    def __init__(self, host: str, remaining_seconds: float):
+        super().__init__(f"{host} 连续请求失败，熔断中（剩余 {remaining_seconds:.0f} 秒）")
+        self.host = host
+        self.remaining_seconds = remaining_seconds
+
+
+class DomainRequest:
+    """一次请求的结果，由调用方在请求完成后标记服务端错误"""
+
+    __slots__ = ("failed",)
+
+    def __init__(self):
+        self.failed = False
+
+
+class DomainState:
+    """单个主机的调度状态和统计"""
+
+    def __init__(self, host: str, max_concurrency: int, breaker: CircuitBreaker):
+        self.host = host
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.breaker = breaker
+        # 下一个请求最早的开始时间（事件循环时间）
+        self.next_start = 0.0
+        self.active = 0
+        self.last_used = time.monotonic()
+
+        self.requests = 0
+        self.errors = 0
+        self.fast_fails = 0
+        self.wait_seconds_total = 0.0
+        self.latency_seconds_total = 0.0
+        self.latency_seconds_max = 0.0
+
+    def record(self, latency: float, failed: bool):
+        """记录一次请求"""
+        self.requests += 1
+        self.latency_seconds_total += latency
+        self.latency_seconds_max = max(self.latency_seconds_max, latency)
+        if failed:
+            self.errors += 1
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出统计数据"""
+        return {
+            "host": self.host,
+            "requests": self.requests,
+            "errors": self.errors,
+            "fast_fails": self.fast_fails,
+            "active": self.active,
+            "error_rate": round(self.errors / self.requests, 4) if self.requests else 0.0,
+            "avg_wait_ms": round(self.wait_seconds_total / self.requests * 1000, 2) if self.requests else 0.0,
+            "avg_latency_ms": round(
+                self.latency_seconds_total / self.requests * 1000, 2) if self.requests else 0.0,
+            "max_latency_ms": round(self.latency_seconds_max * 1000, 2),
+            "circuit": self.breaker.to_dict(),
+        }
+
+
+class DomainScheduler:
+    """按主机限制并发和请求间隔，并对连续失败的主机熔断"""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        min_interval_seconds: float,
+        failure_threshold: int,
+        cooldown_seconds: float,
+    ):
+        self.max_concurrency = max_concurrency
+        self.min_interval_seconds = min_interval_seconds
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._domains: Dict[str, DomainState] = {}
+
+    def _get_state(self, host: str) -> DomainState:
+        """获取主机状态，不存在时创建"""
+        state = self._domains.get(host)
+        if state is None:
+            if len(self._domains) >= MAX_DOMAINS:
+                self._prune()
+            state = DomainState(
+                host, self.max_concurrency, CircuitBreaker(self.failure_threshold, self.cooldown_seconds))
+            self._domains[host] = state
+        state.last_used = time.monotonic()
+        return state
+
+    def _prune(self):
+        """清除最久未使用的一半空闲主机（熔断中的主机保留）"""
+        idle = sorted(
+            (state for state in self._domains.values()
+             if state.active == 0 and state.breaker.state == CircuitBreaker.CLOSED),
+            key=lambda state: state.last_used,
+        )
+        for state in idle[:max(1, len(self._domains) // 2)]:
+            del self._domains[state.host]
+
+    @asynccontextmanager
+    async def slot(self, host: str) -> AsyncIterator[DomainRequest]:
+        """
+        获取主机的请求名额：熔断打开时抛出 DomainUnavailable，
+        否则等待并发名额和最小请求间隔；请求抛出异常或被标记失败时计入熔断
+        """
+        state = self._get_state(host)
+        if not state.breaker.acquire():
+            state.fast_fails += 1
+            raise DomainUnavailable(host, state.breaker.remaining_cooldown())
+        # 熔断关闭时放行的请求不是探测请求，排队期间熔断打开则不再发送
+        is_probe = state.breaker.state != CircuitBreaker.CLOSED
+
+        state.active += 1
+        request = DomainRequest()
+        try:
+            waited = time.perf_counter()
+            async with state.semaphore:
+                # 按预定的开始时间排队，保证同一主机相邻请求的间隔
+                loop = asyncio.get_running_loop()
+                start = max(loop.time(), state.next_start)
+                state.next_start = start + self.min_interval_seconds
+                delay = start - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                state.wait_seconds_total += time.perf_counter() - waited
+
+                if not is_probe and state.breaker.state != CircuitBreaker.CLOSED:
+                    state.fast_fails += 1
+                    raise DomainUnavailable(host, state.breaker.remaining_cooldown())
+
+                started = time.perf_counter()
+                try:
+                    yield request
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    state.record(time.perf_counter() - started, failed=True)
+                    raise
+                state.record(time.perf_counter() - started, failed=request.failed)
+        except asyncio.CancelledError:
+            # 探测请求被取消时释放半开探测名额，不改变熔断状态
+            if is_probe:
+                state.breaker.release()
+            raise
+        finally:
+            state.active -= 1
+
+    def get_stats(self, limit: int = 20) -> Dict[str, Any]:
+        """获取按请求数排序的前 limit 个主机及所有熔断中主机的统计"""
+        states: List[DomainState] = sorted(self._domains.values(), key=lambda state: -state.requests)
+        shown = states[:limit]
+        shown += [
+            state for state in states[limit:] if state.breaker.state != CircuitBreaker.CLOSED
+        ]
+        return {
+            "tracked": len(self._domains),
+            "open_circuits": sum(
+                1 for state in self._domains.values() if state.breaker.state == CircuitBreaker.OPEN),
+            "domains": [state.to_dict() for state in shown],
+        }
@@ -0,0 +1,192 @@
+"""
+LLM endpoint 路由
+
+按延迟和错误率的指数加权移动平均（EWMA）为endpoint加权选择，
+连续失败的endpoint会被熔断，冷却后通过半开探测恢复
+"""
+
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+# 权重计算中延迟的下限（秒），避免极小延迟导致权重失衡
+MIN_LATENCY_SECONDS = 0.05
+
+# 计算延迟分位数时保留的最近成功请求数
+LATENCY_WINDOW_SIZE = 200
+
+
+class EndpointHealth:
+    """单个endpoint的健康数据"""
+
+    def __init__(self, endpoint: Dict[str, Any], alpha: float, breaker: CircuitBreaker):
+        self.endpoint = endpoint
+        self.alpha = alpha
+        self.breaker = breaker
+        self.ewma_latency: Optional[float] = None
+        self.ewma_error_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_used_at: Optional[float] = None
+        self.latencies: deque = deque(maxlen=LATENCY_WINDOW_SIZE)
+
+    def record_latency(self, latency: float):
+        """更新延迟EWMA"""
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency = self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+
+    def record(self, latency: float, failed: bool, error: Optional[str] = None):
+        """记录一次请求结果"""
+        self.requests += 1
+        self.last_used_at = time.time()
+        self.record_latency(latency)
+        self.ewma_error_rate = self.alpha * (1.0 if failed else 0.0) + (1 - self.alpha) * self.ewma_error_rate
+
+        if failed:
+            self.failures += 1
+            self.last_error = error
+            self.breaker.record_failure()
+        else:
+            self.latencies.append(latency)
+            self.breaker.record_success()
+
+    def latency_percentile(self, percentile: float, min_samples: int = 1) -> Optional[float]:
+        """最近成功请求延迟的分位数，样本不足时返回 None"""
+        if len(self.latencies) < max(1, min_samples):
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(percentile * len(ordered)))
+        return ordered[index]
+
+    def weight(self, default_latency: float) -> float:
+        """选择权重：错误率越低、延迟越小权重越高"""
+        latency = max(self.ewma_latency or default_latency, MIN_LATENCY_SECONDS)
+        return max(0.01, 1.0 - self.ewma_error_rate) ** 2 / latency
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出健康数据"""
+        p90_latency = self.latency_percentile(0.9)
+        return {
+            "name": self.endpoint["name"],
+            "requests": self.requests,
+            "failures": self.failures,
+            "ewma_latency_ms": round(self.ewma_latency * 1000, 1) if self.ewma_latency is not None else None,
+            "ewma_error_rate": round(self.ewma_error_rate, 4),
+            "p90_latency_ms": round(p90_latency * 1000, 1) if p90_latency is not None else None,
+            "circuit": self.breaker.to_dict(),
+            "last_error": self.last_error,
+        }
+
+
+class EndpointRouter:
+    """LLM endpoint 路由器"""
+
+    def __init__(self, endpoints: List[Dict[str, Any]], routing_config: Dict[str, Any]):
+        self.endpoints = endpoints
+        self.strategy = routing_config["strategy"]
+        self.health: Dict[str, EndpointHealth] = {
+            endpoint["name"]: EndpointHealth(
+                endpoint,
+                routing_config["ewma_alpha"],
+                CircuitBreaker(
+                    routing_config["failure_threshold"],
+                    routing_config["cooldown_seconds"],
+                ),
+            )
+            for endpoint in endpoints
+        }
+        # 轮询索引（round_robin 策略使用）
+        self.current_index = 0
+
+    def select(self, exclude: Iterable[str] = ()) -> Dict[str, Any]:
+        """
+        选择一个endpoint
+
+        Args:
+            exclude: 本次请求已尝试过的endpoint名称，尽量避开
+
+        Returns:
+            endpoint配置
+        """
+        if not self.endpoints:
+            raise ValueError("没有可用的endpoints")
+
+        if self.strategy == "round_robin":
+            endpoint = self.endpoints[self.current_index]
+            self.current_index = (self.current_index + 1) % len(self.endpoints)
+            return endpoint
+
+        excluded = set(exclude)
+        available = [
+            health for health in self.health.values()
+            if health.breaker.is_available()
+        ]
+        candidates = [health for health in available if health.endpoint["name"] not in excluded]
+        if not candidates:
+            candidates = available
+        if not candidates:
+            waits = {name: health.breaker.remaining_cooldown() for name, health in self.health.items()}
+            raise RuntimeError(f"所有LLM endpoints均处于熔断状态，剩余冷却时间: {waits}")
+
+        # 半开状态的endpoint优先获得探测机会
+        for health in candidates:
+            if health.breaker.state != CircuitBreaker.CLOSED and health.breaker.acquire():
+                logger.info(f"endpoint {health.endpoint['name']} 进入半开状态，发送探测请求")
+                return health.endpoint
+
+        known_latencies = [h.ewma_latency for h in self.health.values() if h.ewma_latency is not None]
+        default_latency = sum(known_latencies) / len(known_latencies) if known_latencies else 1.0
+        weights = [health.weight(default_latency) for health in candidates]
+        chosen = random.choices(candidates, weights=weights, k=1)[0]
+        chosen.breaker.acquire()
+        return chosen.endpoint
+
+    def record_success(self, endpoint: Dict[str, Any], latency: float):
+        """记录请求成功"""
+        self.health[endpoint["name"]].record(latency, failed=False)
+
+    def record_failure(self, endpoint: Dict[str, Any], latency: float, error: str):
+        """记录请求失败"""
+        health = self.health[endpoint["name"]]
+        previous_state = health.breaker.state
+        health.record(latency, failed=True, error=error)
+        if health.breaker.state == CircuitBreaker.OPEN and previous_state != CircuitBreaker.OPEN:
+            logger.warning(
+                f"endpoint {endpoint['name']} 熔断，冷却 {health.breaker.cooldown_seconds} 秒: {error}")
+
+    def latency_percentile(
+        self, endpoint: Dict[str, Any], percentile: float, min_samples: int = 1
+    ) -> Optional[float]:
+        """获取endpoint最近成功请求延迟的分位数"""
+        return self.health[endpoint["name"]].latency_percentile(percentile, min_samples)
+
+    def release(self, endpoint: Dict[str, Any]):
+        """选择后未发送请求（如命中缓存）时释放半开探测名额"""
+        health = self.health.get(endpoint["name"])
+        if health is not None:
+            health.breaker.release()
+
+    def record_cancelled(self, endpoint: Dict[str, Any], elapsed: float):
+        """
+        记录被取消的请求：已等待的时长是实际延迟的下限，计入延迟EWMA，
+        不计入错误率，并释放半开探测名额
+        """
+        health = self.health[endpoint["name"]]
+        health.record_latency(elapsed)
+        health.breaker.release()
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取路由状态"""
+        return {
+            "strategy": self.strategy,
+            "endpoints": [health.to_dict() for health in self.health.values()],
+        }
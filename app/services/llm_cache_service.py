@@ -0,0 +1,158 @@
+"""
+LLM结果缓存服务
+
+两级缓存：内存LRU + SQLite持久化，键为 (完整prompt, 模型, 温度) 的哈希。
+内存缓存项与持久化缓存使用相同的过期时间，命中次数和访问时间批量写回数据库，
+按访问时间淘汰时不会误删只在内存中被频繁命中的缓存
+"""
+
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from app.repositories.llm_cache_repository import LLMCacheRepository
+
+logger = logging.getLogger(__name__)
+
+# 每写入多少条缓存执行一次过期清理和容量淘汰
+EVICTION_INTERVAL = 50
+
+# 内存缓存命中的访问记录累计多少条后写回数据库
+ACCESS_FLUSH_INTERVAL = 50
+
+
+def hash_text(text: str) -> str:
+    """计算文本的SHA-256哈希"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class MemoryEntry(NamedTuple):
+    """内存缓存项"""
+    result: Dict[str, Any]
+    prompt_hash: str
+    expires_at: datetime
+
+
+class LLMCacheService:
+    """LLM结果缓存服务"""
+
+    def __init__(self, cache_config: Dict[str, Any]):
+        self.enabled = cache_config["enabled"]
+        self.memory_max_entries = cache_config["memory_max_entries"]
+        self.max_entries = cache_config["max_entries"]
+        self.ttl_hours = cache_config["ttl_hours"]
+        self.cache_repository = LLMCacheRepository()
+
+        self._memory: "OrderedDict[str, MemoryEntry]" = OrderedDict()
+        # 尚未写回数据库的内存命中：缓存键 -> (命中次数, 最近访问时间)
+        self._pending_access: Dict[str, Tuple[int, datetime]] = {}
+        self._writes_since_eviction = 0
+        self.stats = {"memory_hits": 0, "persisted_hits": 0, "misses": 0, "writes": 0}
+
+    @staticmethod
+    def make_key(prompt: str, model: str, temperature: float) -> str:
+        """根据完整prompt、模型和温度生成缓存键"""
+        return hash_text(f"{model}\x00{temperature}\x00{prompt}")
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """查找缓存结果"""
+        if not self.enabled:
+            return None
+
+        now = datetime.now()
+        entry = self._memory.get(cache_key)
+        if entry is not None:
+            if entry.expires_at > now:
+                self._memory.move_to_end(cache_key)
+                self.stats["memory_hits"] += 1
+                self._record_access(cache_key, now)
+                return dict(entry.result)
+            del self._memory[cache_key]
+
+        hit = self.cache_repository.get(cache_key, self.ttl_hours)
+        if hit is None:
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["persisted_hits"] += 1
+        self._remember(cache_key, hit["prompt_hash"], hit["result"], hit["created_at"])
+        return dict(hit["result"])
+
+    def _record_access(self, cache_key: str, accessed_at: datetime):
+        """记录内存缓存命中，累计到一定数量后写回数据库"""
+        hits, _ = self._pending_access.get(cache_key, (0, accessed_at))
+        self._pending_access[cache_key] = (hits + 1, accessed_at)
+        if len(self._pending_access) >= ACCESS_FLUSH_INTERVAL:
+            self.flush_access()
+
+    def flush_access(self):
+        """把内存缓存命中的访问记录写回数据库"""
+        if not self._pending_access:
+            return
+        accesses, self._pending_access = self._pending_access, {}
+        self.cache_repository.record_access(accesses)
+
+    def put(
+        self,
+        cache_key: str,
+        prompt_hash: str,
+        model: str,
+        temperature: float,
+        result: Dict[str, Any],
+    ):
+        """写入缓存"""
+        if not self.enabled:
+            return
+
+        self._remember(cache_key, prompt_hash, result, datetime.now())
+        self.cache_repository.save(cache_key, prompt_hash, model, temperature, result)
+        self.stats["writes"] += 1
+
+        self._writes_since_eviction += 1
+        if self._writes_since_eviction >= EVICTION_INTERVAL:
+            self._writes_since_eviction = 0
+            self.evict()
+
+    def evict(self):
+        """清理过期缓存并按容量淘汰（先写回访问记录，按最新的访问时间淘汰）"""
+        self.flush_access()
+        expired = self.cache_repository.delete_expired(self.ttl_hours)
+        evicted = self.cache_repository.evict_to_size(self.max_entries)
+        if expired or evicted:
+            logger.info(f"LLM缓存清理完成: 过期{expired}条, 淘汰{evicted}条")
+
+    def invalidate_stale_prompts(self, prompt_texts: Iterable[str]):
+        """删除基础prompt已在配置中变更的缓存（启动和重新加载配置后调用）"""
+        if not self.enabled:
+            return
+
+        prompt_hashes = {hash_text(text) for text in prompt_texts}
+        deleted = self.cache_repository.delete_except_prompts(prompt_hashes)
+        for key in [key for key, entry in self._memory.items() if entry.prompt_hash not in prompt_hashes]:
+            del self._memory[key]
+            self._pending_access.pop(key, None)
+        if deleted:
+            logger.info(f"prompt配置已变更，删除失效LLM缓存 {deleted} 条")
+        self.evict()
+
+    def _remember(self, cache_key: str, prompt_hash: str, result: Dict[str, Any], created_at: datetime):
+        """写入内存LRU，与持久化缓存在同一时间过期"""
+        if self.memory_max_entries <= 0:
+            return
+        self._memory[cache_key] = MemoryEntry(result, prompt_hash, created_at + timedelta(hours=self.ttl_hours))
+        self._memory.move_to_end(cache_key)
+        while len(self._memory) > self.memory_max_entries:
+            self._memory.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        hits = self.stats["memory_hits"] + self.stats["persisted_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            "enabled": self.enabled,
+            **self.stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
@@ -1,58 +1,333 @@
+import asyncio
 import json
 import logging
-from typing import Any, Dict
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
 
 import httpx
 
 from app.core.config import config
+from app.core.http_client import create_async_client, get_connection_stats
+from app.core.incremental_json import IncrementalJSONObjectParser
+from app.core.prompt_router import PromptRoute
+from app.core.token_budget import estimate_tokens, truncate_to_token_budget
+from app.services.endpoint_router import EndpointRouter
+from app.services.llm_cache_service import LLMCacheService, hash_text
 
 logger = logging.getLogger(__name__)
 
+# Anthropic Messages API 版本
+ANTHROPIC_VERSION = "2023-06-01"
+
+# 支持在请求中标注 cache_control 的提供商（OpenAI 自动缓存前缀，无需标注）
+CACHE_CONTROL_PROVIDERS = ("openrouter", "anthropic")
+
+
+class ChatPrompt(NamedTuple):
+    """
+    拆分为两部分的prompt：system 为固定指令（基础prompt、输出格式和注意事项），
+    user 为文章内容。固定指令在前且不随文章变化，可被提供商的prompt缓存复用
+    """
+    system: str
+    user: str
+
+    @property
+    def text(self) -> str:
+        """完整prompt文本，用于缓存键和token估算"""
+        return f"{self.system}\n\n{self.user}"
+
+
+class PromptBuilder:
+    """按endpoint构建prompt的函数（不同endpoint的输入预算不同），可覆盖本次请求的输出token上限"""
+
+    def __init__(self, build: Callable[[Dict[str, Any]], ChatPrompt], max_tokens: Optional[int] = None):
+        self.build = build
+        self.max_tokens = max_tokens
+
+    def __call__(self, endpoint: Dict[str, Any]) -> ChatPrompt:
+        return self.build(endpoint)
+
+
+# 完整prompt，或按endpoint构建prompt的PromptBuilder
+PromptSource = Union[ChatPrompt, PromptBuilder]
+
+# feed URL，或已解析的prompt路由（队列处理时每个项目只解析一次）
+FeedSource = Union[str, PromptRoute]
+
+# 未匹配到任何prompt配置时使用的基础prompt
+DEFAULT_BASE_PROMPT = "请分析以下内容是否有价值。"
+
+
+class EndpointPool:
+    """一组启用的endpoint及其路由和长连接客户端，endpoint或路由配置变更时整体替换"""
+
+    def __init__(self, endpoints: List[Dict[str, Any]], routing_config: Dict[str, Any]):
+        # 用于判断重新加载的配置是否需要重建连接池
+        self.signature = (endpoints, routing_config)
+
+        # 过滤启用的endpoints
+        self.endpoints = [endpoint for endpoint in endpoints if endpoint.get("enabled", True)]
+
+        if not self.endpoints:
+            raise ValueError("没有启用的LLM endpoints")
+
+        # endpoint路由（EWMA加权 + 熔断）
+        self.router = EndpointRouter(self.endpoints, routing_config)
+
+        # 每个endpoint一个长连接客户端，复用TCP/TLS连接
+        self.clients: Dict[str, httpx.AsyncClient] = {
+            endpoint["name"]: create_async_client(
+                f"llm:{endpoint['name']}",
+                timeout=endpoint["timeout"],
+                max_connections=endpoint["max_connections"],
+                max_keepalive_connections=endpoint["max_keepalive_connections"],
+                keepalive_expiry=endpoint["keepalive_expiry"],
+                http2=endpoint["http2"],
+                proxy=endpoint["proxy"],
+            )
+            for endpoint in self.endpoints
+        }
+
+        # 正在使用的请求数；被替换后在最后一个使用者释放时关闭
+        self.users = 0
+        self.retired = False
+        self.closing = False
+        self._close_task: Optional[asyncio.Task] = None
+
+    def acquire(self):
+        """开始使用（一次LLM调用的全部重试、对冲请求和后台读取流式响应期间持有）"""
+        self.users += 1
+
+    def release(self):
+        """结束使用，已被替换且没有其他使用者时关闭"""
+        self.users -= 1
+        if self.retired and self.users == 0:
+            self._schedule_close()
+
+    def retire(self):
+        """被新配置的连接池替换：没有使用者时立即关闭，否则在最后一个使用者释放后关闭"""
+        self.retired = True
+        if self.users == 0:
+            self._schedule_close()
+
+    def _schedule_close(self):
+        if self.closing:
+            return
+        self.closing = True
+        try:
+            self._close_task = asyncio.get_running_loop().create_task(self.aclose())
+        except RuntimeError:
+            # 没有运行中的事件循环，服务关闭时统一关闭
+            self.closing = False
+
+    async def aclose(self):
+        """关闭所有endpoint的连接池"""
+        self.closing = True
+        clients, self.clients = self.clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+# 当前LLM调用持有的连接池（asyncio任务创建时复制上下文，对冲请求和后台读取沿用同一连接池）
+_active_pool: ContextVar[Optional[EndpointPool]] = ContextVar("llm_active_pool", default=None)
+
 
 class LLMService:
     def __init__(self):
         # 获取LLM配置
         llm_config = config.get_llm_config()
 
-        # 过滤启用的endpoints
-        self.endpoints = [
-            endpoint for endpoint in llm_config["endpoints"]
-            if endpoint.get("enabled", True)
-        ]
+        # endpoint连接池，随配置快照解析（进行中的任务沿用开始时快照对应的连接池）
+        self._pool = EndpointPool(llm_config["endpoints"], llm_config["routing"])
+        self._pool_version = config.snapshot.version
+        # 被替换但仍有请求在使用的连接池，服务关闭时统一关闭
+        self._retired_pools: List[EndpointPool] = []
 
-        if not self.endpoints:
-            raise ValueError("没有启用的LLM endpoints")
+        # LLM结果缓存
+        self.cache = LLMCacheService(llm_config["cache"])
+
+        # 批量判断统计
+        self.batch_stats = {"requests": 0, "items": 0, "fallback_items": 0}
+
+        # 对冲请求统计
+        self.hedge_stats = {
+            "requests": 0,
+            "hedges_sent": 0,
+            "hedge_wins": 0,
+            "primary_wins": 0,
+            "skipped_budget": 0,
+        }
 
-        # 轮询索引
-        self.current_index = 0
+        # 流式响应统计
+        self.stream_stats = {
+            "early_verdicts": 0,
+            "time_to_verdict_seconds_total": 0.0,
+            "background_completions": 0,
+            "background_failures": 0,
+        }
+        self._background_tasks: set = set()
+
+        # 两阶段判断的摘要请求统计
+        self.summary_stats = {"requests": 0, "failures": 0}
+
+        # 标题初筛统计
+        self.triage_stats = {"requests": 0, "yes": 0, "no": 0, "uncertain": 0, "failures": 0}
+
+        # API返回的token用量统计，含提供商prompt缓存命中/写入的输入token
+        self.usage_stats = {
+            "responses": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cached_tokens": 0,
+            "cache_write_tokens": 0,
+        }
+
+        # 按token预算截断内容的统计
+        self.truncation_stats = {
+            "articles": 0,
+            "truncated": 0,
+            "seconds_total": 0.0,
+            "seconds_max": 0.0,
+        }
 
         logger.info(f"LLM服务初始化完成，支持 {len(self.endpoints)} 个endpoints")
 
-    def _get_next_endpoint(self) -> Dict[str, Any]:
-        """获取下一个endpoint（轮询）"""
-        if not self.endpoints:
-            raise ValueError("没有可用的endpoints")
+    def _get_pool(self) -> EndpointPool:
+        """当前LLM调用持有的连接池，未持有时为当前配置快照对应的连接池"""
+        pool = _active_pool.get()
+        if pool is not None:
+            return pool
+        pool = config.snapshot.derive(("llm_endpoint_pool", id(self)), self._build_pool)
+        # 固定使用旧快照的任务开始新的调用时，旧连接池可能已被替换并关闭
+        return self._pool if pool.closing else pool
+
+    @contextmanager
+    def _use_pool(self) -> Iterator[EndpointPool]:
+        """在上下文内持有连接池，期间连接池被替换也不会关闭"""
+        pool = self._get_pool()
+        pool.acquire()
+        token = _active_pool.set(pool)
+        try:
+            yield pool
+        finally:
+            _active_pool.reset(token)
+            pool.release()
+
+    def _build_pool(self, snapshot) -> EndpointPool:
+        """按配置快照构建连接池；endpoint和路由配置未变时沿用现有连接池，保留连接和健康数据"""
+        llm_config = snapshot.app_config.get_llm_dict()
+        if (llm_config["endpoints"], llm_config["routing"]) == self._pool.signature:
+            return self._pool
+        if snapshot.version < self._pool_version:
+            # 比现有连接池更旧的快照（首次调用LLM时配置已更新），直接使用较新的连接池
+            return self._pool
+
+        try:
+            pool = EndpointPool(llm_config["endpoints"], llm_config["routing"])
+        except Exception as e:
+            logger.error(f"按新配置创建LLM连接池失败，继续使用原有endpoints: {e}")
+            return self._pool
+
+        retired, self._pool = self._pool, pool
+        self._pool_version = snapshot.version
+        # 被替换的连接池在最后一个使用它的请求结束后关闭，服务关闭时未关闭的统一关闭
+        self._retired_pools = [item for item in self._retired_pools if not item.closing]
+        self._retired_pools.append(retired)
+        retired.retire()
+        logger.info(f"LLM endpoints已按配置版本 {snapshot.version} 重建，共 {len(pool.endpoints)} 个")
+        return pool
+
+    @property
+    def endpoints(self) -> List[Dict[str, Any]]:
+        """启用的endpoints"""
+        return self._get_pool().endpoints
+
+    @property
+    def router(self) -> EndpointRouter:
+        """endpoint路由"""
+        return self._get_pool().router
+
+    @property
+    def clients(self) -> Dict[str, httpx.AsyncClient]:
+        """各endpoint的长连接客户端"""
+        return self._get_pool().clients
+
+    @property
+    def llm_config(self) -> Dict[str, Any]:
+        """当前配置快照的LLM配置"""
+        return config.snapshot.derive("llm_config", lambda snapshot: snapshot.app_config.get_llm_dict())
+
+    @property
+    def batch_config(self) -> Dict[str, Any]:
+        """批量判断配置"""
+        return self.llm_config["batch"]
+
+    @property
+    def hedging_config(self) -> Dict[str, Any]:
+        """对冲请求配置"""
+        return self.llm_config["hedging"]
+
+    @property
+    def streaming_config(self) -> Dict[str, Any]:
+        """流式响应配置"""
+        return self.llm_config["streaming"]
+
+    @property
+    def decision_config(self) -> Dict[str, Any]:
+        """两阶段判断配置：先只判断是否有用，摘要按需另行生成"""
+        return self.llm_config["decision"]
 
-        endpoint = self.endpoints[self.current_index]
-        self.current_index = (self.current_index + 1) % len(self.endpoints)
-        return endpoint
+    def _get_next_endpoint(self) -> Dict[str, Any]:
+        """获取下一个endpoint（按路由策略选择）"""
+        return self.router.select()
 
     async def filter_content(
-        self, title: str, content: str, source: str = "default"
+        self,
+        title: str,
+        content: str,
+        source: FeedSource = "default",
+        on_complete: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
     ) -> Dict[str, Any]:
-        """使用LLM过滤内容"""
+        """
+        使用LLM过滤内容
+
+        Args:
+            title: 文章标题
+            content: 文章内容
+            source: feed URL（用于匹配prompt配置），或已解析的prompt路由
+            on_complete: 流式模式下提前返回判断结果后，完整结果（含摘要）生成完毕时的回调
+        """
         try:
-            # 选择endpoint
+            # 构建prompt
+            base_prompt = self._resolve_base_prompt(source)
+            prompt = self._make_prompt_builder(title, content, base_prompt)
+
+            # 查询将处理本次请求的endpoint（模型和温度）的缓存
             endpoint = self._get_next_endpoint()
+            cached_result = self._get_cached(prompt, endpoint)
+            if cached_result is not None:
+                logger.info(
+                    f"LLM过滤命中缓存 - 标题: {title}, 结果: {cached_result.get('useful', False)}")
+                return cached_result
 
-            # 构建prompt
-            prompt = self._build_prompt(title, content, source)
+            if self.streaming_config["enabled"]:
+                return await self._filter_streaming(title, prompt, base_prompt, endpoint, on_complete)
 
             # 调用LLM API
-            response = await self._call_llm_api(prompt, endpoint)
+            response, endpoint = await self._call_llm_api(prompt, endpoint, validator=self._extract_result)
 
             # 解析响应
-            result = self._parse_response(response)
+            try:
+                result = self._extract_result(response)
+            except Exception as e:
+                logger.error(f"解析LLM响应失败: {e}, 原始响应: {response}")
+                return self._parse_failure(e)
+
+            # 两阶段判断模式下响应不含标题
+            result["title"] = result["title"] or title
+            self._cache_result(prompt, base_prompt, endpoint, result)
 
             logger.info(
                 f"LLM过滤完成 - endpoint: {endpoint['name']}, 标题: {title}, 结果: {result.get('useful', False)}"
@@ -68,104 +343,849 @@ class LLMService:
                 "title": title,
             }
 
-    def _build_prompt(self, title: str, content: str, source: str) -> str:
-        """构建prompt"""
-        # 获取对应的prompt内容
-        prompts = config.get_prompts()
-        base_prompt = None
+    async def _filter_streaming(
+        self,
+        title: str,
+        prompt: PromptSource,
+        base_prompt: str,
+        endpoint: Dict[str, Any],
+        on_complete: Optional[Callable[[Dict[str, Any]], Awaitable[None]]],
+    ) -> Dict[str, Any]:
+        """流式调用LLM，useful字段确定后立即返回，摘要在后台补全或直接跳过"""
+        (early_fields, completion), endpoint = await self._call_llm_api(
+            prompt, endpoint, attempt=self._attempt_streaming)
 
-        # 在prompt配置中查找匹配的feed URL
-        for url_patterns, prompt_config in prompts.items():
-            if any(pattern in source for pattern in url_patterns):
-                base_prompt = prompt_config["prompt"]
-                break
-
-        if not base_prompt:
-            logger.warning(f"未找到来源 {source} 的prompt配置，使用默认prompt")
-            # 使用第一个可用的prompt作为默认
-            if prompts:
-                base_prompt = list(prompts.values())[0]["prompt"]
+        if early_fields is None:
+            # 响应结束前未能提前提取判断结果，按完整响应解析
+            response = completion.result()
+            try:
+                result = self._extract_result(response)
+            except Exception as e:
+                logger.error(f"解析LLM响应失败: {e}, 原始响应: {response}")
+                return self._parse_failure(e)
+            result["title"] = result["title"] or title
+            self._cache_result(prompt, base_prompt, endpoint, result)
+            return result
+
+        result = {"title": title, "summary": "", **early_fields}
+        self.stream_stats["early_verdicts"] += 1
+
+        if self.streaming_config["summary_mode"] == "skip":
+            completion.cancel()
+            # 有用的结果没有摘要，不写入缓存，以免切换摘要方式后缓存命中仍得到空摘要
+            if not result["useful"]:
+                self._cache_result(prompt, base_prompt, endpoint, result)
+        else:
+            task = asyncio.create_task(self._complete_stream_in_background(
+                completion, title, prompt, base_prompt, endpoint, on_complete))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+
+        logger.info(
+            f"LLM流式判断完成 - endpoint: {endpoint['name']}, 标题: {title}, 结果: {result['useful']}")
+        return result
+
+    async def _complete_stream_in_background(
+        self,
+        completion: "asyncio.Task[str]",
+        title: str,
+        prompt: PromptSource,
+        base_prompt: str,
+        endpoint: Dict[str, Any],
+        on_complete: Optional[Callable[[Dict[str, Any]], Awaitable[None]]],
+    ):
+        """等待流式响应结束，解析完整结果、写入缓存并回调"""
+        try:
+            response = await completion
+            result = self._extract_result(response)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stream_stats["background_failures"] += 1
+            logger.warning(f"后台补全LLM结果失败: {title}, 错误: {e}")
+            return
+
+        self.stream_stats["background_completions"] += 1
+        self._cache_result(prompt, base_prompt, endpoint, result)
+        if on_complete is not None:
+            try:
+                await on_complete(result)
+            except Exception as e:
+                logger.error(f"LLM结果补全回调失败: {title}, 错误: {e}")
+
+    def _cache_result(
+        self, prompt: PromptSource, base_prompt: str, endpoint: Dict[str, Any], result: Dict[str, Any]
+    ):
+        """把解析成功的结果写入缓存"""
+        self.cache.put(
+            self._get_cache_key(prompt, endpoint),
+            hash_text(base_prompt),
+            endpoint["model"],
+            endpoint["temperature"],
+            result,
+        )
+
+    async def summarize(self, title: str, content: str) -> str:
+        """
+        为文章生成摘要（两阶段判断模式下的第二阶段）
+
+        Returns:
+            1-2句话的摘要，失败时返回空字符串
+        """
+        self.summary_stats["requests"] += 1
+        try:
+            # 以摘要模板作为缓存的基础prompt，模板变更时旧缓存随之失效
+            summary_template = self._build_summary_prompt("", "").system
+            prompt = self._make_prompt_builder(title, content, "", self._build_summary_prompt)
+            endpoint = self._get_next_endpoint()
+            cached_result = self._get_cached(prompt, endpoint)
+            if cached_result is not None:
+                return cached_result.get("summary", "")
+
+            response, endpoint = await self._call_llm_api(prompt, endpoint)
+            summary = response.strip()
+            if not summary:
+                raise ValueError("摘要为空")
+            self._cache_result(prompt, summary_template, endpoint, {"summary": summary})
+            logger.info(f"LLM摘要生成完成 - endpoint: {endpoint['name']}, 标题: {title}")
+            return summary
+        except Exception as e:
+            self.summary_stats["failures"] += 1
+            logger.error(f"LLM摘要生成失败: {title}, 错误: {e}")
+            return ""
+
+    async def triage(
+        self, title: str, description: str, source: FeedSource = "default"
+    ) -> Optional[Dict[str, Any]]:
+        """
+        只根据标题和简介初筛
+
+        Returns:
+            能明确判断时返回 {"useful": bool, "reason": 原因}，不确定或调用失败时返回 None
+        """
+        self.triage_stats["requests"] += 1
+        try:
+            base_prompt = self._resolve_base_prompt(source)
+            prompt = self._make_prompt_builder(
+                title, description, base_prompt, self._build_triage_prompt,
+                max_tokens=self.decision_config["max_tokens"])
+
+            endpoint = self._get_next_endpoint()
+            result = self._get_cached(prompt, endpoint)
+            if result is None:
+                response, endpoint = await self._call_llm_api(
+                    prompt, endpoint, validator=self._extract_triage_result)
+                result = self._extract_triage_result(response)
+                self._cache_result(prompt, base_prompt, endpoint, result)
+        except Exception as e:
+            self.triage_stats["failures"] += 1
+            logger.warning(f"标题初筛失败，将按全文判断: {title}, 错误: {e}")
+            return None
+
+        verdict = result["verdict"]
+        self.triage_stats[verdict] += 1
+        logger.info(f"标题初筛完成 - 标题: {title}, 结果: {verdict}")
+        if verdict == "uncertain":
+            return None
+        return {"useful": verdict == "yes", "reason": result.get("reason", "")}
+
+    async def filter_batch(
+        self, items: List[Dict[str, str]], source: FeedSource = "default"
+    ) -> List[Dict[str, Any]]:
+        """
+        使用一次LLM请求批量过滤多篇同一prompt配置的文章
+
+        Args:
+            items: 文章列表，每项包含 title 和 content
+            source: feed URL（用于匹配prompt配置），或已解析的prompt路由
+
+        Returns:
+            与 items 一一对应的过滤结果；批量响应缺失或格式错误的文章会逐篇回退调用
+        """
+        base_prompt = self._resolve_base_prompt(source)
+        results: List[Any] = [None] * len(items)
+
+        # 批量请求可能发往任一endpoint，每篇文章按最小的单篇预算截断
+        min_budget = min(self._get_input_budget(endpoint) for endpoint in self.endpoints)
+        batch_items = []
+        for item in items:
+            overhead = self._estimate_tokens(self._build_prompt(item["title"], "", base_prompt).text)
+            batch_items.append({
+                "title": item["title"],
+                "content": self._truncate_content(item["content"], min_budget - overhead),
+            })
+
+        # 先查缓存，缓存键与逐篇调用一致；本次的所有批量请求都先发往同一个endpoint
+        endpoint = self._get_next_endpoint()
+        pending = []
+        for index, item in enumerate(items):
+            prompt = self._make_prompt_builder(item["title"], item["content"], base_prompt)
+            cached_result = self.cache.get(self._get_cache_key(prompt, endpoint))
+            if cached_result is not None:
+                results[index] = cached_result
             else:
-                base_prompt = "请分析以下内容是否有价值。"
+                pending.append((index, prompt))
+
+        batched_indices = set()
+        for chunk in self._split_batches(pending, batch_items, base_prompt):
+            # 单篇文章直接走普通请求
+            if len(chunk) == 1:
+                continue
+            batched_indices.update(index for index, _ in chunk)
+            chunk_items = [batch_items[index] for index, _ in chunk]
+            batch_results, served_by = await self._call_batch(chunk_items, base_prompt, endpoint)
+            for position, (index, prompt) in enumerate(chunk):
+                result = batch_results[position]
+                if result is None:
+                    continue
+                result["title"] = result["title"] or items[index]["title"]
+                results[index] = result
+                self._cache_result(prompt, base_prompt, served_by, result)
+        if not batched_indices:
+            self.router.release(endpoint)
+
+        # 批量结果缺失的文章逐篇回退
+        for index, result in enumerate(results):
+            if result is None:
+                if index in batched_indices:
+                    self.batch_stats["fallback_items"] += 1
+                results[index] = await self.filter_content(
+                    items[index]["title"], items[index]["content"], source)
+
+        return results
+
+    def _split_batches(
+        self,
+        pending: List[tuple],
+        items: List[Dict[str, str]],
+        base_prompt: str,
+    ) -> List[List[tuple]]:
+        """按输出token上限和上下文窗口把待处理文章切分为多个批次（以最小的endpoint为准）"""
+        endpoint = {
+            "max_tokens": min(ep["max_tokens"] for ep in self.endpoints),
+            "context_window": min(ep["context_window"] for ep in self.endpoints),
+        }
+        output_tokens_per_item = self.batch_config["output_tokens_per_item"]
+        if self.decision_config["enabled"]:
+            output_tokens_per_item = min(output_tokens_per_item, self.decision_config["max_tokens"])
+        max_items = min(
+            self.batch_config["max_items"],
+            max(1, endpoint["max_tokens"] // output_tokens_per_item),
+        )
+        input_budget = (
+            endpoint["context_window"]
+            - endpoint["max_tokens"]
+            - self._estimate_tokens(self._build_batch_prompt([], base_prompt).text)
+        )
+
+        batches: List[List[tuple]] = []
+        current: List[tuple] = []
+        used_tokens = 0
+        for entry in pending:
+            item = items[entry[0]]
+            item_tokens = self._estimate_tokens(item["title"]) + self._estimate_tokens(item["content"]) + 20
+            if current and (len(current) >= max_items or used_tokens + item_tokens > input_budget):
+                batches.append(current)
+                current, used_tokens = [], 0
+            current.append(entry)
+            used_tokens += item_tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _call_batch(
+        self, items: List[Dict[str, str]], base_prompt: str, endpoint: Dict[str, Any]
+    ) -> Tuple[List[Any], Optional[Dict[str, Any]]]:
+        """执行一次批量请求（首先发往 endpoint），返回与 items 对应的结果（失败的位置为 None）和实际使用的endpoint"""
+        self.batch_stats["requests"] += 1
+        self.batch_stats["items"] += len(items)
+        try:
+            prompt = self._build_batch_prompt(items, base_prompt)
+            response, endpoint = await self._call_llm_api(
+                prompt, endpoint,
+                validator=lambda text: self._extract_batch_results(text, len(items)))
+            results = self._extract_batch_results(response, len(items))
+            logger.info(
+                f"LLM批量过滤完成 - endpoint: {endpoint['name']}, 文章数: {len(items)}, "
+                f"有效结果: {sum(1 for result in results if result is not None)}")
+            return results, endpoint
+        except Exception as e:
+            logger.error(f"LLM批量过滤失败，将逐篇回退: {e}")
+            return [None] * len(items), None
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """粗略估算token数：CJK字符按1个token，其余按4个字符1个token"""
+        return estimate_tokens(text)
+
+    @staticmethod
+    def _get_input_budget(endpoint: Dict[str, Any], max_tokens: Optional[int] = None) -> int:
+        """endpoint单篇请求的输入token预算（max_tokens 为本次请求的输出token上限）"""
+        budget = endpoint["context_window"] - (max_tokens or endpoint["max_tokens"])
+        if endpoint["max_input_tokens"]:
+            budget = min(budget, endpoint["max_input_tokens"])
+        return budget
+
+    def _truncate_content(self, content: str, budget: int) -> str:
+        """按token预算截断文章内容，并记录耗时"""
+        started = time.perf_counter()
+        truncated_content, truncated = truncate_to_token_budget(content, budget)
+        elapsed = time.perf_counter() - started
+
+        self.truncation_stats["articles"] += 1
+        self.truncation_stats["seconds_total"] += elapsed
+        self.truncation_stats["seconds_max"] = max(self.truncation_stats["seconds_max"], elapsed)
+        if truncated:
+            self.truncation_stats["truncated"] += 1
+            logger.info(
+                f"内容按token预算截断: 预算{budget} tokens, 原始长度{len(content)}字符 -> "
+                f"{len(truncated_content)}字符, 耗时{elapsed * 1000:.3f}ms")
+        return truncated_content
+
+    def _make_prompt_builder(
+        self,
+        title: str,
+        content: str,
+        base_prompt: str,
+        template: Optional[Callable[[str, str, str], ChatPrompt]] = None,
+        max_tokens: Optional[int] = None,
+    ) -> PromptBuilder:
+        """
+        返回按endpoint输入预算截断内容并构建prompt的PromptBuilder，
+        相同预算的endpoint共用同一个prompt
+
+        Args:
+            template: prompt模板函数 (title, content, base_prompt) -> ChatPrompt，默认为判断prompt
+            max_tokens: 本次请求的输出token上限，默认为endpoint配置
+        """
+        if template is None:
+            template = self._build_prompt
+            if self.decision_config["enabled"]:
+                max_tokens = self.decision_config["max_tokens"]
+
+        overhead = self._estimate_tokens(template(title, "", base_prompt).text)
+        prompts: Dict[int, ChatPrompt] = {}
+
+        def build(endpoint: Dict[str, Any]) -> ChatPrompt:
+            budget = self._get_input_budget(endpoint, max_tokens) - overhead
+            if budget not in prompts:
+                prompts[budget] = template(
+                    title, self._truncate_content(content, budget), base_prompt)
+            return prompts[budget]
+
+        return PromptBuilder(build, max_tokens)
 
-        # 构建完整prompt
-        full_prompt = f"""{base_prompt}
+    @staticmethod
+    def _resolve_prompt(prompt: PromptSource, endpoint: Dict[str, Any]) -> ChatPrompt:
+        """获取发往endpoint的prompt"""
+        return prompt(endpoint) if isinstance(prompt, PromptBuilder) else prompt
 
-请分析以下内容：
-标题：{title}
-内容：{content}
+    def _get_cache_key(self, prompt: PromptSource, endpoint: Dict[str, Any]) -> str:
+        """生成发往endpoint的prompt在该endpoint模型和温度下的缓存键"""
+        return self.cache.make_key(
+            self._resolve_prompt(prompt, endpoint).text, endpoint["model"], endpoint["temperature"])
 
-请严格按照以下JSON格式返回结果：
+    def _get_cached(self, prompt: PromptSource, endpoint: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """查询将处理本次请求的endpoint的缓存结果，命中时释放选择endpoint时占用的半开探测名额"""
+        cached_result = self.cache.get(self._get_cache_key(prompt, endpoint))
+        if cached_result is not None:
+            self.router.release(endpoint)
+        return cached_result
+
+    def _resolve_base_prompt(self, source: FeedSource) -> str:
+        """查找来源对应的基础prompt"""
+        if isinstance(source, PromptRoute):
+            return source.prompt
+
+        # 在prompt配置中查找匹配的feed URL
+        route = config.resolve_prompt(source)
+        if route is not None:
+            return route.prompt
+
+        logger.warning(f"未找到来源 {source} 的prompt配置，使用默认prompt")
+        prompts = config.get_prompts()
+        # 使用第一个可用的prompt作为默认
+        if prompts:
+            return list(prompts.values())[0]["prompt"]
+        return DEFAULT_BASE_PROMPT
+
+    def prune_cache(self):
+        """清理基础prompt已变更的缓存（需在数据库表创建后调用，重新加载配置后再次调用）"""
+        prompt_texts = [item["prompt"] for item in config.get_prompts().values()]
+        self.cache.invalidate_stale_prompts(
+            prompt_texts + [DEFAULT_BASE_PROMPT, self._build_summary_prompt("", "").system])
+
+    def _build_prompt(self, title: str, content: str, base_prompt: str) -> ChatPrompt:
+        """构建prompt：固定指令在前作为system，文章内容在后"""
+        if self.decision_config["enabled"]:
+            return self._build_decision_prompt(title, content, base_prompt)
+
+        system = f"""{base_prompt}
+
+请分析用户提供的内容，并严格按照以下JSON格式返回结果：
 {{
-  "title": "文章标题",
-  "summary": "文章核心内容摘要（1-2句话）",
   "useful": true,  // true=保留，false=过滤掉
-  "reason": "保留/过滤的具体原因"
+  "reason": "保留/过滤的具体原因",
+  "title": "文章标题",
+  "summary": "文章核心内容摘要（1-2句话）"
 }}
 
 注意：
-- 必须返回有效的JSON格式
+- 必须返回有效的JSON格式，并按上述字段顺序输出
 - useful字段必须是布尔值（true或false）
 - summary字段应该是1-2句话的简洁摘要
 - reason字段应该说明判断的具体原因
 - 不要包含任何其他文本，只返回JSON"""
 
-        return full_prompt
+        return ChatPrompt(system, self._format_article(title, content))
 
-    async def _call_llm_api(self, prompt: str, endpoint: Dict[str, Any]) -> str:
-        """调用LLM API"""
-        headers = self._get_headers(endpoint)
-        data = self._get_request_data(prompt, endpoint)
+    def _build_decision_prompt(self, title: str, content: str, base_prompt: str) -> ChatPrompt:
+        """构建只返回判断结果的精简prompt"""
+        system = f"""{base_prompt}
 
-        for attempt in range(endpoint["max_retries"] + 1):
-            try:
-                async with httpx.AsyncClient(timeout=endpoint["timeout"]) as client:
-                    response = await client.post(
-                        f"{endpoint['base_url']}/chat/completions",
-                        headers=headers,
-                        json=data
-                    )
+请分析用户提供的内容，并严格按照以下JSON格式返回判断结果：
+{{"useful": true, "reason": "简短原因"}}
 
-                    if response.status_code != 200:
-                        error_msg = f"LLM API调用失败: {response.status_code} - {response.text}"
-                        if attempt < endpoint["max_retries"]:
-                            logger.warning(
-                                f"第{attempt + 1}次尝试失败，将重试: {error_msg}")
+注意：
+- useful字段必须是布尔值（true=保留，false=过滤掉）
+- reason字段为不超过15个字的简短原因
+- 不要返回摘要或任何其他文本，只返回JSON"""
+
+        return ChatPrompt(system, self._format_article(title, content))
+
+    def _build_triage_prompt(self, title: str, description: str, base_prompt: str) -> ChatPrompt:
+        """构建只根据标题和简介初筛的prompt"""
+        system = f"""{base_prompt}
+
+请仅根据用户提供的标题和简介初步判断文章是否值得保留，并严格按照以下JSON格式返回结果：
+{{"verdict": "yes", "reason": "简短原因"}}
+
+注意：
+- verdict只能是 "yes"（确定保留）、"no"（确定过滤）或 "uncertain"（需要阅读全文才能判断）
+- 只有非常确定时才返回 "yes" 或 "no"
+- reason字段为不超过15个字的简短原因
+- 不要包含任何其他文本，只返回JSON"""
+
+        return ChatPrompt(system, f"标题：{title}\n简介：{description}")
+
+    def _build_summary_prompt(self, title: str, content: str, base_prompt: str = "") -> ChatPrompt:
+        """构建摘要prompt"""
+        system = "请用1-2句话概括用户提供的文章的核心内容。只返回摘要文本，不要包含任何其他内容。"
+        return ChatPrompt(system, self._format_article(title, content))
+
+    def _build_batch_prompt(self, items: List[Dict[str, str]], base_prompt: str) -> ChatPrompt:
+        """构建批量判断prompt"""
+        articles = "\n\n".join(
+            f"[文章{index}]\n标题：{item['title']}\n内容：{item['content']}"
+            for index, item in enumerate(items, start=1)
+        )
+        user = f"请逐篇分析以下{len(items)}篇文章：\n\n{articles}"
+
+        if self.decision_config["enabled"]:
+            system = f"""{base_prompt}
+
+用户会提供多篇以[文章N]编号的文章，请逐篇分析，并严格按照以下JSON数组格式返回判断结果，每篇文章对应一个对象：
+[{{"id": 1, "useful": true, "reason": "简短原因"}}]
+
+注意：
+- 必须返回有效的JSON数组，每篇文章恰好一个对象
+- id字段必须与[文章N]中的N一致
+- useful字段必须是布尔值（true=保留，false=过滤掉）
+- reason字段为不超过15个字的简短原因
+- 不要返回摘要或任何其他文本，只返回JSON数组"""
+            return ChatPrompt(system, user)
+
+        system = f"""{base_prompt}
+
+用户会提供多篇以[文章N]编号的文章，请逐篇分析，并严格按照以下JSON数组格式返回结果，每篇文章对应一个对象：
+[
+  {{
+    "id": 1,  // 文章编号，与[文章N]中的N一致
+    "title": "文章标题",
+    "summary": "文章核心内容摘要（1-2句话）",
+    "useful": true,  // true=保留，false=过滤掉
+    "reason": "保留/过滤的具体原因"
+  }}
+]
+
+注意：
+- 必须返回有效的JSON数组，每篇文章恰好一个对象
+- id字段必须与文章编号一致
+- useful字段必须是布尔值（true或false）
+- summary字段应该是1-2句话的简洁摘要
+- reason字段应该说明判断的具体原因
+- 不要包含任何其他文本，只返回JSON数组"""
+
+        return ChatPrompt(system, user)
+
+    @staticmethod
+    def _format_article(title: str, content: str) -> str:
+        """文章部分的prompt文本"""
+        return f"标题：{title}\n内容：{content}"
+
+    async def _call_llm_api(
+        self,
+        prompt: PromptSource,
+        endpoint: Dict[str, Any],
+        validator: Optional[Callable[[str], Any]] = None,
+        attempt: Optional[Callable[..., Awaitable[Tuple[Any, Dict[str, Any]]]]] = None,
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """
+        调用LLM API，失败时按路由策略切换到其他endpoint重试
+
+        Args:
+            prompt: 完整prompt，或按endpoint构建prompt的函数
+            endpoint: 首次尝试的endpoint
+            validator: 响应校验函数（抛出异常表示无效），用于对冲请求时判断哪个响应有效
+            attempt: 单次尝试的实现，默认为（可对冲的）普通请求
+
+        Returns:
+            (响应文本, 实际成功的endpoint)
+        """
+        attempt = attempt or self._attempt_hedged
+        max_attempts = endpoint["max_retries"] + 1
+        tried: List[str] = []
+
+        # 所有重试和对冲请求使用同一个连接池，期间连接池被替换也不会关闭
+        with self._use_pool():
+            for attempt_index in range(max_attempts):
+                if attempt_index > 0:
+                    endpoint = self.router.select(exclude=tried)
+                tried.append(endpoint["name"])
+
+                try:
+                    return await attempt(prompt, endpoint, validator)
+                except Exception as e:
+                    if attempt_index < max_attempts - 1:
+                        logger.warning(
+                            f"第{attempt_index + 1}次尝试失败（endpoint: {endpoint['name']}），将重试: {e}")
+                        continue
+                    raise
+
+    async def _attempt(self, prompt: PromptSource, endpoint: Dict[str, Any]) -> str:
+        """向endpoint发送一次请求，并把结果记录到路由健康数据"""
+        started = time.perf_counter()
+        try:
+            content = await self._send_request(prompt, endpoint)
+        except asyncio.CancelledError:
+            # 请求被取消（如对冲请求落败）时不计为失败
+            self.router.record_cancelled(endpoint, time.perf_counter() - started)
+            raise
+        except Exception as e:
+            self.router.record_failure(endpoint, time.perf_counter() - started, str(e))
+            raise
+
+        self.router.record_success(endpoint, time.perf_counter() - started)
+        return content
+
+    async def _attempt_hedged(
+        self,
+        prompt: PromptSource,
+        endpoint: Dict[str, Any],
+        validator: Optional[Callable[[str], Any]],
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        发送请求；主endpoint超过其延迟分位数仍未响应时，向另一个endpoint发送相同请求，
+        先返回有效响应的一方胜出，另一方被取消
+        """
+        hedge_delay = self._get_hedge_delay(endpoint)
+        if hedge_delay is None:
+            return await self._attempt(prompt, endpoint), endpoint
+
+        self.hedge_stats["requests"] += 1
+        primary = asyncio.create_task(self._attempt(prompt, endpoint))
+        owners = {primary: endpoint}
+        fallback: Optional[Tuple[str, Dict[str, Any]]] = None
+        error: Optional[BaseException] = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+            if done:
+                return primary.result(), endpoint
+
+            backup_endpoint = self._select_hedge_endpoint(endpoint)
+            if backup_endpoint is None:
+                return await primary, endpoint
+
+            self.hedge_stats["hedges_sent"] += 1
+            logger.info(
+                f"endpoint {endpoint['name']} 超过 {hedge_delay:.2f} 秒未响应，"
+                f"发送对冲请求到 {backup_endpoint['name']}")
+            backup = asyncio.create_task(self._attempt(prompt, backup_endpoint))
+            owners[backup] = backup_endpoint
+
+            pending = set(owners)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    content = task.result()
+                    if validator is not None:
+                        try:
+                            validator(content)
+                        except Exception:
+                            fallback = fallback or (content, owners[task])
                             continue
-                        else:
-                            raise Exception(error_msg)
+                    self.hedge_stats["hedge_wins" if task is backup else "primary_wins"] += 1
+                    return content, owners[task]
+        finally:
+            # 返回、失败或调用方被取消（如处理超时、服务关闭）时，取消并等待未完成的请求
+            unfinished = [task for task in owners if not task.done()]
+            for task in unfinished:
+                task.cancel()
+            if unfinished:
+                await asyncio.gather(*unfinished, return_exceptions=True)
+
+        # 两个响应都无效时，返回先到的响应交由后续解析处理
+        if fallback is not None:
+            return fallback
+        raise error
+
+    def _get_hedge_delay(self, endpoint: Dict[str, Any]) -> Optional[float]:
+        """计算发送对冲请求前的等待时间，不需要对冲时返回 None"""
+        if not self.hedging_config["enabled"] or len(self.endpoints) < 2:
+            return None
 
-                    result = response.json()
-                    logger.debug(f"LLM API响应: {result}")
+        latency = self.router.latency_percentile(
+            endpoint, self.hedging_config["percentile"], self.hedging_config["min_samples"])
+        if latency is None:
+            return None
+        return max(latency, self.hedging_config["min_delay_seconds"])
+
+    def _select_hedge_endpoint(self, primary: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """在预算允许时选择对冲用的endpoint"""
+        # 预算 = 请求数 × 比例上限，额外允许1次以便冷启动阶段也能对冲
+        budget = self.hedging_config["max_ratio"] * self.hedge_stats["requests"] + 1
+        if self.hedge_stats["hedges_sent"] + 1 > budget:
+            self.hedge_stats["skipped_budget"] += 1
+            return None
+
+        try:
+            backup = self.router.select(exclude=[primary["name"]])
+        except Exception:
+            return None
+        if backup["name"] == primary["name"]:
+            return None
+        return backup
+
+    async def _attempt_streaming(
+        self,
+        prompt: PromptSource,
+        endpoint: Dict[str, Any],
+        validator: Optional[Callable[[str], Any]] = None,
+    ) -> Tuple[Tuple[Optional[Dict[str, Any]], "asyncio.Task[str]"], Dict[str, Any]]:
+        """
+        以流式方式发送一次请求，判断结果字段确定后立即返回
+
+        Returns:
+            ((提前解析出的字段或 None, 读取完整响应的任务), endpoint)
+        """
+        # 判断原因紧跟在useful之后且很短，一并等待，记录中不会出现空的原因
+        required_fields = ("useful", "reason")
+
+        parser = IncrementalJSONObjectParser()
+        verdict_ready: asyncio.Future = asyncio.get_running_loop().create_future()
+        started = time.perf_counter()
+        completion = asyncio.create_task(
+            self._read_stream(prompt, endpoint, parser, verdict_ready, required_fields))
+
+        try:
+            await asyncio.wait({completion, verdict_ready}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            completion.cancel()
+            self.router.record_cancelled(endpoint, time.perf_counter() - started)
+            raise
 
-                    # 检查响应格式
-                    if "choices" not in result:
-                        logger.error(f"API响应中缺少choices字段: {result}")
-                        raise Exception(f"API响应格式错误，缺少choices字段: {result}")
+        elapsed = time.perf_counter() - started
+        if verdict_ready.done():
+            self.router.record_success(endpoint, elapsed)
+            self.stream_stats["time_to_verdict_seconds_total"] += elapsed
+            return (verdict_ready.result(), completion), endpoint
 
-                    if not result["choices"]:
-                        logger.error(f"API响应中choices为空: {result}")
-                        raise Exception(f"API响应中choices为空: {result}")
+        verdict_ready.cancel()
+        if completion.exception() is not None:
+            error = completion.exception()
+            self.router.record_failure(endpoint, elapsed, str(error))
+            raise error
 
-                    if "message" not in result["choices"][0]:
-                        logger.error(f"API响应中缺少message字段: {result}")
-                        raise Exception(f"API响应中缺少message字段: {result}")
+        self.router.record_success(endpoint, elapsed)
+        return (None, completion), endpoint
 
-                    return result["choices"][0]["message"]["content"]
+    async def _read_stream(
+        self,
+        prompt: PromptSource,
+        endpoint: Dict[str, Any],
+        parser: IncrementalJSONObjectParser,
+        verdict_ready: asyncio.Future,
+        required_fields: Tuple[str, ...],
+    ) -> str:
+        """读取SSE流，逐块增量解析，所需字段就绪时设置 verdict_ready，返回完整文本"""
+        # 提前返回判断结果后仍在后台读取，单独持有连接池
+        with self._use_pool():
+            headers = self._get_headers(endpoint)
+            data = {**self._get_request_data(prompt, endpoint), "stream": True}
+            if endpoint["provider"] in ("openai", "openrouter"):
+                # 流式响应默认不含用量，需显式要求在最后一个事件中返回
+                data["stream_options"] = {"include_usage": True}
+            client = self.clients[endpoint["name"]]
 
+            try:
+                async with client.stream(
+                    "POST",
+                    self._get_request_url(endpoint),
+                    headers=headers,
+                    json=data
+                ) as response:
+                    if response.status_code != 200:
+                        body = (await response.aread()).decode("utf-8", errors="replace")
+                        raise Exception(f"LLM API调用失败: {response.status_code} - {body}")
+
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        payload = line[len("data:"):].strip()
+                        if payload == "[DONE]":
+                            break
+
+                        delta = self._extract_stream_delta(json.loads(payload), endpoint)
+                        if not delta:
+                            continue
+
+                        parser.feed(delta)
+                        if not verdict_ready.done() and self._early_verdict_ready(parser, required_fields):
+                            verdict_ready.set_result(
+                                {field: parser.fields[field] for field in required_fields})
             except httpx.TimeoutException:
-                if attempt < endpoint["max_retries"]:
-                    logger.warning(f"第{attempt + 1}次尝试超时，将重试")
-                    continue
-                else:
-                    raise Exception(
-                        f"LLM API调用超时，已重试{endpoint['max_retries']}次")
-            except Exception as e:
-                if attempt < endpoint["max_retries"]:
-                    logger.warning(f"第{attempt + 1}次尝试失败，将重试: {e}")
-                    continue
-                else:
-                    raise e
+                raise Exception(f"LLM API调用超时（{endpoint['timeout']}秒）")
+
+            return parser.text
+
+    def _extract_stream_delta(self, chunk: Dict[str, Any], endpoint: Dict[str, Any]) -> str:
+        """从一个SSE事件中取出新增的文本，并记录事件中附带的token用量"""
+        if endpoint["provider"] == "anthropic":
+            # Anthropic 的用量分别在 message_start（输入）和 message_delta（输出）事件中给出
+            if chunk.get("type") == "message_start":
+                self._record_usage((chunk.get("message") or {}).get("usage"), endpoint)
+            elif chunk.get("type") == "message_delta":
+                self._record_usage(chunk.get("usage"), endpoint, count_response=False)
+            elif chunk.get("type") == "content_block_delta":
+                delta = chunk.get("delta") or {}
+                if delta.get("type") == "text_delta":
+                    return delta.get("text") or ""
+            elif chunk.get("type") == "error":
+                raise Exception(f"LLM API流式响应出错: {chunk.get('error')}")
+            return ""
+
+        if chunk.get("usage"):
+            self._record_usage(chunk["usage"], endpoint)
+        choices = chunk.get("choices") or []
+        if not choices:
+            return ""
+        return (choices[0].get("delta") or {}).get("content") or ""
+
+    @staticmethod
+    def _early_verdict_ready(
+        parser: IncrementalJSONObjectParser, required_fields: Tuple[str, ...]
+    ) -> bool:
+        """所需字段都已解析且useful为布尔值"""
+        if any(field not in parser.fields for field in required_fields):
+            return False
+        return isinstance(parser.fields["useful"], bool)
+
+    async def _send_request(self, prompt: PromptSource, endpoint: Dict[str, Any]) -> str:
+        """向指定endpoint发送一次请求"""
+        headers = self._get_headers(endpoint)
+        data = self._get_request_data(prompt, endpoint)
+        client = self.clients[endpoint["name"]]
+
+        try:
+            response = await client.post(
+                self._get_request_url(endpoint),
+                headers=headers,
+                json=data
+            )
+        except httpx.TimeoutException:
+            raise Exception(f"LLM API调用超时（{endpoint['timeout']}秒）")
+
+        if response.status_code != 200:
+            raise Exception(f"LLM API调用失败: {response.status_code} - {response.text}")
+
+        result = response.json()
+        logger.debug(f"LLM API响应: {result}")
+
+        if endpoint["provider"] == "anthropic":
+            return self._extract_anthropic_content(result, endpoint)
+
+        # 检查响应格式
+        if "choices" not in result:
+            logger.error(f"API响应中缺少choices字段: {result}")
+            raise Exception(f"API响应格式错误，缺少choices字段: {result}")
+
+        if not result["choices"]:
+            logger.error(f"API响应中choices为空: {result}")
+            raise Exception(f"API响应中choices为空: {result}")
+
+        if "message" not in result["choices"][0]:
+            logger.error(f"API响应中缺少message字段: {result}")
+            raise Exception(f"API响应中缺少message字段: {result}")
+
+        self._record_usage(result.get("usage"), endpoint)
+
+        return result["choices"][0]["message"]["content"]
+
+    def _extract_anthropic_content(self, result: Dict[str, Any], endpoint: Dict[str, Any]) -> str:
+        """从Anthropic Messages API响应中取出文本"""
+        blocks = result.get("content")
+        if not isinstance(blocks, list):
+            logger.error(f"API响应中缺少content字段: {result}")
+            raise Exception(f"API响应格式错误，缺少content字段: {result}")
+
+        text = "".join(block.get("text", "") for block in blocks if block.get("type") == "text")
+        if not text:
+            logger.error(f"API响应中没有文本内容: {result}")
+            raise Exception(f"API响应中没有文本内容: {result}")
+
+        self._record_usage(result.get("usage"), endpoint)
+        return text
+
+    def _record_usage(
+        self, usage: Optional[Dict[str, Any]], endpoint: Dict[str, Any], count_response: bool = True
+    ):
+        """
+        累计API返回的token用量，包括命中和写入提供商prompt缓存的输入token
+
+        OpenAI 兼容接口的 prompt_tokens 已包含缓存命中的部分；
+        Anthropic 的 input_tokens 不含缓存读写部分，这里折算为相同口径
+        """
+        if not isinstance(usage, dict):
+            return
+
+        if endpoint["provider"] == "anthropic":
+            cached = usage.get("cache_read_input_tokens") or 0
+            cache_write = usage.get("cache_creation_input_tokens") or 0
+            prompt_tokens = (usage.get("input_tokens") or 0) + cached + cache_write
+            completion_tokens = usage.get("output_tokens") or 0
+        else:
+            details = usage.get("prompt_tokens_details") or {}
+            cached = details.get("cached_tokens") or 0
+            cache_write = details.get("cache_write_tokens") or 0
+            prompt_tokens = usage.get("prompt_tokens") or 0
+            completion_tokens = usage.get("completion_tokens") or 0
+
+        if count_response:
+            self.usage_stats["responses"] += 1
+        self.usage_stats["prompt_tokens"] += prompt_tokens
+        self.usage_stats["completion_tokens"] += completion_tokens
+        self.usage_stats["cached_tokens"] += cached
+        self.usage_stats["cache_write_tokens"] += cache_write
+
+    @staticmethod
+    def _get_request_url(endpoint: Dict[str, Any]) -> str:
+        """获取请求地址"""
+        if endpoint["provider"] == "anthropic":
+            return f"{endpoint['base_url']}/messages"
+        return f"{endpoint['base_url']}/chat/completions"
 
     def _get_headers(self, endpoint: Dict[str, Any]) -> Dict[str, str]:
         """获取请求头"""
@@ -185,65 +1205,199 @@ class LLMService:
             # OpenAI 不需要额外头部
             pass
         elif provider == "anthropic":
-            # Anthropic 使用不同的API格式，这里暂时不支持
-            pass
+            # Anthropic Messages API 使用 x-api-key 认证
+            headers = {
+                "x-api-key": endpoint["api_key"],
+                "anthropic-version": ANTHROPIC_VERSION,
+                "Content-Type": "application/json",
+            }
         elif provider == "custom":
             # 自定义提供商，可以根据需要添加头部
             pass
 
         return headers
 
-    def _get_request_data(self, prompt: str, endpoint: Dict[str, Any]) -> Dict[str, Any]:
-        """获取请求数据"""
+    def _get_request_data(self, prompt: PromptSource, endpoint: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        获取请求数据
+
+        固定指令作为system消息放在最前面，文章内容作为user消息；
+        支持的提供商在system部分标注 cache_control，使相同指令的请求复用已缓存的前缀
+        """
+        max_tokens = endpoint["max_tokens"]
+        if isinstance(prompt, PromptBuilder) and prompt.max_tokens:
+            max_tokens = prompt.max_tokens
+        chat_prompt = self._resolve_prompt(prompt, endpoint)
+
+        system: Any = chat_prompt.system
+        if endpoint["cache_control"] and endpoint["provider"] in CACHE_CONTROL_PROVIDERS:
+            system = [{"type": "text", "text": chat_prompt.system, "cache_control": {"type": "ephemeral"}}]
+
+        if endpoint["provider"] == "anthropic":
+            return {
+                "model": endpoint["model"],
+                "system": system if isinstance(system, list) else [{"type": "text", "text": system}],
+                "messages": [{"role": "user", "content": chat_prompt.user}],
+                "temperature": endpoint["temperature"],
+                "max_tokens": max_tokens,
+            }
+
         return {
             "model": endpoint["model"],
-            "messages": [{"role": "user", "content": prompt}],
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": chat_prompt.user},
+            ],
             "temperature": endpoint["temperature"],
-            "max_tokens": endpoint["max_tokens"],
+            "max_tokens": max_tokens,
         }
 
     def _parse_response(self, response: str) -> Dict[str, Any]:
         """解析LLM响应"""
         try:
-            # 尝试提取JSON
-            start = response.find("{")
-            end = response.rfind("}") + 1
+            return self._extract_result(response)
+        except Exception as e:
+            logger.error(f"解析LLM响应失败: {e}, 原始响应: {response}")
+            return self._parse_failure(e)
 
-            if start == -1 or end == 0:
-                raise ValueError("未找到JSON格式的响应")
+    def _extract_result(self, response: str) -> Dict[str, Any]:
+        """从LLM响应中提取JSON结果，格式不符时抛出异常"""
+        # 尝试提取JSON
+        start = response.find("{")
+        end = response.rfind("}") + 1
 
-            json_str = response[start:end]
-            result = json.loads(json_str)
+        if start == -1 or end == 0:
+            raise ValueError("未找到JSON格式的响应")
 
-            # 验证必要字段
-            required_fields = ["useful", "reason", "summary", "title"]
-            for field in required_fields:
-                if field not in result:
-                    raise ValueError(f"响应缺少必要字段: {field}")
+        json_str = response[start:end]
+        result = json.loads(json_str)
 
-            return result
+        # 验证必要字段
+        for field in self._required_fields():
+            if field not in result:
+                raise ValueError(f"响应缺少必要字段: {field}")
 
-        except Exception as e:
-            logger.error(f"解析LLM响应失败: {e}, 原始响应: {response}")
-            return {
-                "useful": False,
-                "reason": f"响应解析失败: {str(e)}",
-                "summary": "解析失败",
-                "title": "未知",
+        # 两阶段判断模式下响应不含摘要和标题
+        result.setdefault("summary", "")
+        result.setdefault("title", "")
+        return result
+
+    def _extract_triage_result(self, response: str) -> Dict[str, Any]:
+        """从初筛响应中提取结果，格式不符时抛出异常"""
+        start = response.find("{")
+        end = response.rfind("}") + 1
+        if start == -1 or end == 0:
+            raise ValueError("未找到JSON格式的响应")
+
+        result = json.loads(response[start:end])
+        verdict = str(result.get("verdict", "")).strip().lower()
+        if verdict not in ("yes", "no", "uncertain"):
+            raise ValueError(f"无效的初筛结果: {verdict}")
+        return {"verdict": verdict, "reason": result.get("reason", "")}
+
+    def _required_fields(self) -> List[str]:
+        """LLM判断结果中必须包含的字段"""
+        if self.decision_config["enabled"]:
+            return ["useful", "reason"]
+        return ["useful", "reason", "summary", "title"]
+
+    def _extract_batch_results(self, response: str, count: int) -> List[Any]:
+        """从批量响应中提取结果数组，按id对应，无效的条目为 None"""
+        start = response.find("[")
+        end = response.rfind("]") + 1
+
+        if start == -1 or end == 0:
+            raise ValueError("未找到JSON数组格式的响应")
+
+        parsed = json.loads(response[start:end])
+        if not isinstance(parsed, list):
+            raise ValueError("批量响应不是JSON数组")
+
+        results: List[Any] = [None] * count
+        required_fields = self._required_fields()
+        for item in parsed:
+            if not isinstance(item, dict):
+                continue
+            item_id = item.get("id")
+            if not isinstance(item_id, int) or not 1 <= item_id <= count:
+                continue
+            if any(field not in item for field in required_fields):
+                continue
+            if not isinstance(item["useful"], bool):
+                continue
+            results[item_id - 1] = {
+                "summary": "",
+                "title": "",
+                **{field: item[field] for field in required_fields},
             }
 
+        return results
+
+    def _parse_failure(self, error: Exception) -> Dict[str, Any]:
+        """响应解析失败时的默认结果"""
+        return {
+            "useful": False,
+            "reason": f"响应解析失败: {str(error)}",
+            "summary": "解析失败",
+            "title": "未知",
+        }
+
+    async def aclose(self):
+        """关闭所有endpoint的连接池"""
+        for task in list(self._background_tasks):
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        for pool in self._retired_pools:
+            await pool.aclose()
+        self._retired_pools.clear()
+        await self._pool.aclose()
+        self.cache.flush_access()
+        logger.info("LLM服务连接池已关闭")
+
     def get_status(self) -> Dict[str, Any]:
         """获取LLM服务状态"""
+        connection_stats = get_connection_stats()
         return {
             "total_endpoints": len(self.endpoints),
             "enabled_endpoints": len([ep for ep in self.endpoints if ep.get("enabled", True)]),
-            "current_index": self.current_index,
+            "routing": self.router.get_status(),
+            "cache": self.cache.get_stats(),
+            "batch": {**self.batch_config, **self.batch_stats},
+            "hedging": {**self.hedging_config, **self.hedge_stats},
+            "decision": {**self.decision_config, "summaries": self.summary_stats},
+            "triage": self.triage_stats,
+            "usage": {
+                **self.usage_stats,
+                "avg_completion_tokens": round(
+                    self.usage_stats["completion_tokens"] / self.usage_stats["responses"], 1
+                ) if self.usage_stats["responses"] else 0.0,
+                "cached_ratio": round(
+                    self.usage_stats["cached_tokens"] / self.usage_stats["prompt_tokens"], 4
+                ) if self.usage_stats["prompt_tokens"] else 0.0,
+            },
+            "truncation": {
+                "articles": self.truncation_stats["articles"],
+                "truncated": self.truncation_stats["truncated"],
+                "avg_ms": round(
+                    self.truncation_stats["seconds_total"] / self.truncation_stats["articles"] * 1000, 3
+                ) if self.truncation_stats["articles"] else 0.0,
+                "max_ms": round(self.truncation_stats["seconds_max"] * 1000, 3),
+            },
+            "streaming": {
+                **self.streaming_config,
+                **self.stream_stats,
+                "avg_time_to_verdict_ms": round(
+                    self.stream_stats["time_to_verdict_seconds_total"]
+                    / self.stream_stats["early_verdicts"] * 1000, 1
+                ) if self.stream_stats["early_verdicts"] else 0.0,
+            },
             "endpoints": [
                 {
                     "name": ep["name"],
                     "provider": ep["provider"],
                     "model": ep["model"],
-                    "enabled": ep.get("enabled", True)
+                    "enabled": ep.get("enabled", True),
+                    "connections": connection_stats.get(f"llm:{ep['name']}", {}),
                 }
                 for ep in self.endpoints
             ]
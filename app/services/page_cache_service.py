@@ -0,0 +1,136 @@
+"""
+网页抓取缓存服务
+
+按文章URL把 trafilatura 解析后的正文和 ETag/Last-Modified 持久化到SQLite：
+新鲜期内直接使用缓存，之后发送条件请求，服务端返回304时沿用缓存正文，不再下载和解析
+"""
+
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.repositories.page_cache_repository import PageCacheRepository
+
+logger = logging.getLogger(__name__)
+
+# 每写入多少条缓存执行一次过期清理和容量淘汰
+EVICTION_INTERVAL = 50
+
+
+class PageCacheService:
+    """网页抓取缓存服务"""
+
+    def __init__(self, cache_config: Dict[str, Any]):
+        self.enabled = cache_config["enabled"]
+        self.fresh_seconds = cache_config["fresh_seconds"]
+        self.max_age_hours = cache_config["max_age_hours"]
+        self.max_bytes = cache_config["max_bytes"]
+        self.cache_repository = PageCacheRepository()
+
+        self._writes_since_eviction = 0
+        self.totals = {"entries": 0, "bytes": 0}
+        self.stats = {
+            "fresh_hits": 0,
+            "revalidated": 0,
+            "changed": 0,
+            "misses": 0,
+            "writes": 0,
+            "uncacheable": 0,
+        }
+
+    @staticmethod
+    def make_key(url: str) -> str:
+        """根据文章URL生成缓存键"""
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        查找缓存
+
+        Returns:
+            缓存条目（fresh 表示仍在新鲜期内，可直接使用），没有缓存时返回 None
+        """
+        if not self.enabled:
+            return None
+
+        entry = self.cache_repository.get(self.make_key(url), self.max_age_hours)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        fresh_until = entry["validated_at"] + timedelta(seconds=self.fresh_seconds)
+        entry["fresh"] = fresh_until > datetime.now()
+        if entry["fresh"]:
+            self.stats["fresh_hits"] += 1
+        return entry
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """根据缓存条目生成条件请求头"""
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def mark_not_modified(self, url: str) -> None:
+        """服务端返回304，缓存正文仍然有效"""
+        self.stats["revalidated"] += 1
+        self.cache_repository.mark_validated(self.make_key(url))
+
+    def mark_changed(self) -> None:
+        """重新验证时服务端返回了新内容"""
+        self.stats["changed"] += 1
+
+    def store(self, url: str, response: httpx.Response, content: str) -> None:
+        """保存解析后的正文（响应禁止缓存时跳过）"""
+        if not self.enabled:
+            return
+
+        cache_control = response.headers.get("cache-control", "").lower()
+        if "no-store" in cache_control:
+            self.stats["uncacheable"] += 1
+            self.cache_repository.delete(self.make_key(url))
+            return
+
+        self.cache_repository.save(
+            self.make_key(url),
+            url,
+            response.headers.get("etag"),
+            response.headers.get("last-modified"),
+            content,
+        )
+        self.stats["writes"] += 1
+
+        self._writes_since_eviction += 1
+        if self._writes_since_eviction >= EVICTION_INTERVAL:
+            self._writes_since_eviction = 0
+            self.evict()
+
+    def evict(self):
+        """清理过期缓存并按容量淘汰"""
+        if not self.enabled:
+            return
+        expired = self.cache_repository.delete_expired(self.max_age_hours)
+        evicted = self.cache_repository.evict_to_size(self.max_bytes)
+        self.totals = self.cache_repository.get_totals()
+        if expired or evicted:
+            logger.info(f"网页缓存清理完成: 过期{expired}条, 淘汰{evicted}条")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        hits = self.stats["fresh_hits"] + self.stats["revalidated"]
+        lookups = hits + self.stats["changed"] + self.stats["misses"]
+        return {
+            "enabled": self.enabled,
+            **self.stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            # 最近一次清理时的统计
+            "entries": self.totals["entries"],
+            "bytes": self.totals["bytes"],
+        }
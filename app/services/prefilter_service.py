@@ -0,0 +1,187 @@
+"""
+本地预过滤服务
+
+按prompt配置中的规则在调用LLM前过滤明显无关的文章（推广、招聘、过短、语言不符等），
+规则按配置快照编译为正则（每次加载配置后只编译一次），每条规则记录命中次数
+"""
+
+import logging
+import re
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+# 语言检测只看内容开头的字符数
+LANGUAGE_SAMPLE_CHARS = 2000
+
+# 字母类字符少于该数量时不做语言判断
+LANGUAGE_MIN_LETTERS = 20
+
+_SCRIPT_PATTERNS = {
+    "han": re.compile(r"[\u4e00-\u9fff\u3400-\u4dbf]"),
+    "kana": re.compile(r"[\u3040-\u30ff]"),
+    "hangul": re.compile(r"[\uac00-\ud7af]"),
+    "cyrillic": re.compile(r"[\u0400-\u04ff]"),
+    "latin": re.compile(r"[A-Za-z\u00c0-\u024f]"),
+}
+
+
+def detect_language(text: str) -> Optional[str]:
+    """
+    按字符集粗略判断文本语言
+
+    Returns:
+        zh/ja/ko/ru/en，字母类字符太少时返回 None
+    """
+    sample = text[:LANGUAGE_SAMPLE_CHARS]
+    counts = {script: len(pattern.findall(sample)) for script, pattern in _SCRIPT_PATTERNS.items()}
+    letters = sum(counts.values())
+    if letters < LANGUAGE_MIN_LETTERS:
+        return None
+
+    # 日文混用汉字和假名，有一定比例的假名即判断为日文
+    if counts["kana"] >= letters * 0.05:
+        return "ja"
+    if counts["hangul"] >= letters * 0.3:
+        return "ko"
+    if counts["han"] >= letters * 0.2:
+        return "zh"
+    if counts["cyrillic"] >= letters * 0.3:
+        return "ru"
+    if counts["latin"] >= letters * 0.5:
+        return "en"
+    return None
+
+
+def _compile_any(patterns: List[str]) -> Optional[Pattern]:
+    """把多个正则合并为一个，列表为空时返回 None"""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
+
+
+def _compile_keywords(keywords: List[str]) -> Optional[Pattern]:
+    """把关键词列表编译为一个不区分大小写的正则"""
+    return _compile_any([re.escape(keyword) for keyword in keywords if keyword])
+
+
+class CompiledRules:
+    """单个prompt配置编译后的预过滤规则"""
+
+    def __init__(self, rules: Dict[str, Any]):
+        self.exclude_title = _compile_any(rules["exclude_title_patterns"])
+        self.include_title = _compile_any(rules["include_title_patterns"])
+        self.exclude_keywords = _compile_keywords(rules["exclude_keywords"])
+        self.include_keywords = _compile_keywords(rules["include_keywords"])
+        self.exclude_patterns = _compile_any(rules["exclude_patterns"])
+        self.include_patterns = _compile_any(rules["include_patterns"])
+        self.min_length = rules["min_length"]
+        self.max_length = rules["max_length"]
+        self.languages = {language.lower() for language in rules["languages"]}
+
+    def check_title(self, title: str) -> Optional[Tuple[str, str]]:
+        """只检查标题规则，命中时返回 (规则名, 原因)"""
+        if self.exclude_title is not None:
+            match = self.exclude_title.search(title)
+            if match:
+                return "exclude_title_patterns", f"标题命中排除规则: {match.group(0)}"
+        if self.include_title is not None and not self.include_title.search(title):
+            return "include_title_patterns", "标题未匹配任何必需规则"
+        return None
+
+    def check_content(self, title: str, content: str) -> Optional[Tuple[str, str]]:
+        """检查内容相关规则（长度、语言、关键词、正则），命中时返回 (规则名, 原因)"""
+        length = len(content)
+        if self.min_length and length < self.min_length:
+            return "min_length", f"内容过短: {length}字符 < {self.min_length}"
+        if self.max_length and length > self.max_length:
+            return "max_length", f"内容过长: {length}字符 > {self.max_length}"
+
+        if self.languages:
+            language = detect_language(content or title)
+            if language is not None and language not in self.languages:
+                return "languages", f"内容语言不符: {language}"
+
+        text = f"{title}\n{content}"
+        if self.exclude_keywords is not None:
+            match = self.exclude_keywords.search(text)
+            if match:
+                return "exclude_keywords", f"命中排除关键词: {match.group(0)}"
+        if self.exclude_patterns is not None:
+            match = self.exclude_patterns.search(text)
+            if match:
+                return "exclude_patterns", f"命中排除规则: {match.group(0)}"
+        if self.include_keywords is not None and not self.include_keywords.search(text):
+            return "include_keywords", "未包含任何必需关键词"
+        if self.include_patterns is not None and not self.include_patterns.search(text):
+            return "include_patterns", "未匹配任何必需规则"
+        return None
+
+
+class PrefilterService:
+    """本地预过滤服务"""
+
+    def __init__(self):
+        # 命中次数，键为 (site列表, 规则名)
+        self.hits: Dict[Tuple[tuple, str], int] = {}
+
+    @property
+    def rules(self) -> Dict[tuple, CompiledRules]:
+        """当前配置快照编译后的规则，按prompt配置的site列表索引（每个快照只编译一次）"""
+        return config.snapshot.derive("prefilter_rules", self._compile)
+
+    @staticmethod
+    def _compile(snapshot) -> Dict[tuple, CompiledRules]:
+        """编译配置快照中所有prompt配置的预过滤规则"""
+        rules = {
+            site: CompiledRules(prompt_config["rules"])
+            for site, prompt_config in snapshot.prompts.items()
+            if prompt_config.get("rules")
+        }
+        if rules:
+            logger.info(f"预过滤规则已编译（配置版本 {snapshot.version}），共 {len(rules)} 个prompt配置")
+        return rules
+
+    def check(
+        self, site: tuple, title: str, content: Optional[str] = None
+    ) -> Optional[Dict[str, str]]:
+        """
+        检查文章是否被预过滤规则拦截
+
+        Args:
+            site: 匹配到的prompt配置的site列表
+            title: 文章标题
+            content: 文章内容，为 None 时只检查标题规则（可在抓取内容前调用）
+
+        Returns:
+            命中时返回 {"rule": 规则名, "reason": 原因}，未命中返回 None
+        """
+        rules = self.rules.get(site)
+        if rules is None:
+            return None
+
+        hit = rules.check_title(title or "")
+        if hit is None and content is not None:
+            hit = rules.check_content(title or "", content)
+        if hit is None:
+            return None
+
+        rule, reason = hit
+        self.hits[(site, rule)] = self.hits.get((site, rule), 0) + 1
+        return {"rule": rule, "reason": reason}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取预过滤统计"""
+        return {
+            "filtered": sum(self.hits.values()),
+            "hits": {
+                f"{site[0]}:{rule}": count
+                for (site, rule), count in sorted(self.hits.items())
+            },
+        }
+
+
+# 全局预过滤服务实例
+prefilter_service = PrefilterService()
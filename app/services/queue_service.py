@@ -1,12 +1,19 @@
+import asyncio
 import logging
+from typing import Any, Dict, List, Optional, Tuple
 
 from app.core.config import config
-from app.core.constants import RecordStatus
+from app.core.constants import IngestStatus, RecordStatus
 from app.core.logging import get_logger
+from app.core.prompt_router import PromptRoute
+from app.core.webhook_parser import WebhookEntry
 from app.repositories.queue_repository import QueueRepository
+from app.services.classifier_service import classifier_service
+from app.services.completeness_service import completeness_service
 from app.services.content_fetcher_service import content_fetcher_service
 from app.services.llm_service import LLMService
-from app.services.readwise_service import ReadwiseService
+from app.services.prefilter_service import prefilter_service
+from app.services.readwise_outbox_service import readwise_outbox_service
 from app.services.record_service import record_service
 
 logger = logging.getLogger(__name__)
@@ -20,8 +27,27 @@ class QueueService:
         self.queue_repository = QueueRepository()
         self.record_service = record_service
         self.llm_service = LLMService()
-        self.readwise_service = ReadwiseService()
-        self.retry_times = config.get_queue_config()["retry_times"]
+
+        # 正在进行的预抓取：队列项ID -> 任务
+        self._prefetch_tasks: Dict[int, asyncio.Task] = {}
+        self._prefetch_semaphore: Optional[asyncio.Semaphore] = None
+        self._prefetch_concurrency = 0
+        self.prefetch_stats = {
+            "scheduled": 0,
+            "dropped": 0,
+            "fetched": 0,
+            "failed": 0,
+            "used": 0,
+            "awaited": 0,
+            "missed": 0,
+        }
+        # 判断为完整后仍抽样抓取的队列项：队列项ID -> webhook内容，用于比较两种内容的判断结果
+        self._completeness_samples: Dict[int, str] = {}
+
+    @property
+    def retry_times(self) -> int:
+        """重试次数"""
+        return config.get_queue_config()["retry_times"]
 
     async def add_to_queue(self, feed_url: str, title: str, content: str, article_url: str) -> int:
         """添加数据到队列（带去重检查）"""
@@ -44,13 +70,141 @@ class QueueService:
             )
             queue_logger.info(
                 f"数据已添加到队列: queue_id={queue_id}, feed_url={feed_url}, article_url={article_url}")
+            self._schedule_prefetch(queue_id, feed_url, title, content, article_url)
             return queue_id
         except Exception as e:
             queue_logger.error(f"添加数据到队列失败: {e}")
             raise
 
+    async def add_batch_to_queue(self, entries: List[Tuple[int, WebhookEntry]]) -> List[Dict[str, Any]]:
+        """
+        批量添加数据到队列：批次内按URL去重，再与队列和记录去重，在一个事务中写入
+
+        Args:
+            entries: (条目序号, 条目) 列表
+
+        Returns:
+            每个条目的处理结果（含条目序号和状态，加入队列的条目含队列项ID）
+        """
+        results = []
+        accepted = []
+        seen = set()
+        for index, entry in entries:
+            if entry.article_url in seen:
+                results.append({"index": index, "status": IngestStatus.DUPLICATE})
+                continue
+            seen.add(entry.article_url)
+            accepted.append((index, entry))
+
+        # 查询和写入在线程中执行，大批量时不阻塞事件循环
+        new_entries, queue_ids = await asyncio.to_thread(self._store_batch, accepted)
+        new_indexes = {index for index, _ in new_entries}
+        for index, _ in accepted:
+            if index not in new_indexes:
+                results.append({"index": index, "status": IngestStatus.EXISTS})
+        for (index, entry), queue_id in zip(new_entries, queue_ids):
+            results.append({"index": index, "status": IngestStatus.QUEUED, "queue_id": queue_id})
+            self._schedule_prefetch(queue_id, entry.feed_url, entry.title, entry.content, entry.article_url)
+
+        queue_logger.info(
+            f"批量添加数据到队列: 共 {len(entries)} 条, 加入 {len(new_entries)} 条, "
+            f"批次内重复 {len(entries) - len(accepted)} 条, 已存在 {len(accepted) - len(new_entries)} 条")
+        return results
+
+    def _store_batch(
+        self, entries: List[Tuple[int, WebhookEntry]]
+    ) -> Tuple[List[Tuple[int, WebhookEntry]], List[int]]:
+        """与队列和记录去重后写入队列，返回 (新条目, 对应的队列项ID)"""
+        urls = [entry.article_url for _, entry in entries]
+        existing = self.queue_repository.find_existing_urls(urls)
+        existing |= self.record_service.record_repository.find_existing_urls(urls)
+
+        new_entries = [(index, entry) for index, entry in entries if entry.article_url not in existing]
+        if not new_entries:
+            return [], []
+        queue_ids = self.queue_repository.add_batch_to_queue([
+            {
+                "feed_url": entry.feed_url,
+                "title": entry.title,
+                "content": entry.content,
+                "article_url": entry.article_url,
+            }
+            for _, entry in new_entries
+        ])
+        return new_entries, queue_ids
+
+    def _schedule_prefetch(self, queue_id: int, feed_url: str, title: str, content: str, article_url: str):
+        """按配置为需要重新抓取内容的队列项在后台预先抓取，处理时内容已经就绪"""
+        queue_config = config.get_queue_config()
+        if not queue_config["prefetch_content"]:
+            return
+
+        route = config.resolve_prompt(feed_url)
+        if route is None or not route.config.get("refetch_content", False):
+            return
+        # 标题会被本地规则过滤的文章不需要抓取
+        if prefilter_service.check(route.site, title, None) is not None:
+            return
+        # webhook内容已是全文的文章不需要抓取（处理时被抽样的文章再抓取）
+        if completeness_service.check(feed_url, content)[0]:
+            return
+        if len(self._prefetch_tasks) >= queue_config["prefetch_concurrency"] + queue_config["prefetch_max_pending"]:
+            self.prefetch_stats["dropped"] += 1
+            queue_logger.info(f"等待预抓取的文章过多，处理时再抓取: {article_url}")
+            return
+
+        # 并发数变更（重新加载配置）后使用新的信号量
+        if self._prefetch_semaphore is None or self._prefetch_concurrency != queue_config["prefetch_concurrency"]:
+            self._prefetch_concurrency = queue_config["prefetch_concurrency"]
+            self._prefetch_semaphore = asyncio.Semaphore(self._prefetch_concurrency)
+
+        self.prefetch_stats["scheduled"] += 1
+        task = asyncio.create_task(self._prefetch(queue_id, article_url, self._prefetch_semaphore))
+        self._prefetch_tasks[queue_id] = task
+        task.add_done_callback(lambda _: self._prefetch_tasks.pop(queue_id, None))
+
+    async def _prefetch(self, queue_id: int, article_url: str, semaphore: asyncio.Semaphore):
+        """抓取文章内容并保存到队列项"""
+        async with semaphore:
+            content = await content_fetcher_service.fetch_content(article_url)
+        if not content:
+            self.prefetch_stats["failed"] += 1
+            return
+        if self.queue_repository.save_prefetched_content(queue_id, content):
+            self.prefetch_stats["fetched"] += 1
+            queue_logger.info(f"预抓取内容完成: queue_id={queue_id}, 长度: {len(content)} 字符")
+
+    async def _get_prefetched_content(self, queue_item) -> Optional[str]:
+        """获取预抓取的内容，预抓取仍在进行时等待其完成"""
+        task = self._prefetch_tasks.get(queue_item.id)
+        if task is not None:
+            self.prefetch_stats["awaited"] += 1
+            await asyncio.wait([task])
+        return self.queue_repository.get_prefetched_content(queue_item.id)
+
+    async def cancel_prefetch(self):
+        """取消正在进行的预抓取（关闭服务时调用）"""
+        tasks = list(self._prefetch_tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_prefetch_stats(self) -> dict:
+        """获取预抓取统计"""
+        return {**self.prefetch_stats, "in_progress": len(self._prefetch_tasks)}
+
     async def process_queue(self) -> int:
-        """处理队列中的数据 - 一个一个处理（带去重检查）"""
+        """处理队列中的数据 - 一个一个处理（带去重检查），启用批量模式时一次处理一批"""
+        # 本轮处理固定使用开始时的配置快照，期间重新加载的配置从下一轮开始生效
+        with config.pinned():
+            return await self._process_queue()
+
+    async def _process_queue(self) -> int:
+        """处理一个队列项或一批队列项"""
+        # 流式模式逐条提前返回判断结果，不与批量模式同时使用
+        if self.llm_service.batch_config["enabled"] and not self.llm_service.streaming_config["enabled"]:
+            return await self._process_batch()
+
         try:
             # 只获取一个待处理的项目
             queue_item = self.queue_repository.get_next_pending_item()
@@ -62,23 +216,12 @@ class QueueService:
                 f"开始处理队列项: id={queue_item.id}, feed_url={queue_item.feed_url}")
 
             # 处理前再次检查去重（防止处理期间有重复数据）
-            if self.record_service.record_repository.exists_by_url(queue_item.article_url):
-                queue_logger.info(
-                    f"URL已存在于记录中，跳过处理并删除队列项: {queue_item.article_url}")
-                self.queue_repository.delete_queue_item(queue_item.id)
+            if self._skip_if_recorded(queue_item):
                 return 1
 
             # 处理单个项目
             success = await self._process_single_item(queue_item)
-
-            if success:
-                # 处理成功后删除队列项
-                self.queue_repository.delete_queue_item(queue_item.id)
-                queue_logger.info(f"队列项处理完成并已删除: id={queue_item.id}")
-            else:
-                # 处理失败，直接删除队列项（简化处理，避免复杂的重试逻辑）
-                self.queue_repository.delete_queue_item(queue_item.id)
-                queue_logger.error(f"队列项处理失败，已删除: id={queue_item.id}")
+            self._finish_item(queue_item, success)
 
             return 1
 
@@ -86,31 +229,252 @@ class QueueService:
             queue_logger.error(f"处理队列失败: {e}")
             return 0
 
+    async def _process_batch(self) -> int:
+        """批量处理队列中同一prompt配置的多个项目，合并为一次LLM请求"""
+        try:
+            max_items = self.llm_service.batch_config["max_items"]
+            candidates = self.queue_repository.get_pending_items(max_items * 10)
+
+            if not candidates:
+                return 0
+
+            # 以最早入队的项目为准，选出共享同一prompt配置的项目
+            first_route = config.resolve_prompt(candidates[0].feed_url)
+            batch = [
+                item for item in candidates
+                if config.resolve_prompt(item.feed_url) is first_route
+            ][:max_items]
+
+            queue_logger.info(
+                f"开始批量处理队列项: ids={[item.id for item in batch]}, feed_url={batch[0].feed_url}")
+
+            prepared = []
+            for queue_item in batch:
+                if self._skip_if_recorded(queue_item):
+                    continue
+
+                if first_route is None:
+                    success = await self._process_single_item(queue_item)
+                    self._finish_item(queue_item, success)
+                    continue
+
+                try:
+                    if await self._apply_prefilter(queue_item, first_route):
+                        self._finish_item(queue_item, True)
+                        continue
+                    classified = await self._apply_classifier(queue_item, first_route)
+                    if classified is not None:
+                        self._finish_item(queue_item, classified)
+                        continue
+                    triaged = await self._apply_triage(queue_item, first_route)
+                    if triaged is not None:
+                        self._finish_item(queue_item, triaged)
+                        continue
+                    final_content = await self._prepare_content(queue_item, first_route)
+                    if await self._apply_prefilter(queue_item, first_route, final_content):
+                        self._finish_item(queue_item, True)
+                        continue
+                except Exception as e:
+                    success = await self._record_failure(
+                        queue_item, "处理失败，无法生成摘要", f"处理队列项失败: {str(e)}")
+                    self._finish_item(queue_item, success)
+                    continue
+                prepared.append((queue_item, final_content))
+
+            if prepared:
+                try:
+                    filter_results = await self.llm_service.filter_batch(
+                        [{"title": item.title, "content": content} for item, content in prepared],
+                        source=first_route,
+                    )
+                except Exception as e:
+                    error_msg = f"LLM处理失败: {str(e)}"
+                    for queue_item, _ in prepared:
+                        await self._record_failure(
+                            queue_item, "LLM处理失败，无法生成摘要", error_msg)
+                        self._finish_item(queue_item, False)
+                    return len(batch)
+
+                for (queue_item, content), filter_result in zip(prepared, filter_results):
+                    try:
+                        filter_result = await self._add_summary(queue_item, content, filter_result)
+                        success = await self._handle_filter_result(queue_item, filter_result)
+                    except Exception as e:
+                        success = await self._record_failure(
+                            queue_item, "处理失败，无法生成摘要", f"处理队列项失败: {str(e)}")
+                    self._finish_item(queue_item, success)
+
+            return len(batch)
+
+        except Exception as e:
+            queue_logger.error(f"批量处理队列失败: {e}")
+            return 0
+
+    def _skip_if_recorded(self, queue_item) -> bool:
+        """URL已存在于记录中时删除队列项并返回 True"""
+        if self.record_service.record_repository.exists_by_url(queue_item.article_url):
+            queue_logger.info(
+                f"URL已存在于记录中，跳过处理并删除队列项: {queue_item.article_url}")
+            self.queue_repository.delete_queue_item(queue_item.id)
+            return True
+        return False
+
+    def _finish_item(self, queue_item, success: bool):
+        """处理结束后删除队列项"""
+        # 批量模式和未经LLM判断的抽样文章只统计内容覆盖率，不比较判断结果
+        self._completeness_samples.pop(queue_item.id, None)
+        if success:
+            # 处理成功后删除队列项
+            self.queue_repository.delete_queue_item(queue_item.id)
+            queue_logger.info(f"队列项处理完成并已删除: id={queue_item.id}")
+        else:
+            # 处理失败，直接删除队列项（简化处理，避免复杂的重试逻辑）
+            self.queue_repository.delete_queue_item(queue_item.id)
+            queue_logger.error(f"队列项处理失败，已删除: id={queue_item.id}")
+
+    async def _apply_prefilter(self, queue_item, route: PromptRoute, content: Optional[str] = None) -> bool:
+        """按本地规则预过滤，命中时记录为USELESS并返回 True（content 为 None 时只检查标题）"""
+        hit = prefilter_service.check(route.site, queue_item.title, content)
+        if hit is None:
+            return False
+
+        await self.record_service.create_record(
+            feed_url=queue_item.feed_url,
+            title=queue_item.title,
+            summary="本地规则过滤，未进行内容摘要",
+            article_url=queue_item.article_url,
+            status=RecordStatus.USELESS,
+            filter_result={"useful": False, "reason": hit["reason"], "prefilter_rule": hit["rule"]},
+            filtered=True
+        )
+        queue_logger.info(
+            f"内容被本地规则过滤，已记录: rule={hit['rule']}, reason={hit['reason']}")
+        return True
+
+    async def _apply_classifier(self, queue_item, route: PromptRoute) -> Optional[bool]:
+        """本地分类器置信度足够高时按其判断处理并返回处理结果，否则返回 None"""
+        prediction = classifier_service.predict(route.site, queue_item.title)
+        if prediction is None:
+            return None
+
+        queue_logger.info(
+            f"本地分类器判断: useful={prediction['useful']}, probability={prediction['probability']}")
+        return await self._handle_filter_result(queue_item, {
+            "useful": prediction["useful"],
+            "reason": f"本地分类器判断（有用概率 {prediction['probability']}）",
+            "summary": "本地分类器判断，未进行内容摘要",
+            "title": queue_item.title,
+            "classifier_probability": prediction["probability"],
+        })
+
+    async def _apply_triage(self, queue_item, route: PromptRoute) -> Optional[bool]:
+        """标题初筛能明确判断时按其结果处理并返回处理结果，否则返回 None"""
+        if not route.config.get("triage"):
+            return None
+
+        description = (queue_item.content or "")[:route.config.get("triage_max_chars", 300)]
+        verdict = await self.llm_service.triage(queue_item.title, description, route)
+        if verdict is None:
+            return None
+
+        queue_logger.info(f"标题初筛已明确判断，跳过全文: useful={verdict['useful']}")
+        filter_result = await self._add_summary(queue_item, queue_item.content, {
+            "useful": verdict["useful"],
+            "reason": f"标题初筛: {verdict['reason']}",
+            "summary": "",
+            "title": queue_item.title,
+            "triage": True,
+        }, from_triage=True)
+        return await self._handle_filter_result(queue_item, filter_result)
+
+    async def _add_summary(self, queue_item, content: str, filter_result, from_triage: bool = False):
+        """
+        为判断为有用的两阶段判断结果或标题初筛结果（二者都不含摘要）生成摘要
+
+        其他结果的摘要为空时不补充（如流式判断提前返回，摘要由后台补全）
+        """
+        decision_config = self.llm_service.decision_config
+        if not decision_config["enabled"] and not from_triage:
+            return filter_result
+        if not filter_result.get("useful", False) or filter_result.get("summary"):
+            return filter_result
+
+        summary = await self.llm_service.summarize(queue_item.title, content)
+        return {**filter_result, "summary": summary}
+
+    async def _prepare_content(self, queue_item, route: PromptRoute) -> str:
+        """根据配置决定是否重新抓取内容"""
+        article_url = queue_item.article_url
+
+        # 根据配置决定是否重新抓取内容
+        refetch_content = route.config.get("refetch_content", False)
+        final_content = queue_item.content
+        if refetch_content:
+            complete, sampled = completeness_service.judge(queue_item.feed_url, queue_item.content)
+            if complete and not sampled:
+                queue_logger.info(f"webhook内容已是全文，跳过抓取: {article_url}")
+                return final_content
+
+            prefetched_content = await self._get_prefetched_content(queue_item)
+            if prefetched_content:
+                self.prefetch_stats["used"] += 1
+                queue_logger.info(f"使用预抓取的内容，长度: {len(prefetched_content)} 字符")
+                fetched_content = prefetched_content
+            else:
+                if config.get_queue_config()["prefetch_content"] and not complete:
+                    self.prefetch_stats["missed"] += 1
+
+                queue_logger.info(f"配置为重新抓取内容，开始抓取: {article_url}")
+                fetched_content = await content_fetcher_service.fetch_content(article_url)
+            if fetched_content:
+                final_content = fetched_content
+                completeness_service.observe(
+                    queue_item.feed_url, queue_item.content, fetched_content, sampled=sampled)
+                if sampled:
+                    self._completeness_samples[queue_item.id] = queue_item.content
+                queue_logger.info(f"成功抓取新内容，长度: {len(fetched_content)} 字符")
+            else:
+                queue_logger.warning(f"抓取内容失败，使用原始内容: {article_url}")
+        else:
+            queue_logger.info(f"配置为使用原始内容，跳过抓取: {article_url}")
+
+        # 截断由LLM服务按所选endpoint的token预算完成
+        return final_content
+
+    async def _compare_completeness_sample(self, queue_item, route: PromptRoute, filter_result):
+        """对被抽样抓取的文章再用webhook内容判断一次，统计跳过抓取是否会改变判断结果"""
+        webhook_content = self._completeness_samples.pop(queue_item.id, None)
+        if webhook_content is None:
+            return
+        try:
+            webhook_result = await self.llm_service.filter_content(
+                title=queue_item.title,
+                content=webhook_content,
+                source=route,
+            )
+        except Exception as e:
+            queue_logger.warning(f"抽样比较判断结果失败: {e}")
+            return
+        completeness_service.compare_verdicts(queue_item.article_url, filter_result, webhook_result)
+
     async def _process_single_item(self, queue_item):
         """处理单个队列项目"""
         feed_url = queue_item.feed_url
         title = queue_item.title
-        content = queue_item.content
-        article_url = queue_item.article_url
 
         queue_logger.info(f"处理队列项: feed_url={feed_url}, title={title}")
 
         try:
-            # 1. 检查是否有对应的prompt
-            prompts = config.get_prompts()
-            prompt_config = None
-            for url_pattern, config_data in prompts.items():
-                if any(pattern in feed_url for pattern in url_pattern):
-                    prompt_config = config_data
-                    break
-
-            if not prompt_config:
+            # 1. 检查是否有对应的prompt（每个队列项只解析一次，后续步骤共用）
+            route = config.resolve_prompt(feed_url)
+
+            if route is None:
                 # 没有对应prompt配置，记录为SKIP
                 await self.record_service.create_record(
                     feed_url=feed_url,
                     title=title,
                     summary="无prompt配置，未进行内容摘要",
-                    article_url=article_url,
+                    article_url=queue_item.article_url,
                     status=RecordStatus.SKIP,
                     error_message="没有对应的prompt配置"
                 )
@@ -119,118 +483,136 @@ class QueueService:
 
                 return True
 
-            # 2. 根据配置决定是否重新抓取内容
-            refetch_content = prompt_config.get("refetch_content", False)
-            final_content = content
-            if refetch_content:
-                queue_logger.info(f"配置为重新抓取内容，开始抓取: {article_url}")
-                fetched_content = await content_fetcher_service.fetch_content(article_url)
-                if fetched_content:
-                    final_content = fetched_content
-                    queue_logger.info(f"成功抓取新内容，长度: {len(fetched_content)} 字符")
-                else:
-                    queue_logger.warning(f"抓取内容失败，使用原始内容: {article_url}")
-            else:
-                queue_logger.info(f"配置为使用原始内容，跳过抓取: {article_url}")
+            # 2. 本地规则预过滤（先检查标题，避免无谓的抓取）
+            if await self._apply_prefilter(queue_item, route):
+                return True
 
-            # 3. 智能截断内容，保留前2500字符和后1000字符
-            final_content = self._smart_truncate_content(final_content, title)
-            queue_logger.info(f"内容截断后长度: {len(final_content)} 字符")
+            # 本地分类器置信度足够高时直接采用其判断
+            classified = await self._apply_classifier(queue_item, route)
+            if classified is not None:
+                return classified
 
-            # 4. 使用LLM进行判断
-            try:
-                filter_result = await self.llm_service.filter_content(
-                    title=title,
-                    content=final_content,
-                    source=feed_url,
-                )
+            # 按配置只根据标题和简介初筛，能明确判断时不再抓取和发送全文
+            triaged = await self._apply_triage(queue_item, route)
+            if triaged is not None:
+                return triaged
 
-                # 3. 根据判断结果处理
-                if filter_result.get("useful", False):
-                    # 符合要求，发送到Readwise Reader
-                    try:
-                        readwise_id = await self.readwise_service.save_article(
-                            url=article_url
-                        )
-
-                        # 记录有用的（符合要求，发送到Readwise）
-                        await self.record_service.create_record(
-                            feed_url=feed_url,
-                            title=title,
-                            summary=filter_result.get("summary", ""),
-                            article_url=article_url,
-                            status=RecordStatus.USEFUL,
-                            filter_result=filter_result,
-                            filtered=False,
-                            readwise_id=readwise_id
-                        )
-
-                        queue_logger.info(
-                            f"内容已发送到Readwise: readwise_id={readwise_id}")
-
-                        # 处理成功
-                        return True
+            # 3. 重新抓取（按配置）内容
+            final_content = await self._prepare_content(queue_item, route)
+            if await self._apply_prefilter(queue_item, route, final_content):
+                return True
 
-                    except Exception as e:
-                        # Readwise发送失败
-                        error_msg = f"发送到Readwise失败: {str(e)}"
-                        await self.record_service.create_record(
-                            feed_url=feed_url,
-                            title=title,
-                            summary=filter_result.get("summary", ""),
-                            article_url=article_url,
-                            status=RecordStatus.FAILED,
-                            filter_result=filter_result,
-                            filtered=False,
-                            error_message=error_msg
-                        )
-                        queue_logger.error(error_msg)
-                        return False
-
-                else:
-                    # 不符合要求，无用的
-                    await self.record_service.create_record(
-                        feed_url=feed_url,
+            # 4. 使用LLM进行判断（流式模式下摘要可能在记录创建后才补全，
+            #    补全任务等待记录创建；无论后续步骤是否出错都要放行，否则补全任务一直等待）
+            record_created = asyncio.Event()
+
+            async def complete_record(full_result):
+                await record_created.wait()
+                if not full_result.get("summary"):
+                    # 两阶段判断模式下保留已单独生成的摘要
+                    full_result = {**full_result, "summary": filter_result.get("summary", "")}
+                await self.record_service.update_filter_result(
+                    queue_item.article_url, full_result)
+
+            try:
+                try:
+                    filter_result = await self.llm_service.filter_content(
                         title=title,
-                        summary=filter_result.get("summary", ""),
-                        article_url=article_url,
-                        status=RecordStatus.USELESS,
-                        filter_result=filter_result,
-                        filtered=True
+                        content=final_content,
+                        source=route,
+                        on_complete=complete_record,
                     )
-                    queue_logger.info(
-                        f"内容被过滤，已记录: reason={filter_result.get('reason', '')}")
+                except Exception as e:
+                    # LLM处理失败
+                    return await self._record_failure(
+                        queue_item, "LLM处理失败，无法生成摘要", f"LLM处理失败: {str(e)}")
+
+                await self._compare_completeness_sample(queue_item, route, filter_result)
+
+                # 两阶段判断模式下为有用的文章补充摘要
+                filter_result = await self._add_summary(queue_item, final_content, filter_result)
+
+                # 5. 根据判断结果处理
+                return await self._handle_filter_result(queue_item, filter_result)
+            finally:
+                record_created.set()
 
-                    # 处理成功
-                    return True
+        except Exception as e:
+            # 其他处理失败
+            return await self._record_failure(
+                queue_item, "处理失败，无法生成摘要", f"处理队列项失败: {str(e)}")
+
+    async def _handle_filter_result(self, queue_item, filter_result) -> bool:
+        """根据LLM判断结果记录，有用的文章加入Readwise发送队列"""
+        feed_url = queue_item.feed_url
+        title = queue_item.title
+        article_url = queue_item.article_url
+
+        if filter_result.get("useful", False):
+            # 符合要求，记录并在同一事务中加入Readwise发送队列，由后台发送器发送后回写readwise_id
+            try:
+                record_id = await self.record_service.create_record(
+                    feed_url=feed_url,
+                    title=title,
+                    summary=filter_result.get("summary", ""),
+                    article_url=article_url,
+                    status=RecordStatus.USEFUL,
+                    filter_result=filter_result,
+                    filtered=False,
+                    deliver_to_readwise=True
+                )
+                readwise_outbox_service.notify()
+
+                queue_logger.info(
+                    f"内容已加入Readwise发送队列: record_id={record_id}")
+
+                # 处理成功
+                return True
 
             except Exception as e:
-                # LLM处理失败
-                error_msg = f"LLM处理失败: {str(e)}"
+                # 记录或加入发送队列失败
+                error_msg = f"加入Readwise发送队列失败: {str(e)}"
                 await self.record_service.create_record(
                     feed_url=feed_url,
                     title=title,
-                    summary="LLM处理失败，无法生成摘要",
+                    summary=filter_result.get("summary", ""),
                     article_url=article_url,
                     status=RecordStatus.FAILED,
+                    filter_result=filter_result,
+                    filtered=False,
                     error_message=error_msg
                 )
                 queue_logger.error(error_msg)
                 return False
 
-        except Exception as e:
-            # 其他处理失败
-            error_msg = f"处理队列项失败: {str(e)}"
-            await self.record_service.create_record(
-                feed_url=feed_url,
-                title=title,
-                summary="处理失败，无法生成摘要",
-                article_url=article_url,
-                status=RecordStatus.FAILED,
-                error_message=error_msg
-            )
-            queue_logger.error(error_msg)
-            return False
+        # 不符合要求，无用的
+        await self.record_service.create_record(
+            feed_url=feed_url,
+            title=title,
+            summary=filter_result.get("summary", ""),
+            article_url=article_url,
+            status=RecordStatus.USELESS,
+            filter_result=filter_result,
+            filtered=True
+        )
+        queue_logger.info(
+            f"内容被过滤，已记录: reason={filter_result.get('reason', '')}")
+
+        # 处理成功
+        return True
+
+    async def _record_failure(self, queue_item, summary: str, error_msg: str) -> bool:
+        """记录处理失败，返回 False"""
+        await self.record_service.create_record(
+            feed_url=queue_item.feed_url,
+            title=queue_item.title,
+            summary=summary,
+            article_url=queue_item.article_url,
+            status=RecordStatus.FAILED,
+            error_message=error_msg
+        )
+        queue_logger.error(error_msg)
+        return False
 
     async def get_queue_stats(self) -> dict:
         """获取队列统计"""
@@ -244,60 +626,6 @@ class QueueService:
             logger.error(f"清理队列失败: {e}")
             return 0
 
-    def _smart_truncate_content(self, content: str, title: str) -> str:
-        """
-        智能截断文章内容
-
-        保留文章前2500字符和最后1000字符，确保LLM能获得文章的开头和结尾关键信息
-
-        Args:
-            content: 原始文章内容
-            title: 文章标题
-
-        Returns:
-            截断后的内容
-        """
-        if not content:
-            return content
-
-        content_length = len(content)
-
-        # 如果内容长度小于等于3500字符，不需要截断
-        if content_length <= 3500:
-            return content
-
-        # 计算截断参数
-        front_length = 2500
-        back_length = 1000
-
-        # 如果内容太短，调整截断长度
-        if content_length < front_length + back_length:
-            # 内容长度不足，调整截断策略
-            if content_length <= 3000:
-                # 内容很短，只保留前80%
-                front_length = int(content_length * 0.8)
-                back_length = 0
-            else:
-                # 内容中等长度，平衡前后截断
-                front_length = int(content_length * 0.7)
-                back_length = content_length - front_length
-
-        # 执行截断
-        front_part = content[:front_length]
-        back_part = content[-back_length:] if back_length > 0 else ""
-
-        # 构建截断后的内容
-        if back_length > 0:
-            truncated_content = f"{front_part}\n\n... [内容已截断，保留前{front_length}字符和后{back_length}字符] ...\n\n{back_part}"
-        else:
-            truncated_content = f"{front_part}\n\n... [内容已截断，保留前{front_length}字符] ..."
-
-        # 记录截断信息
-        logger.info(
-            f"文章《{title}》内容截断: 原始长度{content_length}字符 -> 截断后{len(truncated_content)}字符")
-
-        return truncated_content
-
 
 # 全局队列服务实例
 queue_service = QueueService()
@@ -0,0 +1,178 @@
+"""
+Readwise发送队列
+
+判断为有用的文章随记录一起写入 readwise_outbox 表，由后台发送器取出发送：
+令牌桶限流、长连接客户端、失败后按指数退避重试，发送成功后回写记录的 readwise_id。
+Readwise出错或限流时不再阻塞队列处理，服务重启后未发送的文章继续发送
+"""
+
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+from app.core.config import config
+from app.core.rate_limiter import TokenBucket
+from app.repositories.readwise_outbox_repository import ReadwiseOutboxRepository
+from app.services.readwise_service import ReadwiseError, ReadwiseService
+
+logger = logging.getLogger(__name__)
+
+# 清理发送完成的队列项的间隔，单位：秒
+CLEANUP_INTERVAL_SECONDS = 24 * 3600
+
+
+class ReadwiseOutboxService:
+    """Readwise发送队列服务"""
+
+    def __init__(self):
+        self.outbox_repository = ReadwiseOutboxRepository()
+        self.readwise_service = ReadwiseService()
+
+        settings = self.settings
+        self.bucket = TokenBucket(settings["rate_per_minute"] / 60, settings["burst"])
+        self._wakeup = asyncio.Event()
+
+        self.stats = {
+            "sent": 0,
+            "retried": 0,
+            "failed": 0,
+            "rate_limited": 0,
+            "latency_seconds": 0.0,
+        }
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """Readwise发送配置"""
+        return config.get_readwise_config()
+
+    def notify(self):
+        """有新文章加入发送队列，唤醒发送器"""
+        self._wakeup.set()
+
+    async def run(self):
+        """发送循环：有新文章时立即发送，否则等到最早的待重试项到期（不超过检查间隔）"""
+        # 启动时重新发送重试次数用尽的文章（常见的失败原因如token失效，重启前已修正）
+        retried = self.outbox_repository.retry_exhausted()
+        if retried:
+            logger.info(f"已将 {retried} 篇重试次数用尽的文章重新加入Readwise发送队列")
+        cleaned_at = None
+
+        while True:
+            now = time.monotonic()
+            if cleaned_at is None or now - cleaned_at >= CLEANUP_INTERVAL_SECONDS:
+                cleaned_at = now
+                cleaned = self.outbox_repository.cleanup_sent(self.settings["retention_days"])
+                if cleaned:
+                    logger.info(f"清理Readwise发送队列: {cleaned} 项")
+
+            # 先清除唤醒标记再取出待发送项，取出后加入的文章不会被遗漏
+            self._wakeup.clear()
+            try:
+                processed = await self.drain()
+            except Exception as e:
+                logger.error(f"Readwise发送循环异常: {e}")
+                processed = 0
+            if processed:
+                continue
+
+            timeout = self.settings["poll_interval_seconds"]
+            next_due_at = self.outbox_repository.next_due_at()
+            if next_due_at is not None:
+                timeout = min(timeout, max(0.0, (next_due_at - datetime.now()).total_seconds()))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def drain(self) -> int:
+        """发送一批到期的文章，返回取出的项数"""
+        settings = self.settings
+        rate_per_second = settings["rate_per_minute"] / 60
+        if (self.bucket.rate_per_second, self.bucket.capacity) != (rate_per_second, settings["burst"]):
+            self.bucket.configure(rate_per_second, settings["burst"])
+
+        items = self.outbox_repository.get_due(settings["batch_size"])
+        if not items:
+            return 0
+
+        semaphore = asyncio.Semaphore(settings["concurrency"])
+
+        async def deliver(item: Dict[str, Any]):
+            async with semaphore:
+                await self.bucket.acquire()
+                await self._deliver(item, settings)
+
+        # 单篇文章异常不影响同批其他文章的发送
+        results = await asyncio.gather(*(deliver(item) for item in items), return_exceptions=True)
+        errors = 0
+        for item, result in zip(items, results):
+            if isinstance(result, Exception):
+                errors += 1
+                logger.error(f"发送到Readwise异常: {item['article_url']}, {type(result).__name__}: {result}")
+        # 整批都异常（如数据库不可用）时等到下次检查，避免立即重复取出同一批
+        return 0 if errors == len(items) else len(items)
+
+    async def _deliver(self, item: Dict[str, Any], settings: Dict[str, Any]):
+        """发送一篇文章并更新发送状态"""
+        started = time.perf_counter()
+        try:
+            readwise_id = await self.readwise_service.save_article(url=item["article_url"])
+        except ReadwiseError as e:
+            self._handle_failure(item, e, settings)
+            return
+        except Exception as e:
+            # 未预期的异常同样记录并按退避重试，达到最大次数后标记为失败
+            self._handle_failure(item, ReadwiseError(f"{type(e).__name__}: {e}", retryable=True), settings)
+            return
+        finally:
+            self.stats["latency_seconds"] += time.perf_counter() - started
+
+        self.outbox_repository.mark_sent(item["id"], item["record_id"], readwise_id)
+        self.stats["sent"] += 1
+        logger.info(f"内容已发送到Readwise: record_id={item['record_id']}, readwise_id={readwise_id}")
+
+    def _handle_failure(self, item: Dict[str, Any], error: ReadwiseError, settings: Dict[str, Any]):
+        """发送失败：可重试时按指数退避安排重试，否则标记为失败"""
+        if error.retry_after is not None:
+            # 服务端限流，所有发送暂停到 Retry-After 指定的时间
+            self.stats["rate_limited"] += 1
+            self.bucket.pause(error.retry_after)
+
+        attempts = item["attempts"] + 1
+        if error.retryable and attempts < settings["max_attempts"]:
+            delay = min(settings["retry_base_seconds"] * 2 ** (attempts - 1), settings["retry_max_seconds"])
+            # 加入随机抖动，避免同时失败的文章同时重试
+            delay = max(delay * random.uniform(0.8, 1.2), error.retry_after or 0.0)
+            self.outbox_repository.mark_retry(
+                item["id"], str(error), datetime.now() + timedelta(seconds=delay))
+            self.stats["retried"] += 1
+            logger.warning(
+                f"发送到Readwise失败，{delay:.0f}秒后重试（第{attempts}次）: {item['article_url']}, {error}")
+        else:
+            self.outbox_repository.mark_failed(item["id"], item["record_id"], str(error), error.retryable)
+            self.stats["failed"] += 1
+            logger.error(f"发送到Readwise失败，不再重试（共{attempts}次）: {item['article_url']}, {error}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取发送统计"""
+        attempts = self.stats["sent"] + self.stats["retried"] + self.stats["failed"]
+        return {
+            "outbox": self.outbox_repository.get_counts(),
+            "sent": self.stats["sent"],
+            "retried": self.stats["retried"],
+            "failed": self.stats["failed"],
+            "rate_limited": self.stats["rate_limited"],
+            "avg_latency_ms": round(self.stats["latency_seconds"] / attempts * 1000, 2) if attempts else 0.0,
+            "rate_limit": self.bucket.to_dict(),
+        }
+
+    async def aclose(self):
+        """关闭长连接客户端"""
+        await self.readwise_service.aclose()
+
+
+# 全局Readwise发送队列服务实例
+readwise_outbox_service = ReadwiseOutboxService()
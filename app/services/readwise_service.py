@@ -1,65 +1,117 @@
 import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import Optional
 
 import httpx
 
 from app.core.config import config
+from app.core.http_client import create_async_client
 
 logger = logging.getLogger(__name__)
 
 
+class ReadwiseError(Exception):
+    """发送到Readwise失败"""
+
+    def __init__(self, message: str, retryable: bool, retry_after: Optional[float] = None):
+        super().__init__(message)
+        # 网络错误、限流和服务端错误可以重试，请求本身无效时不可重试
+        self.retryable = retryable
+        # 服务端通过 Retry-After 要求等待的秒数
+        self.retry_after = retry_after
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 响应头（秒数或HTTP日期）"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
 class ReadwiseService:
     def __init__(self):
-        self.api_token = config.get_api_config()["readwise_token"]
         self.base_url = "https://readwise.io/api/v3"
+        # 长连接客户端，按配置单独使用代理
+        self.client = create_async_client(
+            "readwise",
+            timeout=30.0,
+            max_connections=config.get_readwise_config()["concurrency"] + 1,
+            max_keepalive_connections=config.get_readwise_config()["concurrency"],
+            proxy=config.get_proxy_url("readwise"),
+        )
+
+    @property
+    def api_token(self) -> str:
+        """Readwise API token（随配置重新加载更新）"""
+        return config.get_api_config()["readwise_token"]
 
     async def save_article(self, url: str) -> Optional[str]:
-        """保存文章到Readwise Reader，只传递URL让Readwise自动抓取内容"""
+        """
+        保存文章到Readwise Reader，只传递URL让Readwise自动抓取内容
+
+        Returns:
+            Readwise文档ID
+
+        Raises:
+            ReadwiseError: 保存失败，retryable 表示是否可以重试
+        """
+        headers = {
+            "Authorization": f"Token {self.api_token}",
+            "Content-Type": "application/json",
+        }
+
+        data = {
+            "url": url,
+            "location": "feed",  # 保存到feed位置
+            "category": "article",
+            "saved_using": "feedsieve",
+        }
+
         try:
-            headers = {
-                "Authorization": f"Token {self.api_token}",
-                "Content-Type": "application/json",
-            }
-
-            data = {
-                "url": url,
-                "location": "feed",  # 保存到feed位置
-                "category": "article",
-                "saved_using": "feedsieve",
-            }
-
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/save/", headers=headers, json=data
-                )
-
-                if response.status_code in [200, 201]:
-                    result = response.json()
-                    readwise_id = result.get("id")
-                    logger.info(f"文章保存成功: {url}, ID: {readwise_id}")
-                    return readwise_id
-                else:
-                    logger.error(
-                        f"保存文章失败: {response.status_code} - {response.text}"
-                    )
-                    return None
+            response = await self.client.post(
+                f"{self.base_url}/save/", headers=headers, json=data
+            )
+        except httpx.HTTPError as e:
+            raise ReadwiseError(f"Readwise API调用失败: {type(e).__name__}: {e}", retryable=True)
 
-        except Exception as e:
-            logger.error(f"Readwise API调用失败: {e}")
-            return None
+        if response.status_code in [200, 201]:
+            result = response.json()
+            readwise_id = result.get("id")
+            logger.info(f"文章保存成功: {url}, ID: {readwise_id}")
+            return readwise_id
+
+        message = f"保存文章失败: {response.status_code} - {response.text[:500]}"
+        if response.status_code == 429:
+            retry_after = _parse_retry_after(response.headers.get("retry-after"))
+            # 没有 Retry-After 时等待一分钟（Readwise按分钟限流）
+            raise ReadwiseError(message, retryable=True, retry_after=60.0 if retry_after is None else retry_after)
+        # 认证失败可能在更新token（重新加载配置）后恢复
+        retryable = response.status_code >= 500 or response.status_code in (401, 403, 408)
+        raise ReadwiseError(message, retryable=retryable)
 
     async def health_check(self) -> bool:
         """健康检查"""
         try:
             headers = {"Authorization": f"Token {self.api_token}"}
 
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    "https://readwise.io/api/v2/auth/", headers=headers
-                )
+            response = await self.client.get(
+                "https://readwise.io/api/v2/auth/", headers=headers, timeout=10.0
+            )
 
-                return response.status_code == 204
+            return response.status_code == 204
 
         except Exception as e:
             logger.error(f"Readwise健康检查失败: {e}")
             return False
+
+    async def aclose(self):
+        """关闭长连接客户端"""
+        await self.client.aclose()
@@ -22,9 +22,10 @@ class RecordService:
         filter_result: Optional[Dict[str, Any]] = None,
         filtered: Optional[bool] = None,
         readwise_id: Optional[str] = None,
-        error_message: Optional[str] = None
+        error_message: Optional[str] = None,
+        deliver_to_readwise: bool = False
     ) -> int:
-        """创建记录"""
+        """创建记录，deliver_to_readwise 为 True 时同时加入Readwise发送队列"""
         try:
             record_id = self.record_repository.create_record(
                 feed_url=feed_url,
@@ -35,7 +36,8 @@ class RecordService:
                 filter_result=filter_result,
                 filtered=filtered,
                 readwise_id=readwise_id,
-                error_message=error_message
+                error_message=error_message,
+                deliver_to_readwise=deliver_to_readwise
             )
             logger.info(f"记录已创建: record_id={record_id}, feed_url={feed_url}")
             return record_id
@@ -43,6 +45,23 @@ class RecordService:
             logger.error(f"创建记录失败: {e}")
             raise
 
+    async def update_filter_result(
+        self, article_url: str, filter_result: Dict[str, Any]
+    ) -> bool:
+        """用完整的LLM结果补写记录的摘要和过滤结果"""
+        try:
+            updated = self.record_repository.update_record_by_url(
+                article_url,
+                summary=filter_result.get("summary", ""),
+                filter_result=filter_result,
+            )
+            if updated:
+                logger.info(f"记录LLM结果已补全: article_url={article_url}")
+            return updated
+        except Exception as e:
+            logger.error(f"补全记录LLM结果失败: {e}")
+            return False
+
     async def get_record_stats(self, days: int = 1) -> Dict[str, Any]:
         """获取记录统计"""
         return self.record_repository.get_record_stats(days)
@@ -10,12 +10,13 @@ import logging
 
 import uvicorn
 
-from app.core.app import create_app
-
 logger = logging.getLogger(__name__)
 
-# 创建应用程序实例
-app = create_app()
+# 创建应用程序实例（网页解析工作进程以 __mp_main__ 导入本模块，不创建应用和服务实例）
+if __name__ != "__mp_main__":
+    from app.core.app import create_app
+
+    app = create_app()
 
 
 def main():
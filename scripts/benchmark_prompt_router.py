@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+prompt路由基准测试
+
+生成指定数量的合成feed配置，比较三种方式把feed URL解析为prompt配置的耗时：
+- 逐个扫描：每次重新构建prompt字典并逐个检查site模式（原实现，每篇文章解析两次）
+- 自动机扫描：Aho-Corasick自动机扫描一次URL（未命中解析缓存时）
+- 缓存命中：同一feed URL再次解析时直接查表
+
+用法（在项目根目录执行）:
+    python scripts/benchmark_prompt_router.py
+    python scripts/benchmark_prompt_router.py --feeds 100,500,2000 --lookups 20000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.prompt_router import PromptRouter, linear_resolve  # noqa: E402
+
+
+def build_prompts(feed_count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """生成合成的prompt配置列表（与配置文件中 prompts 的结构相同）"""
+    items = []
+    for index in range(feed_count):
+        host = f"site{index}.example{index % 7}.com"
+        patterns = [f"https://{host}/feed"]
+        if rng.random() < 0.3:
+            patterns.append(f"rsshub://source{index}/")
+        if rng.random() < 0.2:
+            patterns.append(f"https://www.{host}/rss.xml")
+        items.append({"site": patterns, "prompt": f"你是第{index}个feed的内容过滤器", "refetch_content": False})
+    return items
+
+
+def build_urls(feed_count: int, lookups: int, rng: random.Random) -> List[str]:
+    """生成待解析的feed URL，约10%没有匹配的配置"""
+    urls = []
+    for _ in range(lookups):
+        index = rng.randrange(feed_count)
+        if rng.random() < 0.1:
+            urls.append(f"https://unknown{index}.example.org/feed?page={rng.randrange(5)}")
+        else:
+            urls.append(f"https://site{index}.example{index % 7}.com/feed")
+    return urls
+
+
+def to_prompts_dict(items: List[Dict[str, Any]]) -> Dict[tuple, Dict[str, Any]]:
+    """与 AppConfig.get_prompts_dict 相同的转换"""
+    return {
+        tuple(item["site"]): {"prompt": item["prompt"], "refetch_content": item["refetch_content"]}
+        for item in items
+    }
+
+
+def measure(urls: List[str], resolve: Callable[[str], Any]) -> float:
+    """返回每次解析的平均耗时（微秒）"""
+    started = time.perf_counter()
+    for url in urls:
+        resolve(url)
+    return (time.perf_counter() - started) / len(urls) * 1_000_000
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="prompt路由基准测试")
+    parser.add_argument("--feeds", default="50,200,500,1000", help="逗号分隔的feed配置数量列表")
+    parser.add_argument("--lookups", type=int, default=5000, help="每种方式的解析次数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    print(f"{'feeds':>6} {'逐个扫描x2':>12} {'自动机扫描':>12} {'缓存命中':>10} {'构建耗时':>10} {'加速':>8}")
+    for feed_count in [int(value) for value in args.feeds.split(",") if value.strip()]:
+        rng = random.Random(args.seed)
+        items = build_prompts(feed_count, rng)
+        urls = build_urls(feed_count, args.lookups, rng)
+
+        # 原实现：每篇文章在队列服务和LLM服务中各解析一次，每次都重新构建字典
+        linear_us = measure(
+            urls, lambda url: [linear_resolve(to_prompts_dict(items), url) for _ in range(2)])
+
+        started = time.perf_counter()
+        router = PromptRouter(to_prompts_dict(items))
+        build_ms = (time.perf_counter() - started) * 1000
+
+        # 校验结果与逐个扫描一致
+        prompts = to_prompts_dict(items)
+        for url in urls[:500]:
+            expected = linear_resolve(prompts, url)
+            route = router.resolve(url)
+            assert (expected is None) == (route is None) and (route is None or route.site == expected[0])
+
+        scan_us = measure(urls, router._scan)
+        cached_us = measure(urls, router.resolve)
+
+        print(
+            f"{feed_count:>6} {linear_us:>10.1f}us {scan_us:>10.2f}us {cached_us:>8.2f}us"
+            f" {build_ms:>8.1f}ms {linear_us / cached_us:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Webhook接收基准测试
+
+生成不同正文长度和媒体项数量的合成webhook请求体，比较两种解析方式的耗时和内存：
+- 完整解析：标准库 json 解码后构建完整的 WebhookPayload（原实现）
+- 快速解析：orjson 解码（未安装时用标准库），只校验处理流程用到的四个字段
+
+内存为 tracemalloc 统计的单次解析的分配峰值（含返回结果）。
+
+加上 --e2e 时，另外通过 ASGI 直接调用 create_app() 创建的应用，统计两种模式下
+每秒可接收的请求数。入队操作替换为空操作，只测量接收和解析。
+
+用法（在项目根目录执行，需要配置文件）:
+    python scripts/benchmark_webhook_ingest.py
+    python scripts/benchmark_webhook_ingest.py --sizes 1000,20000,200000 --requests 2000 --e2e
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.webhook_parser import json_backend, loads, parse_webhook  # noqa: E402
+from app.models.schemas import WebhookPayload  # noqa: E402
+
+WEBHOOK_PATH = "/api/webhook/053e46c8c41a4de199c4"
+
+
+def build_body(content_chars: int, media_count: int, index: int = 0) -> bytes:
+    """生成合成的webhook请求体"""
+    paragraph = "<p>" + "这是一段用于基准测试的正文内容，包含中文和 ASCII text. " * 4 + "</p>"
+    content = (paragraph * (content_chars // len(paragraph) + 1))[:content_chars]
+    payload: Dict[str, Any] = {
+        "entry": {
+            "id": f"entry-{index}",
+            "publishedAt": "2024-05-01T08:30:00.000Z",
+            "insertedAt": "2024-05-01T08:31:12.345Z",
+            "feedId": "feed-1",
+            "title": f"基准测试文章 {index}",
+            "description": content[:200],
+            "content": content,
+            "author": "benchmark",
+            "url": f"https://example.com/articles/{index}",
+            "guid": f"https://example.com/articles/{index}",
+            "media": [
+                {
+                    "url": f"https://cdn.example.com/{index}/{media}.jpg",
+                    "type": "photo",
+                    "preview_image_url": f"https://cdn.example.com/{index}/{media}_s.jpg",
+                    "width": 1280,
+                    "height": 720,
+                    "blurhash": "LEHV6nWB2yk8pyo0adR*.7kCMdnj",
+                }
+                for media in range(media_count)
+            ],
+        },
+        "feed": {
+            "title": "Benchmark Feed",
+            "description": "合成feed",
+            "siteUrl": "https://example.com",
+            "checkedAt": "2024-05-01T08:30:00.000Z",
+            "ttl": 60,
+            "url": "https://example.com/feed.xml",
+            "lastModifiedHeader": "Wed, 01 May 2024 08:30:00 GMT",
+            "etagHeader": "\"abc123\"",
+            "rsshubRoute": None,
+            "rsshubNamespace": None,
+            "errorMessage": None,
+            "errorAt": None,
+        },
+        "view": 1,
+    }
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def parse_full(body: bytes):
+    """原实现：标准库解码并构建完整的 WebhookPayload"""
+    return WebhookPayload(**json.loads(body))
+
+
+def parse_fast(body: bytes):
+    """快速解析：只校验用到的字段"""
+    return parse_webhook(loads(body))
+
+
+def measure_time(body: bytes, parse: Callable[[bytes], Any], repeat: int) -> float:
+    """单次解析的平均耗时，单位：微秒"""
+    parse(body)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        parse(body)
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def measure_peak(body: bytes, parse: Callable[[bytes], Any]) -> int:
+    """单次解析的内存分配峰值，单位：字节"""
+    parse(body)
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = parse(body)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak - base
+
+
+def bench_parse(sizes: List[int], media_count: int, repeat: int):
+    """解析耗时和内存对比"""
+    print(f"解析对比（快速解析使用 {json_backend()}，媒体项 {media_count} 个）")
+    print(f"{'正文字符':>8} {'请求体':>9} {'完整解析':>10} {'快速解析':>10} {'加速':>6}"
+          f" {'完整峰值':>10} {'快速峰值':>10}")
+    for size in sizes:
+        body = build_body(size, media_count)
+        assert parse_fast(body).content == parse_full(body).entry.content
+
+        full_us = measure_time(body, parse_full, repeat)
+        fast_us = measure_time(body, parse_fast, repeat)
+        full_peak = measure_peak(body, parse_full)
+        fast_peak = measure_peak(body, parse_fast)
+        print(
+            f"{size:>12} {len(body) / 1024:>8.1f}K {full_us:>10.1f}us {fast_us:>10.1f}us"
+            f" {full_us / fast_us:>5.1f}x {full_peak / 1024:>9.1f}K {fast_peak / 1024:>9.1f}K")
+
+
+async def bench_e2e(sizes: List[int], media_count: int, requests: int, concurrency: int):
+    """通过ASGI调用应用，统计两种模式每秒可接收的请求数"""
+    import httpx
+
+    from app.controllers.webhook_controller import webhook_controller
+    from app.core.app import create_app
+    from app.core.config import config
+
+    async def add_to_queue(**kwargs) -> int:
+        return 1
+
+    # 只测量接收和解析，不写入数据库
+    webhook_controller.queue_service.add_to_queue = add_to_queue
+    webhook_settings = config.snapshot.app_config.webhook
+    original = webhook_settings.fast_ingest
+
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Content-Type": "application/json"}
+
+    print()
+    print(f"端到端接收（{requests} 个请求，并发 {concurrency}）")
+    print(f"{'正文字符':>8} {'完整解析':>12} {'快速解析':>12} {'提升':>6}")
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for size in sizes:
+                bodies = [build_body(size, media_count, index) for index in range(min(requests, 64))]
+                results = {}
+                for fast in (False, True):
+                    webhook_settings.fast_ingest = fast
+                    semaphore = asyncio.Semaphore(concurrency)
+
+                    async def send(index: int):
+                        async with semaphore:
+                            response = await client.post(
+                                WEBHOOK_PATH, content=bodies[index % len(bodies)], headers=headers)
+                            assert response.status_code == 200, response.status_code
+
+                    await send(0)
+                    started = time.perf_counter()
+                    await asyncio.gather(*(send(index) for index in range(requests)))
+                    results[fast] = requests / (time.perf_counter() - started)
+
+                print(
+                    f"{size:>12} {results[False]:>10.0f}/s {results[True]:>10.0f}/s"
+                    f" {results[True] / results[False]:>5.2f}x")
+    finally:
+        webhook_settings.fast_ingest = original
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Webhook接收基准测试")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="正文字符数，逗号分隔")
+    parser.add_argument("--media", type=int, default=8, help="每个请求的媒体项数量")
+    parser.add_argument("--repeat", type=int, default=500, help="每种解析方式的重复次数")
+    parser.add_argument("--e2e", action="store_true", help="同时测量通过应用接收的吞吐量")
+    parser.add_argument("--requests", type=int, default=1000, help="端到端测试的请求数")
+    parser.add_argument("--concurrency", type=int, default=16, help="端到端测试的并发数")
+    args = parser.parse_args()
+
+    sizes = [int(value) for value in args.sizes.split(",")]
+    bench_parse(sizes, args.media, args.repeat)
+    if args.e2e:
+        asyncio.run(bench_e2e(sizes, args.media, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
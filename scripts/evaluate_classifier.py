@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+本地分类器离线评估
+
+按 classifier.holdout_ratio 留出部分历史记录作为测试集，在其余记录上训练后，
+输出各置信度阈值下直接采用的比例（即节省的LLM调用）、准确率和被误判为无用的有用文章数
+
+用法（在项目根目录执行）:
+    python scripts/evaluate_classifier.py
+    python scripts/evaluate_classifier.py --thresholds 0.8,0.9,0.95,0.99
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.classifier_service import classifier_service  # noqa: E402
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="本地分类器离线评估")
+    parser.add_argument(
+        "--thresholds",
+        default="0.7,0.8,0.9,0.95,0.98",
+        help="逗号分隔的置信度阈值列表",
+    )
+    args = parser.parse_args()
+    thresholds = [float(value) for value in args.thresholds.split(",") if value.strip()]
+
+    report = classifier_service.evaluate(thresholds)
+    if not report:
+        print("没有可用于评估的标注记录")
+        return
+
+    for site, result in report.items():
+        print(f"\n== {site}")
+        if "skipped" in result:
+            print(f"   跳过（{result['records']} 条记录）: {result['skipped']}")
+            continue
+
+        print(
+            f"   训练 {result['train_records']} 条, 测试 {result['test_records']} 条"
+            f"（其中有用 {result['test_useful']} 条）")
+        print(f"   {'阈值':>6} {'直接采用':>8} {'准确率':>8} {'漏掉有用':>8} {'漏掉比例':>8}")
+        for row in result["thresholds"]:
+            accuracy = f"{row['accuracy']:.2%}" if row["accuracy"] is not None else "-"
+            print(
+                f"   {row['threshold']:>6.2f} {row['coverage']:>8.2%} {accuracy:>8}"
+                f" {row['missed_useful']:>8} {row['missed_useful_rate']:>8.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+本地模拟LLM服务
+
+同时提供 OpenAI 兼容接口（/v1/chat/completions）和 Anthropic Messages 接口（/v1/messages），
+支持流式响应，并模拟提供商的prompt缓存：相同的system前缀在缓存有效期内再次出现时，
+按缓存命中返回用量（OpenAI 口径为 prompt_tokens_details.cached_tokens，
+Anthropic 口径为 cache_read_input_tokens / cache_creation_input_tokens），
+用于在不消耗真实额度的情况下验证请求格式和缓存统计
+
+用法（在项目根目录执行）:
+    python scripts/mock_llm_server.py --port 8765
+
+然后在 config/secrets.yaml 中把endpoint的 base_url 指向 http://127.0.0.1:8765/v1，
+provider 可设为 openai、openrouter、custom 或 anthropic
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Dict, List, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+# 模拟的缓存有效期（秒），与 Anthropic ephemeral 缓存一致
+CACHE_TTL_SECONDS = 300
+
+# 低于该token数的前缀不缓存（与提供商的最小可缓存长度类似）
+MIN_CACHEABLE_TOKENS = 64
+
+app = FastAPI(title="mock-llm")
+
+# system前缀哈希 -> 过期时间
+_prefix_cache: Dict[str, float] = {}
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算token数（与 app.core.token_budget 相同的口径，不导入以免加载应用配置）"""
+    if not text:
+        return 0
+    wide_count = (len(text.encode("utf-8")) - len(text)) // 2
+    return wide_count + (len(text) - wide_count) // 4 + 1
+
+
+def _text_of(content: Any) -> str:
+    """把字符串或内容块列表形式的消息内容拼接为文本"""
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content or [] if isinstance(block, dict))
+
+
+def _cache_lookup(system: str) -> Tuple[int, int]:
+    """
+    查询并更新模拟的前缀缓存
+
+    Returns:
+        (命中缓存的token数, 写入缓存的token数)
+    """
+    tokens = estimate_tokens(system)
+    if tokens < MIN_CACHEABLE_TOKENS:
+        return 0, 0
+
+    key = hashlib.sha256(system.encode("utf-8")).hexdigest()
+    now = time.monotonic()
+    hit = _prefix_cache.get(key, 0) > now
+    _prefix_cache[key] = now + CACHE_TTL_SECONDS
+    return (tokens, 0) if hit else (0, tokens)
+
+
+def _fake_answer(system: str, user: str) -> str:
+    """按prompt类型生成格式正确的回答"""
+    if "JSON数组" in system:
+        count = user.count("[文章")
+        if "简短原因" in system:
+            return json.dumps([{"id": i + 1, "useful": True, "reason": "模拟"} for i in range(count)])
+        return json.dumps([
+            {"id": i + 1, "title": "", "summary": "模拟摘要", "useful": True, "reason": "模拟"}
+            for i in range(count)
+        ], ensure_ascii=False)
+    if "概括" in system:
+        return "模拟摘要。"
+    if "verdict" in system:
+        return json.dumps({"verdict": "uncertain", "reason": "模拟"}, ensure_ascii=False)
+    if "简短原因" in system:
+        return json.dumps({"useful": True, "reason": "模拟"}, ensure_ascii=False)
+    return json.dumps(
+        {"useful": True, "reason": "模拟", "title": "", "summary": "模拟摘要"}, ensure_ascii=False)
+
+
+def _chunks(text: str, size: int = 8) -> List[str]:
+    """把回答切分为流式输出的片段"""
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    """OpenAI 兼容接口"""
+    body = await request.json()
+    messages = body.get("messages") or []
+    system = "".join(_text_of(m["content"]) for m in messages if m.get("role") == "system")
+    user = "".join(_text_of(m["content"]) for m in messages if m.get("role") != "system")
+
+    cached, cache_write = _cache_lookup(system)
+    answer = _fake_answer(system, user)
+    usage = {
+        "prompt_tokens": estimate_tokens(system) + estimate_tokens(user),
+        "completion_tokens": estimate_tokens(answer),
+        "prompt_tokens_details": {"cached_tokens": cached, "cache_write_tokens": cache_write},
+    }
+
+    if not body.get("stream"):
+        return {
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}}],
+            "usage": usage,
+        }
+
+    include_usage = (body.get("stream_options") or {}).get("include_usage")
+
+    async def events():
+        for piece in _chunks(answer):
+            yield f"data: {json.dumps({'choices': [{'index': 0, 'delta': {'content': piece}}]})}\n\n"
+            await asyncio.sleep(0.005)
+        if include_usage:
+            yield f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/v1/messages")
+async def messages(request: Request):
+    """Anthropic Messages 接口"""
+    body = await request.json()
+    system_blocks = body.get("system") or []
+    system = _text_of(system_blocks)
+    user = "".join(_text_of(m["content"]) for m in body.get("messages") or [])
+
+    # 只有标注了 cache_control 的前缀才会被缓存
+    marked = isinstance(system_blocks, list) and any(
+        isinstance(block, dict) and block.get("cache_control") for block in system_blocks)
+    cached, cache_write = _cache_lookup(system) if marked else (0, 0)
+    answer = _fake_answer(system, user)
+    usage = {
+        "input_tokens": estimate_tokens(system) + estimate_tokens(user) - cached - cache_write,
+        "output_tokens": estimate_tokens(answer),
+        "cache_read_input_tokens": cached,
+        "cache_creation_input_tokens": cache_write,
+    }
+
+    if not body.get("stream"):
+        return {
+            "id": "msg_mock",
+            "type": "message",
+            "role": "assistant",
+            "content": [{"type": "text", "text": answer}],
+            "stop_reason": "end_turn",
+            "usage": usage,
+        }
+
+    async def events():
+        start = {"type": "message_start", "message": {"usage": {**usage, "output_tokens": 0}}}
+        yield f"event: message_start\ndata: {json.dumps(start)}\n\n"
+        for piece in _chunks(answer):
+            delta = {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": piece}}
+            yield f"event: content_block_delta\ndata: {json.dumps(delta)}\n\n"
+            await asyncio.sleep(0.005)
+        end = {"type": "message_delta", "usage": {"output_tokens": usage["output_tokens"]}}
+        yield f"event: message_delta\ndata: {json.dumps(end)}\n\n"
+        yield f"event: message_stop\ndata: {json.dumps({'type': 'message_stop'})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="本地模拟LLM服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()